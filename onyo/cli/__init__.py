@@ -1,3 +1,4 @@
+from .cache import cache
 from .cat import cat
 from .config import config
 from .edit import edit
@@ -15,6 +16,7 @@ from .tree import tree
 from .unset import unset
 
 __all__ = [
+    'cache',
     'cat',
     'config',
     'edit',
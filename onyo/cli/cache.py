@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from onyo.lib.onyo import OnyoRepo
+from onyo.lib.commands import onyo_cache
+
+if TYPE_CHECKING:
+    import argparse
+
+args_cache = {
+    'action': dict(
+        metavar='ACTION',
+        choices=['status', 'warm', 'clear'],
+        help=r"""
+            Action to perform: ``status``, ``warm``, or ``clear``.
+        """
+    ),
+}
+
+epilog_cache = r"""
+.. rubric:: Examples
+
+Parse and cache all assets, so that subsequent commands don't need to:
+
+.. code:: shell
+
+    $ onyo cache warm
+
+Display how much of the inventory is cached:
+
+.. code:: shell
+
+    $ onyo cache status
+"""
+
+
+def cache(args: argparse.Namespace) -> None:
+    r"""
+    Manage the cache of parsed asset contents.
+
+    Onyo caches the parsed content of assets (keyed by the content itself), so
+    that commands like ``onyo get`` don't need to parse assets that did not
+    change. The cache is stored in the ``.git/`` directory and is not shared.
+    Its maximum size is set by the ``onyo.cache.size`` configuration option (in
+    MiB). If exceeded, the least recently used entries are removed.
+
+    If ``onyo.cache.index`` is enabled, Onyo also maintains an index of asset
+    keys and values, which lets ``onyo get --match KEY=VALUE`` read only the
+    assets with that value.
+
+    Actions:
+
+      * ``status``: display the number of cached entries, their size, and how
+        many of the assets in the inventory are cached
+      * ``warm``: parse and cache all assets that are not yet cached
+      * ``clear``: remove all entries from the cache and the key index
+    """
+    repo = OnyoRepo(Path.cwd(), find_root=True)
+    onyo_cache(repo, args.action)
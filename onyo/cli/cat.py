@@ -18,6 +18,17 @@ args_cat = {
             Paths of assets to print.
         """
     ),
+
+    'rev': dict(
+        args=('-r', '--rev'),
+        metavar='REV',
+        required=False,
+        default=None,
+        help=r"""
+            Print the assets as they were in the commit **REV** (e.g. a commit
+            hash, ``HEAD~3``, or a tag) instead of the current one.
+        """
+    ),
 }
 
 epilog_cat = r"""
@@ -40,6 +51,12 @@ Display the contents of an Asset Directory and all assets in it:
 .. code:: shell
 
     $ onyo cat admin/Karl\ Krebs/laptop_apple_macbookpro.9sdjwb/{,*}
+
+Display the contents of an asset as it was three commits ago:
+
+.. code:: shell
+
+    $ onyo cat --rev HEAD~3 accounting/Bingo\ Bob/laptop_lenovo_T490s.abc123
 """
 
 
@@ -54,4 +71,5 @@ def cat(args: argparse.Namespace) -> None:
 
     inventory = Inventory(repo=OnyoRepo(Path.cwd(), find_root=True))
     onyo_cat(inventory,
-             paths)
+             paths,
+             rev=args.rev)
@@ -9,6 +9,30 @@ from onyo.lib.commands import fsck as fsck_cmd
 if TYPE_CHECKING:
     import argparse
 
+args_fsck = {
+    'full': dict(
+        args=('--full',),
+        action='store_true',
+        help=r"""
+            Check the entire repository instead of only the paths changed since
+            the last successful run.
+        """
+    ),
+
+    'jobs': dict(
+        args=('-j', '--jobs'),
+        metavar='JOBS',
+        type=int,
+        required=False,
+        default=None,
+        help=r"""
+            Validate assets with **JOBS** processes in parallel. **0** uses all
+            available CPUs. Defaults to the ``onyo.core.jobs`` configuration
+            (or **1**).
+        """
+    ),
+}
+
 epilog_fsck = r"""
 .. rubric:: Examples
 
@@ -17,6 +41,13 @@ Check the validity of an Onyo repository:
 .. code:: shell
 
     $ onyo fsck
+
+Check the entire repository, not only the changes since the last successful
+check:
+
+.. code:: shell
+
+    $ onyo fsck --full
 """
 
 
@@ -32,7 +63,15 @@ def fsck(args: argparse.Namespace) -> None:
         .anchor file
       * ``asset-unique``: verify that all asset names are unique
       * ``asset-yaml``: verify that all asset contents are valid YAML
+
+    The tests run concurrently.
+
+    After a successful run, the current commit is recorded as verified (as
+    ``refs/onyo/fsck``). Subsequent runs only check the paths changed since
+    then, unless ``--full`` is given. The ``clean-tree`` and ``anchors`` tests
+    always check the entire worktree.
     """
-    # TODO: Pass args and have a test; Actually - no args defined?
     repo = OnyoRepo(Path.cwd(), find_root=True)
-    fsck_cmd(repo)
+    fsck_cmd(repo,
+             jobs=args.jobs,
+             full=args.full)
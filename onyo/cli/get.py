@@ -4,15 +4,29 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 from onyo.argparse_helpers import StoreSortOption
+from onyo.lib.aggregations import Aggregation
 from onyo.lib.onyo import OnyoRepo
 from onyo.lib.commands import onyo_get
-from onyo.lib.filters import Filter
+from onyo.lib.consts import OUTPUT_FORMATS
+from onyo.lib.filters import Filter, Query
 from onyo.lib.inventory import Inventory
 
 if TYPE_CHECKING:
     import argparse
 
 args_get = {
+    'aggregations': dict(
+        args=('-a', '--agg'),
+        metavar='AGG',
+        nargs='+',
+        help=r"""
+            Print aggregated results instead of assets. **AGG** is one of
+            ``count``, ``count(KEY)``, ``sum(KEY)``, ``min(KEY)``, ``max(KEY)``,
+            or ``mean(KEY)``. All but ``count`` consider numeric values only.
+            Results are computed per group, if ``--group-by`` is given.
+        """
+    ),
+
     'depth': dict(
         args=('-d', '--depth'),
         metavar='DEPTH',
@@ -25,6 +39,33 @@ args_get = {
         """
     ),
 
+    'format': dict(
+        args=('-f', '--format'),
+        metavar='FORMAT',
+        choices=OUTPUT_FORMATS,
+        required=False,
+        default=None,
+        help=r"""
+            Print results as **FORMAT**. One of ``table`` (default), ``tsv``,
+            ``csv``, ``json`` (a list of objects), or ``ndjson`` (one object per
+            line). All but ``table`` are written as soon as results are
+            available.
+        """
+    ),
+
+    'jobs': dict(
+        args=('-j', '--jobs'),
+        metavar='JOBS',
+        type=int,
+        required=False,
+        default=None,
+        help=r"""
+            Parse assets with **JOBS** processes in parallel. **0** uses all
+            available CPUs. Defaults to the ``onyo.core.jobs`` configuration
+            (or **1**).
+        """
+    ),
+
     'keys': dict(
         args=('-k', '--keys'),
         metavar='KEY',
@@ -35,12 +76,24 @@ args_get = {
         """
     ),
 
+    'limit': dict(
+        args=('-l', '--limit'),
+        metavar='LIMIT',
+        type=int,
+        required=False,
+        default=None,
+        help=r"""
+            Print only the first **LIMIT** results (after sorting).
+        """
+    ),
+
     'machine_readable': dict(
         args=('-H', '--machine-readable'),
         action='store_true',
         help=r"""
             Useful for scripting. Do not print headers and separate values with
-            a single tab instead of variable white space.
+            a single tab instead of variable white space. Alias for
+            ``--format tsv``.
         """
     ),
 
@@ -58,6 +111,27 @@ args_get = {
               * ``<dict>``
               * ``<list>``
               * ``<unset>``
+
+            Instead of ``=``, these operators can be used:
+
+              * ``KEY!=VALUE``: does not match ``KEY=VALUE``
+              * ``KEY<VALUE``, ``KEY<=VALUE``, ``KEY>VALUE``, ``KEY>=VALUE``:
+                compare numbers or dates (e.g. ``purchase_date<2020-01-01``)
+              * ``KEY in VALUE,VALUE,...``: equals any of the values
+
+            Criteria containing ``=`` are split at the first ``=``. Hence, a
+            **KEY** ending with ``!``, ``<``, or ``>`` can't be matched.
+        """
+    ),
+
+    'group_by': dict(
+        args=('-g', '--group-by'),
+        metavar='KEY',
+        nargs='+',
+        help=r"""
+            Print a summary per group of assets with the same values for
+            **KEY**\ s instead of the assets. Aggregates ``count`` unless
+            ``--agg`` is given. Can't be combined with ``--keys``.
         """
     ),
 
@@ -80,6 +154,16 @@ args_get = {
         """
     ),
 
+    'null_delimited': dict(
+        args=('-z', '--null'),
+        action='store_true',
+        help=r"""
+            Terminate records with NUL instead of newline characters, to safely
+            process values containing newlines. Implies ``--format tsv`` unless
+            ``csv`` or ``ndjson`` are requested.
+        """
+    ),
+
     'path': dict(
         args=('-p', '--path'),
         metavar='PATH',
@@ -89,6 +173,22 @@ args_get = {
         """
     ),
 
+    'query': dict(
+        args=('-Q', '--query'),
+        metavar='QUERY',
+        type=str,
+        default=None,
+        help=r"""
+            Boolean expression to match assets with. **QUERY** combines criteria
+            of the same form as ``--match`` with ``and``, ``or``, ``not``, and
+            parentheses. Criteria with whitespace must be quoted. The operator
+            ``~`` matches if a part of the value matches the regular expression,
+            e.g.:
+            ``"type=laptop and (make=apple or make=lenovo) and not path~/retired/"``.
+            If ``--match`` is given as well, both must match.
+        """
+    ),
+
     'sort_ascending': dict(
         args=('-s', '--sort-ascending'),
         metavar='SORT_KEY',
@@ -129,6 +229,18 @@ List all assets belonging to a user:
 
     $ onyo get --path accounting/Bingo\ Bob
 
+List all monitors larger than 24 inches bought before 2020:
+
+.. code:: shell
+
+    $ onyo get --match type=monitor "display>24" "purchase_date<2020-01-01"
+
+List all laptops made by Apple or Lenovo, except for retired ones:
+
+.. code:: shell
+
+    $ onyo get --query "type=laptop and (make=apple or make=lenovo) and not path~/retired/"
+
 List all laptops in the warehouse:
 
 .. code:: shell
@@ -141,6 +253,20 @@ parsable format (suitable for piping):
 .. code:: shell
 
     $ onyo get --match type=laptop make=apple model=macbookpro --keys path --machine-readable
+
+Count assets per type and make, and get the total and mean display size of
+monitors per make:
+
+.. code:: shell
+
+    $ onyo get --group-by type make
+    $ onyo get --match type=monitor --group-by make --agg count "sum(display)" "mean(display)"
+
+Export all monitors to another system as JSON, one object per line:
+
+.. code:: shell
+
+    $ onyo get --match type=monitor --keys type make model serial display path --format ndjson
 """
 
 
@@ -159,7 +285,17 @@ def get(args: argparse.Namespace) -> None:
       * ``directory``: parent directory of the asset relative to repo root
       * ``path``: path of the asset relative to repo root
 
-    By default, the results are sorted by ``path``.
+    Queries that only print, match, and sort by **PSEUDO-KEYS** are answered
+    from the paths of assets, without reading their contents.
+
+    With ``--group-by`` or ``--agg``, a summary of the matching assets is
+    printed instead of the assets themselves. It's computed in a single pass
+    over the assets.
+
+    By default, assets are sorted by ``path`` and summaries by the
+    ``--group-by`` keys. Large results are sorted
+    using temporary files, and machine readable output is printed as soon as
+    it is sorted.
     """
     includes = args.path if args.path else []
     includes += args.include if args.include else []
@@ -168,7 +304,9 @@ def get(args: argparse.Namespace) -> None:
 
     inventory = Inventory(repo=OnyoRepo(Path.cwd(), find_root=True))
 
-    filters = [Filter(f).match for f in args.match] if args.match else None
+    filters = [Filter(f) for f in args.match] if args.match else []
+    filters += [Query.parse(args.query)] if args.query else []
+    aggregations = [Aggregation(a) for a in args.aggregations] if args.aggregations else None
 
     onyo_get(inventory=inventory,
              sort=args.sort,
@@ -179,5 +317,13 @@ def get(args: argparse.Namespace) -> None:
              # Type annotation for callables as filters, somehow
              # doesn't work with the bound method `Filter.match`.
              # Not clear, what's the problem.
-             match=filters,  # pyre-ignore[6]
-             keys=args.keys)
+             match=filters or None,  # pyre-ignore[6]
+             keys=args.keys,
+             limit=args.limit,
+             jobs=args.jobs,
+             output_format=args.format,
+             null_delimited=args.null_delimited,
+             group_by=args.group_by,
+             aggregations=aggregations,
+             # The results are printed only. Don't keep them in memory.
+             return_results=False)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+
+from onyo.lib.onyo import OnyoRepo
+
+assets = ['laptop_apple_macbookpro.0',
+          'simple/laptop_apple_macbookpro.1',
+          'simple/laptop_apple_macbookpro.2']
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+def test_cache(repo: OnyoRepo) -> None:
+    ret = subprocess.run(['onyo', 'cache', 'status'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert not ret.stderr
+    assert "Entries: 0" in ret.stdout
+    assert f"Assets in HEAD cached: 0 of {len(assets)}" in ret.stdout
+
+    ret = subprocess.run(['onyo', 'cache', 'warm'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert not ret.stderr
+    assert f"Parsed and cached {len(assets)} assets." in ret.stdout
+
+    ret = subprocess.run(['onyo', 'cache', 'status'], capture_output=True, text=True)
+    assert f"Entries: {len(assets)}" in ret.stdout
+    assert f"Assets in HEAD cached: {len(assets)} of {len(assets)}" in ret.stdout
+
+    # get works from the cache
+    ret = subprocess.run(['onyo', 'get', '--machine-readable', '--keys', 'serial'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert ret.stdout.split() == ['0', '1', '2']
+
+    ret = subprocess.run(['onyo', 'cache', 'clear'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert not ret.stderr
+    ret = subprocess.run(['onyo', 'cache', 'status'], capture_output=True, text=True)
+    assert "Entries: 0" in ret.stdout
+    assert repo.git.is_clean_worktree()
+
+
+def test_cache_invalid_action(repo: OnyoRepo) -> None:
+    ret = subprocess.run(['onyo', 'cache', 'invalid'], capture_output=True, text=True)
+    assert ret.returncode != 0
+    assert "invalid choice" in ret.stderr
+
+
+def test_cache_disabled(repo: OnyoRepo) -> None:
+    repo.git.set_config('onyo.cache.size', '0', location='local')
+    for action in ['status', 'warm', 'clear']:
+        ret = subprocess.run(['onyo', 'cache', action], capture_output=True, text=True)
+        assert ret.returncode == 0
+        assert "disabled" in ret.stdout
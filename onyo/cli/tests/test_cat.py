@@ -104,6 +104,38 @@ def test_cat_error_with_directory(repo: OnyoRepo, directory: str) -> None:
     assert ret.stderr
 
 
+@pytest.mark.repo_contents(*contents)
+def test_cat_rev(repo: OnyoRepo) -> None:
+    r"""
+    Test that `onyo cat --rev REV` prints assets as they were in the commit
+    **REV**.
+    """
+    for a in assets:
+        (repo.git.root / a).write_text("one_key: changed\n")
+    repo.git.commit([repo.git.root / a for a in assets], "change assets")
+
+    ret = subprocess.run(["onyo", "cat", *assets], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert ret.stdout == "one_key: changed\n" * len(assets)
+
+    for rev in ["HEAD~1", repo.git.get_hexsha("HEAD~1").strip()]:  # pyre-ignore[16]
+        ret = subprocess.run(["onyo", "cat", "--rev", rev, *assets], capture_output=True, text=True)
+        assert ret.returncode == 0
+        assert not ret.stderr
+        assert ret.stdout == content_str * len(assets)
+
+    # assets must exist in REV
+    ret = subprocess.run(["onyo", "cat", "-r", "HEAD~2", assets[0]], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert not ret.stdout
+    assert "The following paths are not assets" in ret.stderr
+
+    ret = subprocess.run(["onyo", "cat", "-r", "doesnotexist", assets[0]], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert not ret.stdout
+    assert "Unknown commit identifier" in ret.stderr
+
+
 @pytest.mark.repo_contents(*contents)
 @pytest.mark.parametrize('asset', assets)
 def test_same_target(repo: OnyoRepo, asset: str) -> None:
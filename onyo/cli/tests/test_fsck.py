@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from onyo.lib.onyo import OnyoRepo
+
+assets = [f'laptop_apple_macbookpro.{i}' for i in range(10)] + \
+         [f'simple/laptop_apple_macbookpro.{i}' for i in range(10, 20)]
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+@pytest.mark.parametrize('jobs', [[], ['--jobs', '1'], ['--jobs', '2'], ['-j', '0']])
+def test_fsck(repo: OnyoRepo, jobs: list[str]) -> None:
+    r"""
+    Test that `onyo fsck` passes on a valid repository and reports invalid
+    asset contents, with and without parallel processes.
+    """
+    ret = subprocess.run(['onyo', 'fsck', *jobs], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert all(f"'{test}' succeeded" in ret.stderr for test in ['clean-tree', 'anchors', 'asset-unique', 'asset-yaml'])
+
+    # invalid YAML
+    invalid = repo.git.root / assets[12]
+    invalid.write_text("type: [laptop\n")
+    repo.git.commit(invalid, "invalid YAML")
+    ret = subprocess.run(['onyo', 'fsck', *jobs], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert "The following files fail YAML validation" in ret.stderr
+    assert str(invalid) in ret.stderr
+    assert "failed fsck test 'asset-yaml'" in ret.stderr
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+def test_fsck_no_fork(repo: OnyoRepo, monkeypatch: pytest.MonkeyPatch) -> None:
+    r"""
+    Test that the processes validating YAML are not forked from the
+    (multi-threaded) fsck.
+    """
+    import concurrent.futures
+
+    from onyo.lib.commands import fsck
+
+    contexts = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            contexts.append(kwargs.get('mp_context'))
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', RecordingPool)
+
+    fsck(repo, jobs=2, full=True)
+    assert len(contexts) == 1
+    assert contexts[0] is not None and contexts[0].get_start_method() != 'fork'
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+def test_fsck_anchors(repo: OnyoRepo) -> None:
+    r"""
+    Test that `onyo fsck` reports directories without an anchor, unless they
+    are ignored.
+    """
+    # directories ignored via .onyoignore don't need an anchor
+    ignored = repo.git.root / 'docs' / 'nested'
+    ignored.mkdir(parents=True)
+    (ignored / 'README').write_text("some text")
+    (repo.git.root / OnyoRepo.IGNORE_FILE_NAME).write_text("docs/\n")
+    repo.git.commit([ignored / 'README', repo.git.root / OnyoRepo.IGNORE_FILE_NAME], "ignore docs")
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert all(f"'{test}' succeeded" in ret.stderr for test in ['clean-tree', 'anchors', 'asset-unique', 'asset-yaml'])
+
+    # a directory without anchor fails all the tests it affects
+    missing = repo.git.root / 'simple' / 'new'
+    missing.mkdir()
+    (missing / assets[0]).write_text("type: laptop\n")
+    repo.git.commit(missing / assets[0], "duplicate asset name in a dir w/o anchor")
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert str(Path('simple') / 'new' / OnyoRepo.ANCHOR_FILE_NAME) in ret.stderr
+    assert "failed fsck test 'anchors'" in ret.stderr
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+def test_fsck_incremental(repo: OnyoRepo) -> None:
+    r"""
+    Test that `onyo fsck` records the verified commit, and subsequently checks
+    only the paths changed since then unless `--full` is given.
+    """
+    assert repo.get_verified_commit() is None
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert repo.get_verified_commit() == repo.git.get_head()
+
+    # pretend that invalid content was verified
+    invalid = repo.git.root / assets[3]
+    invalid.write_text("type: [laptop\n")
+    repo.git.commit(invalid, "invalid YAML")
+    repo.set_verified_commit(repo.git.get_head())  # pyre-ignore[6]
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    ret = subprocess.run(['onyo', 'fsck', '--full'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert str(invalid) in ret.stderr
+
+    # changed assets are checked, including against the names of unchanged ones
+    verified = repo.get_verified_commit()
+    changed = repo.git.root / assets[14]
+    changed.write_text("type: [laptop\n")
+    duplicate = repo.git.root / 'simple' / assets[5]
+    duplicate.write_text("type: laptop\n")
+    repo.git.commit([changed, duplicate], "invalid YAML and duplicate name")
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert "failed fsck test 'asset-unique'" in ret.stderr
+    assert str(repo.git.root / assets[5]) in ret.stderr
+    assert str(duplicate) in ret.stderr
+    assert str(changed) in ret.stderr
+    assert str(invalid) not in ret.stderr
+    # failures are not recorded
+    assert repo.get_verified_commit() == verified
+
+    # uncommitted changes are checked, too
+    duplicate.unlink()
+    changed.write_text("type: laptop\n")
+    invalid.write_text("type: laptop\n")
+    repo.git.commit([changed, duplicate, invalid], "fix")
+    (repo.git.root / assets[0]).write_text("type: [laptop\n")
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert "failed fsck test 'clean-tree'" in ret.stderr
+    assert str(repo.git.root / assets[0]) in ret.stderr
+
+
+@pytest.mark.repo_contents(*[(a, "type: laptop\nmake: apple\nmodel: macbookpro\n"
+                                 f"serial: {i}\n") for i, a in enumerate(assets)])
+def test_fsck_incremental_empty_dir(repo: OnyoRepo) -> None:
+    r"""
+    Test that `onyo fsck` reports an empty directory without an anchor created
+    after the last verified commit, although git doesn't list it as a change.
+    """
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert repo.get_verified_commit() == repo.git.get_head()
+
+    (repo.git.root / 'emptydir').mkdir()
+    ret = subprocess.run(['onyo', 'fsck'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert str(Path('emptydir') / OnyoRepo.ANCHOR_FILE_NAME) in ret.stderr
+    assert "failed fsck test 'anchors'" in ret.stderr
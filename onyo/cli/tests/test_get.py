@@ -130,6 +130,166 @@ def convert_contents(
         yield [file, contents]
 
 
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_format(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --format` and `-z` print the same results in different formats."""
+    import csv
+    import json
+
+    keys = ['path', 'num', 'bool', 'unset']
+    cmd = ['onyo', 'get', '--keys'] + keys
+    ret = subprocess.run(cmd + ['-H'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    rows = [line.split('\t') for line in ret.stdout.splitlines()]
+    assert len(rows) == len(asset_contents)
+    assert subprocess.run(cmd + ['--format', 'tsv'], capture_output=True, text=True).stdout == ret.stdout
+
+    ret = subprocess.run(cmd + ['--format', 'csv'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert list(csv.reader(ret.stdout.splitlines())) == [keys] + rows
+
+    ret = subprocess.run(cmd + ['--format', 'json'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    json_rows = json.loads(ret.stdout)
+    assert [list(r.keys()) for r in json_rows] == [keys] * len(rows)
+    assert [r['path'] for r in json_rows] == [r[0] for r in rows]
+    assert [r['unset'] for r in json_rows] == ['<unset>'] * len(rows)
+    # values keep their type
+    assert {'path': 'laptop_apple_macbookpro.1', 'num': 8, 'bool': True, 'unset': '<unset>'} in json_rows
+
+    ret = subprocess.run(cmd + ['--format', 'ndjson'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert [json.loads(line) for line in ret.stdout.splitlines()] == json_rows
+
+    # NUL-delimited records
+    ret = subprocess.run(cmd + ['-z'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert ret.stdout.split('\0') == ['\t'.join(r) for r in rows] + ['']
+    ret = subprocess.run(cmd + ['-z', '--format', 'ndjson'], capture_output=True, text=True)
+    assert [json.loads(r) for r in ret.stdout.split('\0') if r] == json_rows
+
+    # no results
+    ret = subprocess.run(cmd + ['--format', 'json', '--match', 'type=nothing'], capture_output=True, text=True)
+    assert json.loads(ret.stdout) == []
+
+    # invalid combinations
+    for invalid in [['-z', '--format', 'json'], ['-z', '--format', 'table'], ['-H', '--format', 'csv']]:
+        ret = subprocess.run(cmd + invalid, capture_output=True, text=True)
+        assert ret.returncode == 1
+        assert not ret.stdout
+        assert ret.stderr
+    ret = subprocess.run(cmd + ['--format', 'yaml'], capture_output=True, text=True)
+    assert ret.returncode == 2
+
+
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_filter_operators(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --match` compares numbers with operators."""
+    ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'path', 'num'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    rows = [line.split('\t') for line in ret.stdout.splitlines()]
+
+    for match, expected in [('num>8', [p for p, n in rows if n.isdigit() and int(n) > 8]),
+                            ('num<=8', [p for p, n in rows if n.isdigit() and int(n) <= 8]),
+                            ('num!=8', [p for p, n in rows if n != '8']),
+                            ('num in 8,16', [p for p, n in rows if n in ['8', '16']])]:
+        ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'path', '--match', match],
+                             capture_output=True, text=True)
+        assert ret.returncode == 0
+        assert ret.stdout.splitlines() == expected
+        assert expected
+
+    ret = subprocess.run(['onyo', 'get', '--match', 'num>many'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert "numeric or date value" in ret.stderr
+
+
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_query(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --query` combines criteria with and, or, and not."""
+    ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'path', 'type', 'make'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    rows = [line.split('\t') for line in ret.stdout.splitlines()]
+
+    query = "(type=laptop or type=headphones) and not (make=dell or path~one/)"
+    expected = [p for p, t, m in rows if t in ['laptop', 'headphones'] and m != 'dell' and 'one/' not in p]
+    ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'path', '--query', query], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert not ret.stderr
+    assert ret.stdout.splitlines() == expected
+    assert expected
+
+    # combined with --match
+    ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'path', '--query', query, '--match', 'type=laptop'],
+                         capture_output=True, text=True)
+    assert ret.stdout.splitlines() == [p for p, t, m in rows if p in expected and t == 'laptop']
+
+    ret = subprocess.run(['onyo', 'get', '--query', 'type=laptop or'], capture_output=True, text=True)
+    assert ret.returncode == 1
+    assert "ended unexpectedly" in ret.stderr
+
+
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_aggregate(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --group-by/--agg` prints summaries of the assets."""
+    import json
+
+    ret = subprocess.run(['onyo', 'get', '-H', '--keys', 'type', 'make', 'num'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    rows = [line.split('\t') for line in ret.stdout.splitlines()]
+
+    # count per group, sorted by the group keys
+    ret = subprocess.run(['onyo', 'get', '-H', '--group-by', 'type', 'make'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert not ret.stderr
+    groups = [dict(type=line.split('\t')[0], make=line.split('\t')[1]) for line in ret.stdout.splitlines()]
+    assert {(g['type'], g['make']) for g in groups} == {(t, m) for t, m, _ in rows}
+    assert len(groups) == len({(t, m) for t, m, _ in rows})
+    assert groups == natural_sort(groups, keys={'type': SORT_ASCENDING, 'make': SORT_ASCENDING})
+    assert sum(int(line.split('\t')[2]) for line in ret.stdout.splitlines()) == len(rows)
+
+    # numeric aggregations; strings with numbers count as numbers
+    cmd = ['onyo', 'get', '--format', 'json', '--agg', 'count', 'sum(num)', 'max(num)', 'mean(str)']
+    ret = subprocess.run(cmd, capture_output=True, text=True)
+    assert ret.returncode == 0
+    numbers = [int(n) for *_, n in rows if n.isdigit()]
+    assert json.loads(ret.stdout) == [{'count': len(rows), 'sum(num)': sum(numbers), 'max(num)': max(numbers),
+                                       'mean(str)': '<unset>'}]
+
+    # summaries can be sorted and limited, too
+    ret = subprocess.run(['onyo', 'get', '-H', '--group-by', 'make', '-S', 'count', '--limit', '1'],
+                         capture_output=True, text=True)
+    assert ret.returncode == 0
+    make, count = ret.stdout.strip().split('\t')
+    assert int(count) == max(sum(1 for r in rows if r[1] == m) for m in ['apple', 'dell'])
+
+    # invalid
+    for invalid in [['--agg', 'median(num)'], ['--group-by', 'make', '--keys', 'path'],
+                    ['--group-by', 'make', '-s', 'path']]:
+        ret = subprocess.run(['onyo', 'get'] + invalid, capture_output=True, text=True)
+        assert ret.returncode == 1
+        assert ret.stderr
+
+
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_limit(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --limit` prints the first results only."""
+    cmd = ['onyo', 'get', '-H', '--keys', 'path', '-S', 'path']
+    ret = subprocess.run(cmd, capture_output=True, text=True)
+    assert ret.returncode == 0
+    expected = ret.stdout.splitlines()
+    assert len(expected) > 2
+
+    ret = subprocess.run(cmd + ['--limit', '2'], capture_output=True, text=True)
+    assert ret.stdout.splitlines() == expected[:2]
+    assert not ret.stderr
+    assert ret.returncode == 0
+
+    ret = subprocess.run(cmd + ['--limit', '0'], capture_output=True, text=True)
+    assert "limit must be greater than 0" in ret.stderr
+    assert ret.returncode == 1
+
+
 @pytest.mark.repo_contents(*convert_contents([t for t in asset_contents
                                               if t[0] in ['laptop_apple_macbookpro.1',
                                                           'one/laptop_dell_precision.2',
@@ -147,6 +307,28 @@ def test_get_defaults(repo: OnyoRepo) -> None:
     assert ret.returncode == 0
 
 
+@pytest.mark.repo_contents(*convert_contents(asset_contents))
+def test_get_jobs(repo: OnyoRepo) -> None:
+    r"""Test that `onyo get --jobs` yields the same results in parallel."""
+    cmd = ['onyo', 'get', '-H', '--keys', 'path', 'num', 'str']
+    ret = subprocess.run(cmd, capture_output=True, text=True)
+    assert ret.returncode == 0
+    expected = ret.stdout
+
+    for jobs in ['0', '4']:
+        ret = subprocess.run(cmd + ['--jobs', jobs], capture_output=True, text=True)
+        assert ret.stdout == expected
+        assert not ret.stderr
+        assert ret.returncode == 0
+
+    repo.set_config('onyo.core.jobs', '2', location='local')
+    ret = subprocess.run(cmd, capture_output=True, text=True)
+    assert ret.stdout == expected
+    ret = subprocess.run(cmd + ['--jobs', '-1'], capture_output=True, text=True)
+    assert "Invalid number of jobs" in ret.stderr
+    assert ret.returncode == 1
+
+
 @pytest.mark.repo_contents(*convert_contents([t for t in asset_contents
                                               if t[0] in ['laptop_apple_macbookpro.1',
                                                           'one/laptop_dell_precision.2',
@@ -207,12 +389,14 @@ def test_get_all(
     (['str=foo', 'unset=bar'], 0),
     (['str=foo=bar'], 1),
     ([], 4)])
+@pytest.mark.parametrize('index', ['false', 'true'])
 def test_get_filter(
-        repo: OnyoRepo, matches: list[str], expected: int) -> None:
+        repo: OnyoRepo, matches: list[str], expected: int, index: str) -> None:
     r"""
     Test that `onyo get --match KEY=VALUE` retrieves the expected
-    files.
+    files, with and without the key index.
     """
+    repo.set_config('onyo.cache.index', index, location='local')
     keys = repo.get_asset_name_keys() + ['num', 'str', 'bool', 'unset']
     cmd = ['onyo', 'get', '--keys', *keys, '-H']
     cmd += ['--match', *matches] if matches else []
@@ -521,6 +705,37 @@ def test_natural_sort(keys: dict[str, sort_t], expected: list[int]) -> None:
     assert expectation == [str(a.get('path')) for a in sorted_assets]
 
 
+def test_natural_sort_single_pass(monkeypatch: pytest.MonkeyPatch) -> None:
+    r"""Test that a multi-key sort matches successive stable sorts and computes keys once per distinct value"""
+    import natsort
+
+    assets = [{'type': t, 'make': m, 'display': d, 'tags': [d]}
+              for t in ['monitor', 'laptop'] for m in ['dell', 'Apple', 'eizo'] for d in [24, '27', 9.5]]
+    keys = {'type': SORT_ASCENDING, 'make': SORT_ASCENDING, 'display': SORT_DESCENDING, 'tags': SORT_ASCENDING}
+
+    # same order as stable sorts by one key after the other
+    expected = assets
+    for key in reversed(keys):
+        expected = natsort.natsorted(expected, key=lambda a: a[key], alg=natsort.ns.IGNORECASE | natsort.ns.INT,
+                                     reverse=keys[key] == SORT_DESCENDING)
+
+    computed = []
+    natsort_keygen = natsort.natsort_keygen
+
+    def keygen(*args, **kwargs):
+        generate = natsort_keygen(*args, **kwargs)
+
+        def record(value):
+            computed.append(value)
+            return generate(value)
+        return record
+    monkeypatch.setattr(natsort, 'natsort_keygen', keygen)
+
+    assert natural_sort(assets, keys=keys) == expected  # pyre-ignore[6]
+    # one natural sort key per distinct value (per key), except for unhashable ones
+    assert len(computed) == 2 + 3 + 3 + len(assets)
+
+
 @pytest.mark.parametrize('assets', [[
     {'num': 'num-20', 'str': 'abc', 'path': Path('a13bc_foo_bar.1')},
     {'num': 'num-3', 'path': Path('a2cd_foo_bar.2')},
@@ -140,3 +140,33 @@ def test_tree_error_relative_path_outside_repo(repo: OnyoRepo) -> None:
     assert not ret.stdout
     assert "The following paths are not inventory directories:" in ret.stderr
     assert ret.returncode == 1
+
+
+@pytest.mark.repo_files(*assets)
+def test_tree_options(repo: OnyoRepo) -> None:
+    r"""
+    Test `onyo tree` with `--depth`, `--dirs-only`, `--count` and `--plain`.
+    """
+    ret = subprocess.run(['onyo', 'tree', '--depth', '2', '--dirs-only', '--count', '--plain', 'r', 'overlap'],
+                         capture_output=True, text=True)
+
+    # verify output
+    assert not ret.stderr
+    assert ret.returncode == 0
+    assert ret.stdout.splitlines() == ['r (2)',
+                                       '└── e (2)',
+                                       '    └── c (2)',
+                                       'overlap (4)',
+                                       '├── one (2)',
+                                       '└── two (2)']
+
+    # assets are listed up to the depth
+    ret = subprocess.run(['onyo', 'tree', '-d', '1', '-p', 'overlap/one'], capture_output=True, text=True)
+    assert ret.returncode == 0
+    assert ret.stdout.splitlines() == ['overlap/one',
+                                       '├── lap top_ap ple_mac book pro.3',
+                                       '└── laptop_apple_macbookpro.3']
+
+    ret = subprocess.run(['onyo', 'tree', '--depth', '-1'], capture_output=True, text=True)
+    assert not ret.stdout
+    assert ret.returncode == 1
@@ -11,13 +11,49 @@ if TYPE_CHECKING:
     import argparse
 
 args_tree = {
+    'count': dict(
+        args=('-c', '--count'),
+        action='store_true',
+        help=r"""
+            Show the number of assets in each directory (recursively).
+        """
+    ),
+
+    'depth': dict(
+        args=('-d', '--depth'),
+        metavar='DEPTH',
+        type=int,
+        required=False,
+        default=0,
+        help=r"""
+            Descend up to **DEPTH** levels into the directories specified. A
+            depth of **0** descends recursively without limit.
+        """
+    ),
+
     'directory': dict(
         metavar='DIR',
         nargs='*',
         help=r"""
             Directories to list.
         """
-    )
+    ),
+
+    'dirs_only': dict(
+        args=('-D', '--dirs-only'),
+        action='store_true',
+        help=r"""
+            List directories only.
+        """
+    ),
+
+    'plain': dict(
+        args=('-p', '--plain'),
+        action='store_true',
+        help=r"""
+            Print plain text without colors. This is faster for large trees.
+        """
+    ),
 }
 
 epilog_tree = r"""
@@ -28,6 +64,13 @@ List all assets and directories in a directory:
 .. code:: shell
 
     $ onyo tree shelf
+
+List only the directories of the first two levels, and how many assets each
+of them contains:
+
+.. code:: shell
+
+    $ onyo tree --dirs-only --depth 2 --count
 """
 
 
@@ -40,6 +83,9 @@ def tree(args: argparse.Namespace) -> None:
 
     If any of the directories do not exist, then no tree is printed and an error
     is returned.
+
+    Only assets and inventory directories are listed; untracked files and
+    paths ignored via ``.onyoignore`` are not.
     """
     inventory = Inventory(repo=OnyoRepo(Path.cwd(), find_root=True))
     dirs = [(d, Path(d).resolve()) for d in args.directory]
@@ -47,4 +93,8 @@ def tree(args: argparse.Namespace) -> None:
     dirs = dirs if dirs else [('.', Path.cwd())]
 
     onyo_tree(inventory,
-              dirs)
+              dirs,
+              depth=args.depth,
+              dirs_only=args.dirs_only,
+              count=args.count,
+              plain=args.plain)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from onyo.lib.consts import UNSET_VALUE
+from onyo.lib.exceptions import OnyoInvalidAggregationError
+from onyo.lib.utils import to_number
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+AGGREGATION_FUNCTIONS = ['count', 'sum', 'min', 'max', 'mean']
+r"""Functions available to aggregate assets with.
+
+``count`` counts assets (or assets with a value for a key). All others consider
+numeric values of a key only.
+"""
+
+
+@dataclass
+class Aggregation:
+    r"""This class translates a string expression like ``sum(KEY)`` to a
+    function aggregating assets.
+
+    Intended for use with string patterns used with onyo's CLI.
+    Aggregations accumulate their results in a state (see
+    `Aggregation.new_state()`), so that any number of assets can be aggregated
+    in a single pass.
+    """
+    _arg: str = field(repr=False)
+    function: str = field(init=False)
+    key: str | None = field(init=False)
+
+    def __post_init__(self) -> None:
+        r"""Parse the ``FUNCTION`` or ``FUNCTION(KEY)`` expression.
+
+        Example::
+
+            agg = Aggregation('mean(display)')
+            state = agg.new_state()
+            for asset in assets:
+                agg.update(state, asset)
+            agg.result(state)
+        """
+        self.function, self.key = self._format(self._arg)
+
+    @staticmethod
+    def _format(arg: str) -> tuple[str, str | None]:
+        r"""Split an aggregation into the function and the key it applies to."""
+        m = re.fullmatch(r'\s*(\w+)\s*(?:\((.+)\))?\s*', arg) if isinstance(arg, str) else None
+        if not m or m.group(1) not in AGGREGATION_FUNCTIONS:
+            raise OnyoInvalidAggregationError(
+                f"Aggregations must be formatted as `FUNCTION(KEY)`, with FUNCTION one of "
+                f"{', '.join(AGGREGATION_FUNCTIONS)}. `count` can be used without a key.")
+        function, key = m.group(1), m.group(2).strip() if m.group(2) else None
+        if key is None and function != 'count':
+            raise OnyoInvalidAggregationError(f"Aggregation `{function}` requires a key: `{function}(KEY)`")
+        return function, key
+
+    @property
+    def name(self) -> str:
+        r"""The name of the aggregation's result (e.g. ``sum(KEY)``)."""
+        return f"{self.function}({self.key})" if self.key else self.function
+
+    @staticmethod
+    def new_state() -> list:
+        r"""Get a new state to accumulate a result in.
+
+        The state is the number of considered values and their accumulated
+        value.
+        """
+        return [0, None]
+
+    def update(self,
+               state: list,
+               asset: dict) -> None:
+        r"""Accumulate `asset` into `state`."""
+        if self.key is None:
+            state[0] += 1
+            return
+        value = asset.get(self.key)
+        if self.function == 'count':
+            if value is not None and value != '' and value != UNSET_VALUE:
+                state[0] += 1
+            return
+        value = to_number(value)
+        if value is None:
+            return
+        state[0] += 1
+        if state[1] is None:
+            state[1] = value
+        elif self.function in ['sum', 'mean']:
+            state[1] += value
+        elif self.function == 'min':
+            state[1] = min(state[1], value)
+        else:
+            state[1] = max(state[1], value)
+
+    def result(self,
+               state: list) -> int | float | str:
+        r"""Get the result accumulated in `state`.
+
+        If no numeric value was accumulated, the sum is 0 and the other
+        results are ``UNSET_VALUE``.
+        """
+        if self.function == 'count':
+            return state[0]
+        if state[1] is None:
+            return 0 if self.function == 'sum' else UNSET_VALUE
+        return state[1] / state[0] if self.function == 'mean' else state[1]
+
+
+def aggregate(assets: Iterable[dict],
+              group_by: list[str],
+              aggregations: list[Aggregation]) -> list[dict]:
+    r"""Aggregate assets in a single pass.
+
+    Only the accumulated state per group is kept in memory, not the assets.
+
+    Parameters
+    ----------
+    assets
+        Assets to aggregate.
+    group_by
+        Keys to group assets by. Assets without a key, or with a key set to
+        `None`, are grouped under ``UNSET_VALUE``. If empty, all assets are aggregated into a single
+        group.
+    aggregations
+        Aggregations to compute per group.
+
+    Returns
+    -------
+    list of dict
+        A dictionary per group (in order of first appearance) with the values
+        of the `group_by` keys and the results of the `aggregations` by their
+        `Aggregation.name`.
+    """
+    groups: dict[tuple, tuple[list, list[list]]] = dict()
+    if not group_by:
+        groups[()] = ([], [a.new_state() for a in aggregations])
+    for asset in assets:
+        values = [UNSET_VALUE if v is None else v for v in (asset.get(k) for k in group_by)]
+        # Don't merge groups of equal, but differently typed values (1 and True),
+        # and group unhashable values by their representation.
+        group = tuple((type(v), v) if v.__hash__ else (type(v), str(v)) for v in values)
+        if group not in groups:
+            groups[group] = (values, [a.new_state() for a in aggregations])
+        states = groups[group][1]
+        for a, state in zip(aggregations, states):
+            a.update(state, asset)
+
+    return [dict(zip(group_by, values)) | {a.name: a.result(state) for a, state in zip(aggregations, states)}
+            for values, states in groups.values()]
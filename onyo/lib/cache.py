@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from onyo.lib.ui import ui
+
+if TYPE_CHECKING:
+    from typing import Generator, Iterable
+
+# Bump whenever the format of cached data or the way it is computed changes.
+PATHS_CACHE_VERSION = 1
+# relative to the git directory
+PATHS_CACHE_FILE = Path('onyo') / 'paths.json'
+
+
+def load_paths_cache(cache_file: Path,
+                     key: str) -> dict[str, list[str]] | None:
+    r"""Load lists of paths from a cache file, if it's valid for `key`.
+
+    Parameters
+    ----------
+    cache_file
+      Path to the cache file.
+    key
+      Key identifying the state of the repository the cache is valid for.
+
+    Returns
+    -------
+    dict or None
+      Mapping of names to lists of (relative, POSIX) paths. `None`, if there is
+      no cache file, it is invalid, or it was written for a different `key`.
+    """
+    try:
+        with open(cache_file, 'r') as f:
+            content = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(content, dict) or \
+            content.get('version') != PATHS_CACHE_VERSION or \
+            content.get('key') != key:
+        ui.log_debug(f"Ignoring outdated cache {cache_file}")
+        return None
+    return content.get('paths')
+
+
+def store_paths_cache(cache_file: Path,
+                      key: str,
+                      paths: dict[str, list[str]]) -> None:
+    r"""Store lists of paths in a cache file, valid for `key`.
+
+    The file is replaced atomically. Failure to write the cache is not an
+    error, since it's merely a performance optimization.
+
+    Parameters
+    ----------
+    cache_file
+      Path to the cache file.
+    key
+      Key identifying the state of the repository the cache is valid for.
+    paths
+      Mapping of names to lists of (relative, POSIX) paths.
+    """
+    tmp = None
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=cache_file.parent, delete=False) as f:
+            tmp = Path(f.name)
+            json.dump({'version': PATHS_CACHE_VERSION, 'key': key, 'paths': paths}, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        ui.log_debug(f"Failed to write cache {cache_file}: {e}")
+        if tmp:
+            tmp.unlink(missing_ok=True)
+
+
+# Bump whenever the format of cached asset content or the way it is parsed changes.
+ASSET_CACHE_VERSION = 3
+# relative to the git directory
+ASSET_CACHE_FILE = Path('onyo') / 'assets.sqlite'
+# Keys of the JSON objects encoding dates in cached asset content. They can't
+# clash with asset keys, since these are not cached if they start with NUL.
+_DATE_TAGS = {'\0date': date.fromisoformat, '\0datetime': datetime.fromisoformat}
+
+
+def _to_json(value: object) -> object:
+    r"""Get `value` in a form that encodes to JSON and decodes back to an equal `value`.
+
+    Raises
+    ------
+    TypeError
+      If `value` can't be represented exactly (e.g. non-string keys, tagged
+      values, or YAML sets).
+    """
+    t = type(value)
+    if value is None or t in (str, int, float, bool):
+        return value
+    if t is list:
+        return [_to_json(v) for v in value]  # pyre-ignore[16]
+    if t is dict:
+        if any(type(k) is not str or k.startswith('\0') for k in value):  # pyre-ignore[16]
+            raise TypeError("Keys are not all plain strings")
+        return {k: _to_json(v) for k, v in value.items()}  # pyre-ignore[16]
+    if t is datetime:
+        return {'\0datetime': value.isoformat()}  # pyre-ignore[16]
+    if t is date:
+        return {'\0date': value.isoformat()}  # pyre-ignore[16]
+    raise TypeError(f"Can't represent {t.__name__} in JSON")
+
+
+def _from_json(obj: dict) -> object:
+    r"""Decode the JSON objects that `_to_json()` encodes dates with."""
+    if len(obj) == 1:
+        k, v = next(iter(obj.items()))
+        if k in _DATE_TAGS:
+            return _DATE_TAGS[k](v)
+    return obj
+
+
+class AssetCache(object):
+    r"""A persistent cache of parsed asset contents, keyed by git blob id.
+
+    Since a blob id identifies a file's content, entries never need to be
+    invalidated. Instead, the cache is bounded in size and evicts the least
+    recently used entries.
+
+    Lookups of entries are recorded in memory and written to the database
+    in a batch by `AssetCache.flush()`, as are newly added entries. Contents
+    are stored as JSON (see `AssetCache.add()`), so that reading the cache
+    can't execute anything.
+
+    Errors of the underlying database are not raised, but disable the cache.
+    """
+
+    def __init__(self,
+                 db_file: Path,
+                 max_size: int) -> None:
+        r"""Instantiate an `AssetCache` stored at `db_file`.
+
+        Parameters
+        ----------
+        db_file
+          Path to the SQLite database file. It is created on first use.
+        max_size
+          Maximum size of the cached content in bytes.
+        """
+        self.db_file: Path = db_file
+        self.max_size: int = max_size
+        self._db: sqlite3.Connection | None = None
+        self._disabled: bool = False
+        self._hits: set[str] = set()
+        self._new: dict[str, bytes] = dict()
+
+    def __del__(self) -> None:
+        self.close()
+
+    @staticmethod
+    def _version() -> str:
+        r"""Version string of the cache. Content cached by a different version is discarded."""
+        from ruamel.yaml import __version__ as ruamel_version
+        return f"{ASSET_CACHE_VERSION}:{ruamel_version}"
+
+    def _connect(self) -> sqlite3.Connection | None:
+        r"""Get the database connection. Connects (and sets up the database) on first use."""
+        if self._db is not None or self._disabled:
+            return self._db
+        try:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.db_file, timeout=10)
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute("CREATE TABLE IF NOT EXISTS assets "
+                           "(blob_id TEXT PRIMARY KEY, content BLOB NOT NULL, "
+                           "size INTEGER NOT NULL, atime INTEGER NOT NULL)")
+                db.execute("CREATE INDEX IF NOT EXISTS assets_atime ON assets (atime)")
+                row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != self._version():
+                    db.execute("DELETE FROM assets")
+                    db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self._version(),))
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        self._db = db
+        return db
+
+    def _disable(self,
+                 error: Exception) -> None:
+        r"""Stop using the cache due to `error`."""
+        ui.log_debug(f"Disabling asset cache {self.db_file}: {error}")
+        self._disabled = True
+        self.close()
+
+    def lookup(self,
+               blob_ids: Iterable[str],
+               touch: bool = True) -> dict[str, bytes]:
+        r"""Get the cached entries for `blob_ids`.
+
+        Parameters
+        ----------
+        blob_ids
+          Blob ids to look up.
+        touch
+          Whether to record the lookup as a use of the entries found,
+          which protects them from eviction.
+
+        Returns
+        -------
+        dict
+          Mapping of the blob ids found in the cache to their encoded content.
+          Use `AssetCache.decode()` to get the content.
+        """
+        found = dict()
+        db = self._connect()
+        if db is None:
+            return found
+        blob_ids = list(blob_ids)
+        # stay below SQLite's limit of host parameters
+        chunk_size = 500
+        try:
+            for i in range(0, len(blob_ids), chunk_size):
+                chunk = blob_ids[i:i + chunk_size]
+                found.update(db.execute(f"SELECT blob_id, content FROM assets "
+                                        f"WHERE blob_id IN ({', '.join('?' * len(chunk))})", chunk))
+        except sqlite3.Error as e:
+            self._disable(e)
+            return dict()
+        found.update((b, self._new[b]) for b in blob_ids if b in self._new)
+        if touch:
+            self._hits.update(found)
+        return found
+
+    @staticmethod
+    def decode(data: bytes) -> dict:
+        r"""Get the asset content from an encoded cache entry."""
+        return json.loads(data, object_hook=_from_json)
+
+    def add(self,
+            blob_id: str,
+            content: dict) -> None:
+        r"""Add `content` for `blob_id` to the cache.
+
+        The entry is written on the next `AssetCache.flush()`. Content JSON
+        can't represent exactly (besides dates) is not cached, but parsed
+        each time instead.
+        """
+        if self._disabled:
+            return
+        try:
+            encoded = _to_json(content)
+        except TypeError as e:
+            ui.log_debug(f"Not caching content of {blob_id}: {e}")
+            return
+        self._new[blob_id] = json.dumps(encoded, separators=(',', ':')).encode()
+
+    def flush(self) -> None:
+        r"""Write added entries and recorded lookups, and evict entries if necessary."""
+        if not self._hits and not self._new:
+            return
+        db = self._connect()
+        if db is None:
+            return
+        now = time.time_ns()
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?)",
+                               ((b, c, len(c), now) for b, c in self._new.items()))
+                db.executemany("UPDATE assets SET atime = ? WHERE blob_id = ?",
+                               ((now, b) for b in self._hits.difference(self._new)))
+                if self._new:
+                    self._evict(db)
+        except sqlite3.Error as e:
+            self._disable(e)
+        self._hits = set()
+        self._new = dict()
+
+    def _evict(self,
+               db: sqlite3.Connection) -> None:
+        r"""Remove least recently used entries, if the cache exceeds its maximum size.
+
+        Entries are removed until the cache is below 90% of the maximum size,
+        so that eviction doesn't need to happen on every write.
+        """
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM assets").fetchone()[0]
+        if total <= self.max_size:
+            return
+        target = total - int(self.max_size * 0.9)
+        evict = []
+        for blob_id, size in db.execute("SELECT blob_id, size FROM assets ORDER BY atime"):
+            if target <= 0:
+                break
+            evict.append((blob_id,))
+            target -= size
+        db.executemany("DELETE FROM assets WHERE blob_id = ?", evict)
+        ui.log_debug(f"Evicted {len(evict)} entries from asset cache {self.db_file}")
+
+    def status(self) -> dict[str, int]:
+        r"""Get the number of entries and their total size in the cache.
+
+        Returns
+        -------
+        dict
+          With the keys 'entries', 'size', and 'max_size' (sizes in bytes).
+        """
+        self.flush()
+        entries, size = 0, 0
+        db = self._connect()
+        if db is not None:
+            try:
+                entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM assets").fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+        return {'entries': entries, 'size': size, 'max_size': self.max_size}
+
+    def clear(self) -> None:
+        r"""Remove all entries from the cache."""
+        self._hits = set()
+        self._new = dict()
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            with db:
+                db.execute("DELETE FROM assets")
+            db.execute("VACUUM")
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def close(self) -> None:
+        r"""Flush and close the database connection."""
+        db = getattr(self, '_db', None)
+        if db is None:
+            return
+        if not self._disabled:
+            self.flush()
+        self._db = None
+        db.close()
+
+
+# Bump whenever the format of the index or the way it is computed changes.
+KEY_INDEX_VERSION = 2
+# relative to the git directory
+KEY_INDEX_FILE = Path('onyo') / 'keys.sqlite'
+
+
+class KeyIndex(object):
+    r"""A persistent index of asset paths by the values of their keys.
+
+    The index reflects the assets of a single commit. It maps each key and
+    the string representation of its (scalar) value to the paths of the
+    assets having that value. Keys with lists or dictionaries as values are
+    not indexed. Assets that fail to parse are recorded separately (see
+    `KeyIndex.unparsable()`), so that queries can report them.
+
+    Errors of the underlying database are raised as `sqlite3.Error`. Callers
+    are expected to fall back to reading the assets instead.
+    """
+
+    def __init__(self,
+                 db_file: Path) -> None:
+        r"""Instantiate a `KeyIndex` stored at `db_file`.
+
+        Parameters
+        ----------
+        db_file
+          Path to the SQLite database file. It is created on first use.
+        """
+        self.db_file: Path = db_file
+        self._db: sqlite3.Connection | None = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        r"""Get the database connection. Connects (and sets up the database) on first use."""
+        if self._db is not None:
+            return self._db
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.db_file, timeout=10)
+        try:
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT NOT NULL, value TEXT NOT NULL, "
+                           "path TEXT NOT NULL)")
+                db.execute("CREATE INDEX IF NOT EXISTS keys_value ON keys (key, value)")
+                db.execute("CREATE INDEX IF NOT EXISTS keys_path ON keys (path)")
+                db.execute("CREATE TABLE IF NOT EXISTS unparsable (path TEXT PRIMARY KEY)")
+                row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != str(KEY_INDEX_VERSION):
+                    db.execute("DELETE FROM keys")
+                    db.execute("DELETE FROM unparsable")
+                    db.execute("DELETE FROM meta")
+                    db.execute("INSERT INTO meta VALUES ('version', ?)", (str(KEY_INDEX_VERSION),))
+        except sqlite3.Error:
+            db.close()
+            raise
+        self._db = db
+        return db
+
+    def get_meta(self,
+                 key: str) -> str | None:
+        r"""Get the value of `key` stored alongside the index (like the indexed commit)."""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def indexable(value: object) -> bool:
+        r"""Whether `value` is indexed (i.e. it's not a list or dictionary)."""
+        return not isinstance(value, (list, dict))
+
+    def update(self,
+               meta: dict[str, str],
+               removed: Iterable[str],
+               added: Iterable[tuple[str, dict | None]],
+               full: bool = False) -> None:
+        r"""Update the index in a single transaction.
+
+        Parameters
+        ----------
+        meta
+          Values to store alongside the index, describing the state it now
+          reflects (like the indexed commit).
+        removed
+          Paths of assets to remove from the index. This must include the
+          assets in `added`, if they were indexed before.
+        added
+          Pairs of paths and contents of assets to (re-)add to the index.
+          The content is `None` for assets that failed to parse.
+        full
+          Whether to discard the entire index first.
+        """
+        db = self._connect()
+        with db:
+            if full:
+                db.execute("DELETE FROM keys")
+                db.execute("DELETE FROM unparsable")
+            else:
+                removed = [(p,) for p in removed]
+                db.executemany("DELETE FROM keys WHERE path = ?", removed)
+                db.executemany("DELETE FROM unparsable WHERE path = ?", removed)
+            unparsable = []
+
+            def rows() -> Generator[tuple[str, str, str], None, None]:
+                for p, content in added:
+                    if content is None:
+                        unparsable.append((p,))
+                        continue
+                    yield from ((k, str(v), p) for k, v in content.items()
+                                if isinstance(k, str) and self.indexable(v))
+            db.executemany("INSERT INTO keys VALUES (?, ?, ?)", rows())
+            db.executemany("INSERT OR REPLACE INTO unparsable VALUES (?)", unparsable)
+            db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+
+    def lookup(self,
+               key: str,
+               value: str) -> set[str]:
+        r"""Get the paths of all assets with `key` set to `value`.
+
+        Values are compared with their string representation.
+        """
+        return {p for p, in self._connect().execute("SELECT path FROM keys WHERE key = ? AND value = ?",
+                                                    (key, value))}
+
+    def unparsable(self) -> set[str]:
+        r"""Get the paths of all assets that failed to parse."""
+        return {p for p, in self._connect().execute("SELECT path FROM unparsable")}
+
+    def close(self) -> None:
+        r"""Close the database connection."""
+        db = getattr(self, '_db', None)
+        if db is None:
+            return
+        self._db = None
+        db.close()
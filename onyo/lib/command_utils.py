@@ -16,11 +16,19 @@ from .inventory import (
 from .ui import ui
 if TYPE_CHECKING:
     from typing import (
+        Any,
+        Callable,
         Generator,
+        IO,
+        Iterable,
+        TextIO,
     )
 
     from .onyo import OnyoRepo
-    from .consts import sort_t
+    from .consts import (
+        output_format_t,
+        sort_t,
+    )
 
 log: logging.Logger = logging.getLogger('onyo.command_utils')
 
@@ -87,26 +95,242 @@ def natural_sort(assets: list[dict],
                  keys: dict[str, sort_t]) -> list[dict]:
     r"""Sort an asset list by a list of ``keys``.
 
+    This is a single, stable sort by a composite key (see `get_sort_key()`),
+    regardless of the number of ``keys``.
+
     Parameters
     ----------
     assets
         Assets to sort.
     keys
-        Keys to sort ``assets`` by.
-    reverse
-        Whether to sort in reverse order.
+        Keys to sort ``assets`` by, in order of precedence, and their sort
+        order.
+    """
+    return sorted(assets, key=get_sort_key(keys))
+
+
+SORT_BUFFER_SIZE = 100_000
+r"""Number of assets `sort_assets()` sorts in memory before spilling to disk."""
+
+SORT_KEY_CACHE_SIZE = 4096
+r"""Number of natural sort keys of values `get_sort_key()` caches per key."""
+
+
+class _Descending(object):
+    r"""Wrap a sort key to invert its order."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key: Any) -> None:
+        self.key = key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.key == other.key
+
+    def __lt__(self, other: _Descending) -> bool:
+        return other.key < self.key
+
+
+def get_sort_key(keys: dict[str, sort_t]) -> Callable[[dict], tuple]:
+    r"""Get a function computing a composite natural sort key of an asset.
+
+    The key consists of the natural sort keys of the asset's values of all
+    ``keys``, inverted for descending ones. Sorting by it is a single pass over
+    the assets, no matter the number of ``keys``.
+
+    The natural sort keys of the most recent (hashable) values are cached, so
+    that they are computed only once for the few distinct values of commonly
+    sorted columns (like ``type`` or ``make``).
+
+    Parameters
+    ----------
+    keys
+        Keys to sort by, in order of precedence, and their sort order.
     """
+    from functools import lru_cache
+
     import natsort
 
-    for key in reversed(keys.keys()):
+    keygens = []
+    for key in keys:
         alg = natsort.ns.IGNORECASE | natsort.ns.INT
         if key == 'path':
             alg |= natsort.ns.PATH
-        assets = sorted(assets,
-                        key=natsort.natsort_keygen(key=lambda x: x.get(key), alg=alg),
-                        reverse=keys[key] == SORT_DESCENDING)
+        keygen = natsort.natsort_keygen(alg=alg)
+        keygens.append((key,
+                        lru_cache(maxsize=SORT_KEY_CACHE_SIZE, typed=True)(keygen),
+                        keygen,
+                        keys[key] == SORT_DESCENDING))
+
+    def sort_key(asset: dict) -> tuple:
+        composite = []
+        for key, cached_keygen, keygen, descending in keygens:
+            value = asset.get(key)
+            try:
+                k = cached_keygen(value)
+            except TypeError:
+                # unhashable values (lists, dicts) can't be cached
+                k = keygen(value)
+            composite.append(_Descending(k) if descending else k)
+        return tuple(composite)
+
+    return sort_key
+
+
+def _spill(assets: list[dict]) -> IO[bytes]:
+    r"""Write ``assets`` to a temporary file.
+
+    The file is removed when it is closed. Use `_read_spilled()` to read the
+    assets back in order.
+    """
+    import pickle
+    import tempfile
+
+    spill_file = tempfile.TemporaryFile()
+    pickler = pickle.Pickler(spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+    for asset in assets:
+        pickler.dump(asset)
+        # don't keep references to all written objects
+        pickler.clear_memo()
+    spill_file.seek(0)
+    return spill_file
 
-    return assets
+
+def _read_spilled(spill_file: IO[bytes]) -> Generator[dict, None, None]:
+    r"""Read back the assets written by `_spill()`."""
+    import pickle
+
+    unpickler = pickle.Unpickler(spill_file)
+    while True:
+        try:
+            yield unpickler.load()
+        except EOFError:
+            return
+
+
+def sort_assets(assets: Iterable[dict],
+                keys: dict[str, sort_t],
+                limit: int | None = None,
+                buffer_size: int = SORT_BUFFER_SIZE) -> Generator[dict, None, None]:
+    r"""Sort assets with bounded memory.
+
+    With a ``limit``, only the first ``limit`` assets are retained (in a heap)
+    while consuming ``assets``. Otherwise, sorted runs of ``buffer_size``
+    assets are spilled to temporary files and merged lazily, if there are
+    more assets than that. Sorting is stable.
+
+    Parameters
+    ----------
+    assets
+        Assets to sort.
+    keys
+        Keys to sort ``assets`` by (see `get_sort_key()`).
+    limit
+        Yield at most this many assets.
+    buffer_size
+        Number of assets to sort in memory.
+    """
+    import heapq
+    from itertools import islice
+
+    sort_key = get_sort_key(keys)
+    if limit is not None:
+        yield from heapq.nsmallest(limit, assets, key=sort_key)
+        return
+
+    assets = iter(assets)
+    runs = []
+    try:
+        while True:
+            chunk = sorted(islice(assets, buffer_size), key=sort_key)
+            if not runs and len(chunk) < buffer_size:
+                # everything fits into memory
+                yield from chunk
+                return
+            if not chunk:
+                break
+            ui.log_debug(f"Spilling {len(chunk)} sorted assets to disk")
+            runs.append(_spill(chunk))
+            del chunk
+        yield from heapq.merge(*[_read_spilled(f) for f in runs], key=sort_key)
+    finally:
+        for f in runs:
+            f.close()
+
+
+def _format_json(value: Any) -> Any:
+    r"""Serialize values that `json` can't natively (paths, dates, etc.)."""
+    return str(value)
+
+
+def write_assets(assets: Iterable[dict],
+                 keys: list[str],
+                 output_format: output_format_t,
+                 null_delimited: bool = False,
+                 stream: TextIO | None = None) -> int:
+    r"""Write ``assets`` in a machine readable format.
+
+    Records are written to ``stream`` one by one, without collecting them
+    first. A helper for the ``onyo get`` command.
+
+    Parameters
+    ----------
+    assets
+        Asset dictionaries to write.
+    keys
+        Keys to write the values of, in order. Keys may be repeated in
+        ``tsv`` and ``csv`` output.
+    output_format
+        One of the machine readable `onyo.lib.consts.OUTPUT_FORMATS`.
+    null_delimited
+        Terminate records with NUL instead of a newline. Not supported for
+        ``json``.
+    stream
+        Where to write to. Defaults to ``sys.stdout``.
+
+    Raises
+    ------
+    ValueError
+        If ``output_format`` is not supported.
+
+    Returns
+    -------
+    int
+        The number of written records.
+    """
+    import csv
+    import json
+
+    if output_format not in ['tsv', 'csv', 'json', 'ndjson'] or (null_delimited and output_format == 'json'):
+        raise ValueError(f"Unsupported output format '{output_format}'"
+                         f"{' with NUL-delimited records' if null_delimited else ''}")
+    stream = stream or sys.stdout
+    end = '\0' if null_delimited else '\n'
+    count = 0
+    if output_format == 'tsv':
+        for asset in assets:
+            stream.write('\t'.join([str(asset[k]) for k in keys]) + end)
+            count += 1
+    elif output_format == 'csv':
+        writer = csv.writer(stream, lineterminator=end)
+        writer.writerow(keys)
+        for asset in assets:
+            writer.writerow([str(asset[k]) for k in keys])
+            count += 1
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, default=_format_json)
+        separator = '[' if output_format == 'json' else ''
+        for asset in assets:
+            stream.write(separator + encoder.encode({k: asset[k] for k in keys}))
+            if output_format == 'json':
+                separator = ',\n'
+            else:
+                stream.write(end)
+            count += 1
+        if output_format == 'json':
+            stream.write(']\n' if count else '[]\n')
+    stream.flush()
+    return count
 
 
 def get_history_cmd(interactive: bool,
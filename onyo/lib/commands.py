@@ -12,14 +12,18 @@ from typing import (
 from functools import wraps
 
 from rich import box
+from rich.markup import escape
 from rich.table import Table  # pyre-ignore[21] for some reason pyre doesn't find Table
 
+from onyo.lib.aggregations import Aggregation, aggregate
 from onyo.lib.command_utils import (
     fill_unset,
-    natural_sort,
     print_diff,
+    sort_assets,
+    write_assets,
 )
 from onyo.lib.consts import (
+    OUTPUT_FORMATS,
     PSEUDO_KEYS,
     RESERVED_KEYS,
     SORT_ASCENDING,
@@ -43,9 +47,13 @@ if TYPE_CHECKING:
         Callable,
         Dict,
         Generator,
+        Iterable,
     )
     from onyo.lib.onyo import OnyoRepo
-    from onyo.lib.consts import sort_t
+    from onyo.lib.consts import (
+        output_format_t,
+        sort_t,
+    )
 
 log: logging.Logger = logging.getLogger('onyo.commands')
 
@@ -83,7 +91,9 @@ def raise_on_inventory_state(func: Callable[P, T]) -> Callable[P, T]:
 
 
 def fsck(repo: OnyoRepo,
-         tests: list[str] | None = None) -> None:
+         tests: list[str] | None = None,
+         jobs: int | None = None,
+         full: bool = False) -> None:
     r"""Run a suite of integrity checks on an Onyo repository and its contents.
 
     By default, the following tests are performed:
@@ -95,6 +105,16 @@ def fsck(repo: OnyoRepo,
     * ``clean-tree``: verify that git has no changed (staged or unstaged) or
       untracked files
 
+    The tests are independent of each other and run concurrently. Failures
+    are reported in the order of `tests`.
+
+    If all tests pass, ``HEAD`` is recorded as verified (see
+    `OnyoRepo.set_verified_commit()`). Subsequent runs only check the paths
+    changed since then (including uncommitted changes), unless an
+    ``.onyoignore`` file changed. The ``clean-tree`` and ``anchors`` tests
+    always check the entire worktree, since git does not report (empty)
+    directories that lack an anchor.
+
     Parameters
     ----------
     repo
@@ -103,6 +123,12 @@ def fsck(repo: OnyoRepo,
     tests
         A list of tests to run. By default, all tests are run.
 
+    jobs
+        Number of processes to validate YAML with (see `OnyoRepo.get_jobs()`).
+
+    full
+        Check the entire repository, regardless of the last verified commit.
+
     Raises
     ------
     ValueError
@@ -112,16 +138,44 @@ def fsck(repo: OnyoRepo,
         If a test fails.
     """
 
+    from concurrent.futures import ThreadPoolExecutor
     from functools import partial
     from onyo.lib.utils import has_unique_names, validate_yaml
 
+    jobs = repo.get_jobs(jobs)
+    head = repo.git.get_head()
+    verified = None if full else repo.get_verified_commit()
+    changed = None
+    if verified:
+        try:
+            changed = repo.git.get_changed_files(verified)
+        except ValueError:
+            # The verified commit is gone (e.g. garbage collected).
+            pass
+        else:
+            if any(p.name == repo.IGNORE_FILE_NAME for p in changed):
+                changed = None
+    if changed is None:
+        ui.log_debug("Checking the entire repository")
+        assets = list(repo.asset_paths)
+        names = repo.asset_paths
+    else:
+        ui.log_debug(f"Checking {len(changed)} paths changed since {verified}")
+        assets = deduplicate([a for a in (p.parent if p.name == repo.ASSET_DIR_FILE_NAME else p for p in changed)
+                              if repo.is_asset_path(a)])
+        # all assets that could clash with the names of changed assets
+        names = deduplicate([p for a in assets for p in repo.get_asset_paths_by_name(a.name)])  # pyre-ignore[16]
+
     all_tests = {
         # TODO: fsck would probably want to relay or analyze `git-status` output, rather
         # than just get a bool for clean worktree:
         "clean-tree": repo.git.is_clean_worktree,
         "anchors": repo.validate_anchors,
-        "asset-unique": partial(has_unique_names, repo.asset_paths),
-        "asset-yaml": partial(validate_yaml, {repo.git.root / a for a in repo.asset_paths}),
+        "asset-unique": partial(has_unique_names, names),
+        "asset-yaml": partial(validate_yaml,
+                              [a / repo.ASSET_DIR_FILE_NAME if repo.is_asset_dir(a) else a
+                               for a in assets],  # pyre-ignore[16]
+                              jobs=jobs),
     }
     if tests:
         # only known tests are accepted
@@ -131,24 +185,103 @@ def fsck(repo: OnyoRepo,
         tests = list(all_tests.keys())
 
     # run the selected tests
-    for key in tests:
-        ui.log(f"'{key}' starting")
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        results = dict()
+        for key in tests:
+            ui.log(f"'{key}' starting")
+            results[key] = executor.submit(all_tests[key])
+
+        for key in tests:
+            if not results[key].result():
+                # Note: What's that debug message adding? Alone it lacks the
+                #       identifying path and in combination with the exception
+                #       it's redundant.
+                ui.log_debug(f"'{key}' failed")
+                raise OnyoInvalidRepoError(f"'{repo.git.root}' failed fsck test '{key}'")
+
+            ui.log(f"'{key}' succeeded")
 
-        if not all_tests[key]():
-            # Note: What's that debug message adding? Alone it lacks the
-            #       identifying path and in combination with the exception
-            #       it's redundant.
-            ui.log_debug(f"'{key}' failed")
-            raise OnyoInvalidRepoError(f"'{repo.git.root}' failed fsck test '{key}'")
+    if head and set(tests) == set(all_tests.keys()):
+        repo.set_verified_commit(head)
 
-        ui.log(f"'{key}' succeeded")
+
+def onyo_cache(repo: OnyoRepo,
+               action: str) -> None:
+    r"""Manage the cache of parsed asset contents.
+
+    Actions:
+
+    * ``status``: print the number of cached entries, their size, and how many
+      of the assets in ``HEAD`` are cached
+    * ``warm``: parse all assets in ``HEAD`` that are not yet cached, and cache
+      them
+    * ``clear``: remove all entries from the cache, and the key index (see
+      ``onyo.cache.index``), which is rebuilt on its next use
+
+    Parameters
+    ----------
+    repo
+        The repository whose cache to manage.
+
+    action
+        The action to perform. One of 'status', 'warm', or 'clear'.
+
+    Raises
+    ------
+    ValueError
+        If `action` is unknown.
+    """
+
+    from onyo.lib.cache import ASSET_CACHE_FILE, KEY_INDEX_FILE
+
+    if action not in ['status', 'warm', 'clear']:
+        raise ValueError(f"Invalid cache action '{action}'. Valid actions are: status, warm, clear")
+
+    if action == 'clear':
+        (repo.git.git_dir / KEY_INDEX_FILE).unlink(missing_ok=True)
+
+    cache = repo.asset_cache
+    if cache is None:
+        if action == 'clear':
+            (repo.git.git_dir / ASSET_CACHE_FILE).unlink(missing_ok=True)
+        ui.print("The asset cache is disabled ('onyo.cache.size' is 0).")
+        return
+    if action == 'clear':
+        cache.clear()
+        ui.print("Cleared the asset cache.")
+        return
+
+    # blob ids of the assets in HEAD
+    files = (p / repo.ASSET_DIR_FILE_NAME if repo.is_asset_dir(p) else p for p in repo.asset_paths)
+    blob_ids = {repo.git.blob_ids[f] for f in files if f in repo.git.blob_ids}
+    cached = cache.lookup(blob_ids, touch=False)
+    if action == 'warm':
+        for p, content in repo.read_asset_contents(repo.asset_paths):
+            try:
+                repo.get_asset_content(p, content=content)
+            except NotAnAssetError as e:
+                # report the error, but proceed
+                ui.error(e)
+        newly_cached = len(cache.lookup(blob_ids, touch=False)) - len(cached)
+        ui.print(f"Parsed and cached {newly_cached} assets.")
+    else:
+        status = cache.status()
+        mib = 1024 * 1024
+        ui.print(f"Cache file: {cache.db_file}\n"
+                 f"Entries: {status['entries']}\n"
+                 f"Size: {status['size'] / mib:.1f} MiB of {status['max_size'] / mib:.1f} MiB\n"
+                 f"Assets in HEAD cached: {len(cached)} of {len(blob_ids)}")
 
 
 @raise_on_inventory_state
 def onyo_cat(inventory: Inventory,
-             paths: list[Path]) -> None:
+             paths: list[Path],
+             rev: str | None = None) -> None:
     r"""Print the contents of assets.
 
+    The contents are read as committed, in a single batch from git's object
+    store. Each content is validated as it's printed.
+
     The same path can be given multiple times.
 
     If any path is not an asset, nothing is printed.
@@ -160,38 +293,57 @@ def onyo_cat(inventory: Inventory,
         The inventory containing the assets to print.
     paths
         Paths of assets to print the contents of.
+    rev
+        Any identifier that refers to a commit to print the assets as they
+        were in. Which paths are assets is decided by the tree of that commit
+        (see `OnyoRepo.get_asset_files()`). Defaults to ``HEAD``.
 
     Raises
     ------
     ValueError
-        If a provided asset is not an asset, or if ``paths`` is empty.
+        If a provided asset is not an asset, if ``paths`` is empty, or if
+        ``rev`` is unknown.
 
     OnyoInvalidRepoError
         If ``paths`` contains an invalid asset (e.g. content is invalid YAML).
     """
 
     from onyo.lib.onyo import OnyoRepo
-    from onyo.lib.utils import validate_yaml
+    from onyo.lib.utils import valid_yaml
 
     if not paths:
         raise ValueError("At least one asset must be specified.")
 
-    non_asset_paths = [str(p) for p in paths if not inventory.repo.is_asset_path(p)]
+    repo = inventory.repo
+    if rev:
+        commitish = repo.git.get_hexsha(rev).strip()  # pyre-ignore[16]
+        # The assets of that commit, which may differ from the worktree.
+        asset_files = repo.get_asset_files(paths, commitish)
+    else:
+        commitish = 'HEAD'
+        asset_files = {p: p / OnyoRepo.ASSET_DIR_FILE_NAME if repo.is_asset_dir(p) else p
+                       for p in paths if repo.is_asset_path(p)}
+
+    non_asset_paths = [str(p) for p in paths if p not in asset_files]
     if non_asset_paths:
         raise ValueError("The following paths are not assets:\n%s" %
                          "\n".join(non_asset_paths))
 
-    files = list(p / OnyoRepo.ASSET_DIR_FILE_NAME
-                 if inventory.repo.is_asset_dir(p)
-                 else p
-                 for p in paths)
-    # open file and print to stdout
-    for f in files:
-        ui.print(f.read_text(), end='')
-
-    # TODO: "Full" asset validation. Address when fsck is reworked
-    assets_valid = validate_yaml(deduplicate(files))
-    if not assets_valid:
+    files = [asset_files[p] for p in paths]
+    # print to stdout while validating every file once
+    valid = dict()
+    for f, content in repo.git.cat_files(files, commitish=commitish):
+        if content is None:
+            valid[f] = False
+            continue
+        ui.print(content, end='')
+        if f not in valid:
+            valid[f] = valid_yaml(content)
+
+    invalid_yaml = [str(f) for f, v in valid.items() if not v]
+    if invalid_yaml:
+        ui.error('The following files fail YAML validation:\n{}'.format(
+            '\n'.join(invalid_yaml)))
         raise OnyoInvalidRepoError("Invalid assets")
 
 
@@ -297,7 +449,7 @@ def _edit_asset(inventory: Inventory,
     # However, in order to be able to keep editing even if the
     # operation was valid, a rollback of the changes to the operations
     # queue is required.
-    queue_length = len(inventory.operations)
+    queue = list(inventory.operations)
     while True:
         # ### fire up editor
         # Note: shell=True would be needed for a setting like the one used in tests:
@@ -324,9 +476,8 @@ def _edit_asset(inventory: Inventory,
         except NoopError:
             pass  # If edit was a no-op, this is not a ValidationError
         except Exception as e:  # TODO: dedicated type: OnyoValidationError or something # TODO: Ignore NoopError?
-            # remove possibly added operations from the queue:
-            if queue_length < len(inventory.operations):
-                inventory.operations = inventory.operations[:queue_length]
+            # revert possible changes to the queue:
+            inventory.operations = queue
             ui.error(e)
             response = ui.request_user_response("Continue (e)diting asset, (s)kip asset or (a)bort command)?",
                                                 default='a',  # non-interactive has to fail
@@ -364,9 +515,8 @@ def _edit_asset(inventory: Inventory,
         if response == 'accept':
             break
         else:
-            # remove possibly added operations from the queue:
-            if queue_length < len(inventory.operations):
-                inventory.operations = inventory.operations[:queue_length]
+            # revert possible changes to the queue:
+            inventory.operations = queue
         if response == 'edit':
             continue
         elif response == 'skip':
@@ -434,6 +584,256 @@ def onyo_edit(inventory: Inventory,
     ui.print('No assets updated.')
 
 
+def _validate_query_args(inventory: Inventory,
+                         include: list[Path] | None,
+                         sort: dict[str, sort_t] | None,
+                         limit: int | None) -> list[Path]:
+    r"""Validate arguments of ``onyo get`` queries.
+
+    Returns `include` defaulting to the inventory root.
+
+    Raises
+    ------
+    ValueError
+      On invalid arguments.
+    """
+    include = include or [inventory.root]
+
+    # validate path arguments
+    invalid_paths = set(p
+                        for p in include
+                        if not (inventory.repo.is_inventory_dir(p) or inventory.repo.is_asset_path(p)))
+    if invalid_paths:
+        err_str = '\n'.join([str(x) for x in invalid_paths])
+        raise ValueError(f"The following paths are not part of the inventory:\n{err_str}")
+
+    allowed_sorting = [SORT_ASCENDING, SORT_DESCENDING]
+    if sort and not all(v in allowed_sorting for k, v in sort.items()):
+        raise ValueError(f"Allowed sorting modes: {', '.join(allowed_sorting)}")
+    if limit is not None and limit < 1:
+        raise ValueError(f"limit must be greater than 0, but is '{limit}'")
+    return include
+
+
+@raise_on_inventory_state
+def query_assets(inventory: Inventory,
+                 include: list[Path] | None = None,
+                 exclude: list[Path] | Path | None = None,
+                 depth: int = 0,
+                 match: list[Callable[[dict], bool]] | None = None,
+                 keys: list[str] | None = None,
+                 sort: dict[str, sort_t] | None = None,
+                 limit: int | None = None,
+                 jobs: int | None = None) -> Generator[dict, None, None]:
+    r"""Query the repository for information about assets.
+
+    This is the Python API of ``onyo get``. Arguments are validated right
+    away, but results are computed lazily and yielded one by one. Memory use is
+    bounded regardless of the number of results (see
+    `onyo.lib.command_utils.sort_assets()`).
+
+    Parameters
+    ----------
+    inventory
+      The inventory to query.
+    include
+      Limits the query to assets underneath these paths.
+      Paths can be assets and directories.
+      If no paths are specified, the inventory root is used as default.
+    exclude
+      Paths to exclude, meaning that assets underneath any of these are not
+      being returned. Defaults to `None`. Note, that `depth` only applies to
+      `include`, not to `exclude`. `depth` and `exclude` are different ways
+      of limiting the results.
+    depth
+      Number of levels to descend into. Must be greater or equal 0.
+      If 0, descend recursively without limit.
+    match
+      Callables suited for use with builtin `filter`. They are
+      passed an asset dictionary and expected to return a `bool`,
+      where `True` indicates a match. The result of the query
+      consists of all assets that are matched by all callables in
+      this list.
+    keys
+      Defines what key-value pairs of an asset a result is composed of.
+      If no `keys` are given then the asset name keys and `path` are used.
+      Keys may be repeated.
+    sort
+      How to sort the results. This is a dictionary, where the keys
+      are the asset keys to sort by (in order of appearances in the
+      `sort` dictionary). Possible values are
+      `onyo.lib.consts.SORT_ASCENDING` and `onyo.lib.consts.SORT_DESCENDING`.
+      If other values are specified an error is raised.
+      Default: `{'path': SORT_ASCENDING}`.
+    limit
+      Yield only the first `limit` results. Must be greater than 0.
+    jobs
+      Number of processes to parse assets with. ``0`` uses all available
+      CPUs. Defaults to the configuration ``onyo.core.jobs`` (or 1).
+
+    Raises
+    ------
+    ValueError
+      On invalid arguments.
+
+    Returns
+    -------
+    Generator of dict
+      A dictionary per matching asset as defined by `keys`.
+    """
+    return _query_assets(inventory,
+                         include=include,
+                         exclude=exclude,
+                         depth=depth,
+                         match=match,
+                         keys=keys,
+                         sort=sort,
+                         limit=limit,
+                         jobs=jobs)
+
+
+def _query_assets(inventory: Inventory,
+                  include: list[Path] | None = None,
+                  exclude: list[Path] | Path | None = None,
+                  depth: int = 0,
+                  match: list[Callable[[dict], bool]] | None = None,
+                  keys: list[str] | None = None,
+                  sort: dict[str, sort_t] | None = None,
+                  limit: int | None = None,
+                  jobs: int | None = None) -> Generator[dict, None, None]:
+    r"""Query assets like `query_assets()`, without checking the inventory state."""
+    include = _validate_query_args(inventory, include, sort, limit)
+    selected_keys = keys.copy() if keys else inventory.repo.get_asset_name_keys() + ['path']
+    # pyre can't tell SORT_ASCENDING is not an arbitrary string but matches the Literal declaration:
+    sort = sort or {'path': SORT_ASCENDING}  # pyre-ignore[9]
+    results = inventory.get_assets_by_query(include=include,
+                                            exclude=exclude,
+                                            depth=depth,
+                                            match=match,
+                                            jobs=jobs,
+                                            keys=selected_keys + list(sort))  # pyre-ignore[6]
+
+    def project(assets: Generator[dict, None, None]) -> Generator[dict, None, None]:
+        # Reduce assets to what's needed for sorting and output early on,
+        # and convert paths for output.
+        needed = set(selected_keys).union(sort)  # pyre-ignore[6]
+        for asset in fill_unset(assets, selected_keys):
+            projected = {k: v for k, v in asset.items() if k in needed}
+            projected['path'] = asset['path'].relative_to(inventory.root)
+            yield projected
+
+    def stream() -> Generator[dict, None, None]:
+        for r in sort_assets(project(results), keys=sort, limit=limit):  # pyre-ignore[6]
+            # filter output for `keys` only
+            yield {k: v for k, v in r.items() if k in selected_keys}
+
+    return stream()
+
+
+@raise_on_inventory_state
+def summarize_assets(inventory: Inventory,
+                     include: list[Path] | None = None,
+                     exclude: list[Path] | Path | None = None,
+                     depth: int = 0,
+                     match: list[Callable[[dict], bool]] | None = None,
+                     group_by: list[str] | None = None,
+                     aggregations: list[Aggregation] | None = None,
+                     sort: dict[str, sort_t] | None = None,
+                     limit: int | None = None,
+                     jobs: int | None = None) -> list[dict]:
+    r"""Aggregate the assets matching a query.
+
+    Assets are aggregated in a single pass while they are read, so that only
+    the summary is kept in memory. Assets are read only if the grouping or
+    aggregations require keys of their content (see
+    `Inventory.get_assets_by_query()`).
+
+    Parameters
+    ----------
+    inventory
+      The inventory to query.
+    include
+      Limits the query to assets underneath these paths.
+      See `query_assets()`.
+    exclude
+      Paths to exclude. See `query_assets()`.
+    depth
+      Number of levels to descend into. See `query_assets()`.
+    match
+      Callables to match assets with. See `query_assets()`.
+    group_by
+      Keys to group assets by. If not given, all matching assets are
+      aggregated into a single result.
+    aggregations
+      Aggregations to compute per group. Defaults to ``count``.
+    sort
+      How to sort the results. Keys must be `group_by` keys or names of
+      `aggregations`. Defaults to ascending by the `group_by` keys.
+    limit
+      Return only the first `limit` results. Must be greater than 0.
+    jobs
+      Number of processes to parse assets with. See `query_assets()`.
+
+    Raises
+    ------
+    ValueError
+      On invalid arguments.
+
+    Returns
+    -------
+    list of dict
+      A dictionary per group with the values of the `group_by` keys and the
+      results of the `aggregations` (by `Aggregation.name`).
+    """
+    return _summarize_assets(inventory,
+                             include=include,
+                             exclude=exclude,
+                             depth=depth,
+                             match=match,
+                             group_by=group_by,
+                             aggregations=aggregations,
+                             sort=sort,
+                             limit=limit,
+                             jobs=jobs)
+
+
+def _summarize_assets(inventory: Inventory,
+                      include: list[Path] | None = None,
+                      exclude: list[Path] | Path | None = None,
+                      depth: int = 0,
+                      match: list[Callable[[dict], bool]] | None = None,
+                      group_by: list[str] | None = None,
+                      aggregations: list[Aggregation] | None = None,
+                      sort: dict[str, sort_t] | None = None,
+                      limit: int | None = None,
+                      jobs: int | None = None) -> list[dict]:
+    r"""Aggregate assets like `summarize_assets()`, without checking the inventory state."""
+    include = _validate_query_args(inventory, include, sort, limit)
+    group_by = group_by or []
+    aggregations = aggregations or [Aggregation('count')]
+    columns = group_by + [a.name for a in aggregations]
+    if sort and any(k not in columns for k in sort):
+        raise ValueError(f"Aggregated results can only be sorted by {', '.join(columns)}")
+
+    assets = inventory.get_assets_by_query(include=include,
+                                           exclude=exclude,
+                                           depth=depth,
+                                           match=match,
+                                           jobs=jobs,
+                                           keys=group_by + [a.key for a in aggregations if a.key])
+
+    def relative_paths(assets: Generator[dict, None, None]) -> Generator[dict, None, None]:
+        for asset in assets:
+            asset['path'] = asset['path'].relative_to(inventory.root)
+            yield asset
+
+    results = aggregate(relative_paths(assets), group_by=group_by, aggregations=aggregations)
+    return list(sort_assets(results,
+                            # pyre can't tell SORT_ASCENDING is not an arbitrary string but matches the Literal
+                            keys=sort or {k: SORT_ASCENDING for k in group_by},  # pyre-ignore[6]
+                            limit=limit))
+
+
 @raise_on_inventory_state
 def onyo_get(inventory: Inventory,
              include: list[Path] | None = None,
@@ -442,8 +842,19 @@ def onyo_get(inventory: Inventory,
              machine_readable: bool = False,
              match: list[Callable[[dict], bool]] | None = None,
              keys: list[str] | None = None,
-             sort: dict[str, sort_t] | None = None) -> list[dict]:
-    r"""Query the repository for information about assets.
+             sort: dict[str, sort_t] | None = None,
+             limit: int | None = None,
+             jobs: int | None = None,
+             output_format: output_format_t | None = None,
+             null_delimited: bool = False,
+             group_by: list[str] | None = None,
+             aggregations: list[Aggregation] | None = None,
+             return_results: bool = True) -> list[dict] | None:
+    r"""Print information about assets in the repository.
+
+    Machine readable output is written to ``stdout`` incrementally, as results
+    are sorted, without going through ``rich``.
+    See `query_assets()` for getting the results in Python as a stream instead.
 
     Parameters
     ----------
@@ -464,7 +875,8 @@ def onyo_get(inventory: Inventory,
     machine_readable
       Whether to print the matching assets as TAB-separated lines,
       where the columns correspond to the `keys`. If `False`,
-      print a table meant for human consumption.
+      print a table meant for human consumption. This is an alias for
+      ``output_format='tsv'``.
     match
       Callables suited for use with builtin `filter`. They are
       passed an asset dictionary and expected to return a `bool`,
@@ -482,6 +894,27 @@ def onyo_get(inventory: Inventory,
       `onyo.lib.consts.SORT_ASCENDING` and `onyo.lib.consts.SORT_DESCENDING`.
       If other values are specified an error is raised.
       Default: `{'path': SORT_ASCENDING}`.
+    limit
+      Print only the first `limit` results. Must be greater than 0.
+    jobs
+      Number of processes to parse assets with. ``0`` uses all available
+      CPUs. Defaults to the configuration ``onyo.core.jobs`` (or 1).
+    output_format
+      One of `onyo.lib.consts.OUTPUT_FORMATS`. Defaults to ``table``, or
+      ``tsv`` if `machine_readable` or `null_delimited` is set.
+    null_delimited
+      Terminate records with NUL instead of newline characters. Not available
+      for the ``table`` and ``json`` formats.
+    group_by
+      Keys to group assets by. If this or `aggregations` is given, a summary
+      is printed instead of the assets (see `summarize_assets()`).
+      Can't be combined with `keys`.
+    aggregations
+      Aggregations to compute per group. Defaults to ``count``, if `group_by`
+      is given.
+    return_results
+      Whether to collect and return the results. Memory use is bounded
+      otherwise (see `query_assets()`).
 
     Raises
     ------
@@ -490,64 +923,76 @@ def onyo_get(inventory: Inventory,
 
     Returns
     -------
-    list of dict
-      A dictionary per matching asset as defined by `keys`.
+    list of dict or None
+      A dictionary per result as printed. `None`, if `return_results` is
+      `False`.
     """
-
-    selected_keys = keys.copy() if keys else None
-
-    # TODO: JSON output? Is this done somewhere?
-    include = include or [inventory.root]
-
-    # validate path arguments
-    invalid_paths = set(p
-                        for p in include  # pyre-ignore[16]  `paths` not Optional anymore here
-                        if not (inventory.repo.is_inventory_dir(p) or inventory.repo.is_asset_path(p)))
-    if invalid_paths:
-        err_str = '\n'.join([str(x) for x in invalid_paths])
-        raise ValueError(f"The following paths are not part of the inventory:\n{err_str}")
-
-    allowed_sorting = [SORT_ASCENDING, SORT_DESCENDING]
-    if sort and not all(v in allowed_sorting for k, v in sort.items()):
-        raise ValueError(f"Allowed sorting modes: {', '.join(allowed_sorting)}")
-
-    selected_keys = selected_keys or inventory.repo.get_asset_name_keys() + ['path']
-    results = inventory.get_assets_by_query(include=include,
-                                            exclude=exclude,
-                                            depth=depth,
-                                            match=match)
-    results = list(fill_unset(results, selected_keys))
-    # convert paths for output
-    for r in results:
-        r['path'] = r['path'].relative_to(inventory.root)
-
-    results = natural_sort(
-        assets=results,
-        # pyre can't tell SORT_ASCENDING is not an arbitrary string but matches the Literal declaration:
-        keys=sort or {'path': SORT_ASCENDING})  # pyre-ignore[6]
-
-    # filter output for `keys` only
-    results = [{k: v for k, v in r.items() if k in selected_keys} for r in results]
-
-    if machine_readable:
-        sep = '\t'  # column separator
-        for data in results:
-            values = sep.join([str(data[k]) for k in selected_keys])
-            ui.print(f'{values}')
-    elif results:
-        table = Table(
-            box=box.HORIZONTALS, title='', show_header=True,
-            header_style='bold')
-        for key in selected_keys:
-            table.add_column(key, overflow='fold')
-        for data in results:
-            values = [str(data[k]) for k in selected_keys]
-            table.add_row(*values)
-
+    if output_format is None:
+        output_format = 'tsv' if machine_readable or null_delimited else 'table'
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Output format must be one of {', '.join(OUTPUT_FORMATS)}")
+    if machine_readable and output_format != 'tsv':
+        raise ValueError(f"Machine readable (TSV) output can't be combined with the '{output_format}' format")
+    if null_delimited and output_format in ['table', 'json']:
+        raise ValueError(f"NUL-delimited output is not available for the '{output_format}' format")
+
+    if group_by or aggregations:
+        if keys:
+            raise ValueError("Keys can't be selected for aggregated results")
+        aggregations = aggregations or [Aggregation('count')]
+        selected_keys = (group_by or []) + [a.name for a in aggregations]
+        results = _summarize_assets(inventory,
+                                    include=include,
+                                    exclude=exclude,
+                                    depth=depth,
+                                    match=match,
+                                    group_by=group_by,
+                                    aggregations=aggregations,
+                                    sort=sort,
+                                    limit=limit,
+                                    jobs=jobs)
+    else:
+        selected_keys = keys or inventory.repo.get_asset_name_keys() + ['path']
+        results = _query_assets(inventory,
+                                include=include,
+                                exclude=exclude,
+                                depth=depth,
+                                match=match,
+                                keys=selected_keys,
+                                sort=sort,
+                                limit=limit,
+                                jobs=jobs)
+
+    collected: list[dict] = []
+
+    def collect(results: Iterable[dict]) -> Generator[dict, None, None]:
+        # keep the results to return, while they are printed
+        for r in results:
+            collected.append(r)
+            yield r
+    if return_results:
+        results = collect(results)
+
+    if output_format != 'table':
+        if ui.quiet:
+            return list(results) if return_results else None
+        write_assets(results, selected_keys, output_format, null_delimited=null_delimited)
+        return collected if return_results else None
+
+    table = Table(
+        box=box.HORIZONTALS, title='', show_header=True,
+        header_style='bold')
+    for key in selected_keys:
+        table.add_column(key, overflow='fold')
+    for data in results:
+        values = [str(data[k]) for k in selected_keys]
+        table.add_row(*values)
+
+    if table.row_count:
         ui.rich_print(table)
     else:
         ui.rich_print('No assets matching the filter(s) were found')
-    return results
+    return collected if return_results else None
 
 
 @raise_on_inventory_state
@@ -1071,9 +1516,18 @@ def onyo_set(inventory: Inventory,
 
 @raise_on_inventory_state
 def onyo_tree(inventory: Inventory,
-              dirs: list[tuple[str, Path]]) -> None:
+              dirs: list[tuple[str, Path]],
+              depth: int = 0,
+              dirs_only: bool = False,
+              count: bool = False,
+              plain: bool = False) -> None:
     r"""Print the directory tree of paths.
 
+    The tree is built from the tracked files of the inventory, without
+    accessing the file system. Consequently, it only contains assets and
+    inventory directories; untracked files and paths ignored via
+    ``.onyoignore`` are not shown.
+
     Parameters
     ----------
     inventory
@@ -1087,11 +1541,27 @@ def onyo_tree(inventory: Inventory,
         requested. This way, regardless of how the user requested a path
         (relative, absolute, subdir, etc), it is always printed "correctly".
 
+    depth
+        Number of levels to descend into. Must be greater equal 0.
+        If 0, descend recursively without limit.
+
+    dirs_only
+        Show directories only.
+
+    count
+        Append the number of assets in each directory (recursively) to its
+        name.
+
+    plain
+        Print plain text instead of styling the output via ``rich``.
+
     Raises
     ------
     ValueError
-        If paths are invalid.
+        If paths are invalid or `depth` is negative.
     """
+    if depth < 0:
+        raise ValueError(f"depth must be greater or equal 0, but is '{depth}'")
     # sanitize the paths
     non_inventory_dirs = [desc for (desc, p) in dirs if not inventory.repo.is_inventory_dir(p)]
     if non_inventory_dirs:
@@ -1099,21 +1569,100 @@ def onyo_tree(inventory: Inventory,
                          '\n'.join(non_inventory_dirs))
 
     for (desc, p) in dirs:
-        ui.rich_print(f'[bold][sandy_brown]{desc}[/sandy_brown][/bold]')
-        for line in _tree(p):
-            ui.rich_print(line)
+        # counting requires the entire subtree, regardless of the depth displayed
+        tree, counts = _get_tree(inventory.repo, p, depth=0 if count else depth)
+        if count:
+            desc = f'{desc} ({counts.get(p, 0)})'
+        lines = _tree(p, tree,
+                      counts=counts if count else None,
+                      depth=depth,
+                      dirs_only=dirs_only,
+                      plain=plain)
+        if plain:
+            ui.print(desc)
+            for line in lines:
+                ui.print(line)
+        else:
+            ui.rich_print(f'[bold][sandy_brown]{escape(desc)}[/sandy_brown][/bold]')
+            for line in lines:
+                ui.rich_print(line)
+
+
+def _get_tree(repo: OnyoRepo,
+              root: Path,
+              depth: int = 0) -> tuple[dict[Path, list[Path]], dict[Path, int]]:
+    r"""Get the directory tree of assets and inventory directories under `root`.
+
+    Only the subtree of the tracked files at `root` is looked at.
 
+    Parameters
+    ----------
+    repo
+        The repository to get the tree from.
+    root
+        Inventory directory to get the tree of.
+    depth
+        Number of levels to descend into. If 0, descend recursively without
+        limit.
 
-def _tree(dir_path: Path, prefix: str = '') -> Generator[str, None, None]:
+    Returns
+    -------
+    tuple of dict
+        Mapping of each directory to its (unsorted) children, and mapping of
+        each directory to the number of assets within it (recursively).
+    """
+    tree = {root: []}
+    counts = dict()
+    added = set()
+    # one level deeper than displayed to find the anchors of the deepest directories
+    for f in repo.git.files.subtrees([root], depth=depth + 1 if depth else 0):
+        if f.name == repo.ANCHOR_FILE_NAME and repo.is_inventory_dir(f.parent):
+            path = f.parent
+            tree.setdefault(path, [])
+        elif repo.is_asset_path(f):
+            path = f
+        else:
+            continue
+        if path != root and repo.is_asset_path(path):
+            for parent in path.parents:
+                counts[parent] = counts.get(parent, 0) + 1
+                if parent == root:
+                    break
+        # register `path` with its parent, and the parent with its parent, etc.
+        while path != root and path not in added:
+            added.add(path)
+            tree.setdefault(path.parent, []).append(path)
+            path = path.parent
+    return tree, counts
+
+
+def _tree(dir_path: Path,
+          tree: dict[Path, list[Path]],
+          counts: dict[Path, int] | None = None,
+          prefix: str = '',
+          depth: int = 0,
+          dirs_only: bool = False,
+          plain: bool = False) -> Generator[str, None, None]:
     r"""Yield lines that assemble tree-like output, stylized by rich.
 
     Parameters
     ----------
     dir_path
         Path of directory to yield tree of.
+    tree
+        Mapping of directories to their children (see `_get_tree()`).
+    counts
+        Mapping of directories to a number to append to their name.
     prefix
         Lines should be prefixed with this string. In practice, only useful by
         ``_tree`` itself recursing into directories.
+    depth
+        Number of levels to descend into. If 0, descend recursively without
+        limit.
+    dirs_only
+        Yield directories only.
+    plain
+        Do not stylize the lines.
     """
     space = '    '
     pipe =  '│   '  # noqa: E222
@@ -1121,28 +1670,33 @@ def _tree(dir_path: Path, prefix: str = '') -> Generator[str, None, None]:
     last =  '└── '  # noqa: E222
 
     # get and sort the children
-    children = sorted(list(dir_path.iterdir()))
-    for path in children:
-        # ignore hidden files/dirs
-        if path.name[0] == '.':
-            continue
+    children = sorted(p for p in tree[dir_path] if not dirs_only or p in tree)
+    for i, path in enumerate(children):
+        is_dir = path in tree
 
         # choose child prefix
-        child_prefix = tee  # ├──
-        if path == children[-1]:
-            child_prefix = last  # └──
+        child_prefix = last if i == len(children) - 1 else tee  # └── or ├──
 
-        # colorize directories
         path_name = path.name
-        if path.is_dir():
-            path_name = f'[bold][sandy_brown]{path.name}[/sandy_brown][/bold]'
+        if is_dir and counts is not None:
+            path_name = f'{path_name} ({counts.get(path, 0)})'
+        if not plain:
+            path_name = escape(path_name)
+            # colorize directories
+            if is_dir:
+                path_name = f'[bold][sandy_brown]{path_name}[/sandy_brown][/bold]'
 
         yield f'{prefix}{child_prefix}{path_name}'
 
         # descend into directories
-        if path.is_dir():
+        if is_dir and depth != 1:
             next_prefix_level = pipe if child_prefix == tee else space
-            yield from _tree(path, prefix=prefix + next_prefix_level)
+            yield from _tree(path, tree,
+                             counts=counts,
+                             prefix=prefix + next_prefix_level,
+                             depth=depth - 1 if depth else 0,
+                             dirs_only=dirs_only,
+                             plain=plain)
 
 
 @raise_on_inventory_state
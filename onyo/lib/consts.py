@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from typing import Literal
     sort_t = Literal['ascending', 'descending']
+    output_format_t = Literal['table', 'tsv', 'csv', 'json', 'ndjson']
 
 
 PSEUDO_KEYS = ['path']
@@ -19,6 +20,16 @@ r"""Key names that are reserved and must not be part of asset content.
 These keys have functional meaning for Onyo. Thus they are reserved and cannot
 be part of asset content.
 """
+PATH_DERIVED_KEYS = ['path', 'directory', 'is_asset_directory']
+r"""Key names of assets whose values are derived from the asset's path.
+
+These are known without reading the asset's content.
+
+See Also
+--------
+PSEUDO_KEYS
+RESERVED_KEYS
+"""
 # TODO: other symbols like <list>, <dict>, and potentially <none> or <null>?
 UNSET_VALUE = '<unset>'
 r"""String to represent keys that are not set.
@@ -33,3 +44,10 @@ Needed to realize when onyo runs on a repo that was created by a newer version.
 
 SORT_ASCENDING = 'ascending'
 SORT_DESCENDING = 'descending'
+
+OUTPUT_FORMATS = ['table', 'tsv', 'csv', 'json', 'ndjson']
+r"""Formats ``onyo get`` can print results in.
+
+All but ``table`` are machine readable and written to ``stdout`` directly as
+results become available.
+"""
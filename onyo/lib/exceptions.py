@@ -17,6 +17,10 @@ class OnyoInvalidFilterError(Exception):
     r"""Raised if filters are invalidly defined."""
 
 
+class OnyoInvalidAggregationError(Exception):
+    r"""Raised if aggregations are invalidly defined."""
+
+
 class InvalidArgumentError(Exception):
     r"""Raised a (CLI-) command is invalidly called beyond what's covered by argparse."""
 
@@ -2,9 +2,46 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import TYPE_CHECKING
 
 from onyo.lib.consts import UNSET_VALUE
 from onyo.lib.exceptions import OnyoInvalidFilterError
+from onyo.lib.utils import to_number
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Callable,
+        Collection,
+        Generator,
+    )
+
+FILTER_OPERATORS = ['=', '!=', '~', '<', '<=', '>', '>=', 'in']
+r"""Operators of filters.
+
+``=`` matches values equal to, or fully matching the regular expression of, the
+filter's value. ``!=`` is its negation. ``~`` matches values containing a match
+of the regular expression. ``<``, ``<=``, ``>``, and ``>=`` compare numbers and
+dates. ``in`` matches any of a comma-separated list of values.
+"""
+
+# earliest operator in a filter expression without ``=``
+_OPERATOR_PATTERN = re.compile(r'~|<|>| in ')
+
+
+def _to_datetime(value: Any) -> datetime | None:
+    r"""Get `value` as a `datetime`, if it is a date or an ISO formatted date string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return None
 
 
 @dataclass
@@ -13,10 +50,15 @@ class Filter:
     suitable for the builtin `filter`.
 
     Intended for use with string patterns used with onyo's CLI.
+    Expressions are of the form ``key<operator>value`` (see
+    `FILTER_OPERATORS`). They are compiled once into a match function, so that
+    matching an asset doesn't need to parse or compile anything.
     """
     _arg: str = field(repr=False)
     key: str = field(init=False)
+    operator: str = field(init=False)
     value: str = field(init=False)
+    _match: Callable[[dict], bool] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         r"""
@@ -25,52 +67,371 @@ class Filter:
         given key matches the given value. This can be used along with the
         built-in filter to remove any non-matching assets.
 
+        Instead of ``=``, other operators can be used for comparisons, e.g.
+        ``display>14``, ``purchase_date<2020-01-01``, ``type!=laptop``, or
+        ``make in apple,dell``.
+
         Example::
 
             repo = Repo()
             f = Filter('foo=bar')
             assets[:] = filter(f.match, repo.assets)
         """
-        self.key, self.value = self._format(self._arg)
+        self.key, self.operator, self.value = self._format(self._arg)
+        self._match = self._compile()
 
     @staticmethod
     def _format(arg: str) -> list[str]:
-        r"""Split filters by the first occurrence of the `=` (equals) sign."""
-        if not isinstance(arg, str) or '=' not in arg:
+        r"""Split filters by the first occurrence of an operator.
+
+        Filters containing ``=`` are split at the first ``=``, which is part
+        of the operator ``!=``, ``<=``, or ``>=`` if preceded by ``!``, ``<``,
+        or ``>``. Hence, a key may contain ``~``, ``<``, ``>``, or `` in ``, but
+        can't end with ``!``, ``<``, or ``>``. Other filters are split at the
+        first of ``~``, ``<``, ``>``, and `` in ``.
+        """
+        if isinstance(arg, str) and '=' in arg:
+            i = arg.index('=')
+            start = i - 1 if i > 0 and arg[i - 1] in '!<>' else i
+            return [arg[:start], arg[start:i + 1], arg[i + 1:]]
+        m = _OPERATOR_PATTERN.search(arg) if isinstance(arg, str) else None
+        if not m:
             raise OnyoInvalidFilterError(
-                'Filters must be formatted as `key=value`')
-        return arg.split('=', 1)
+                'Filters must be formatted as `key=value` (or with one of the operators '
+                f'{", ".join(FILTER_OPERATORS[1:])} instead of `=`)')
+        return [arg[:m.start()], m.group().strip(), arg[m.end():]]
 
-    @staticmethod
-    def _re_match(text: str, r: str) -> bool:
-        try:
-            return True if re.compile(r).fullmatch(text) else False
-        except re.error:
-            return False
+    def __call__(self, asset: dict) -> bool:
+        r"""Same as `Filter.match`, so that a `Filter` can be passed to `filter` directly."""
+        return self._match(asset)
+
+    @property
+    def is_exact(self) -> bool:
+        r"""Whether the filter matches only values equal to `Filter.value`.
+
+        That is the case, if the operator is ``=``, and the value contains no
+        special characters of regular expressions and isn't one of ``<unset>``,
+        ``<list>``, or ``<dict>``. Such a filter can be answered by looking up
+        the string representation of values.
+        """
+        return self.operator == '=' and self.value not in (UNSET_VALUE, '<list>', '<dict>') and \
+            not any(c in r'.^$*+?{}[]\|()' for c in self.value)
+
+    @property
+    def cost(self) -> int:
+        r"""A rank of how expensive and unselective matching the filter is.
+
+        Cheap and selective filters (exact matches) have the lowest rank,
+        negations and regular expressions the highest. Applying filters in
+        order of their rank rejects most assets early.
+        """
+        if self.operator == '=':
+            return 0 if self.is_exact or self.value in (UNSET_VALUE, '<list>', '<dict>') else 4
+        return {'in': 1, '!=': 3, '~': 4}.get(self.operator, 2)
+
+    def _compile(self) -> Callable[[dict], bool]:
+        r"""Compile the filter into a match function.
+
+        Raises
+        ------
+        OnyoInvalidFilterError
+          If a comparison's value is neither a number nor a date, or the
+          value of ``~`` is not a regular expression.
+        """
+        key = self.key
+        if self.operator == '=':
+            return self._compile_equal()
+        if self.operator == '~':
+            try:
+                pattern = re.compile(self.value)
+            except re.error as e:
+                raise OnyoInvalidFilterError(f"Filter `{self._arg}` has an invalid regular expression: {e}") from e
+            return lambda asset: key in asset and pattern.search(str(asset[key])) is not None
+        if self.operator == '!=':
+            equal = self._compile_equal()
+            return lambda asset: not equal(asset)
+        if self.operator == 'in':
+            items = {i.strip() for i in self.value.split(',')}
+            numbers = {n for n in (to_number(i) for i in items) if n is not None}
+
+            def match_in(asset: dict) -> bool:
+                if key not in asset:
+                    return False
+                v = asset[key]
+                return str(v) in items or (bool(numbers) and to_number(v) in numbers)
+            return match_in
+
+        # comparisons of numbers or dates
+        convert: Callable[[Any], Any] = to_number
+        reference = to_number(self.value)
+        if reference is None:
+            convert = _to_datetime
+            reference = _to_datetime(self.value)
+        if reference is None:
+            raise OnyoInvalidFilterError(
+                f"Filter `{self._arg}` requires a numeric or date value to compare to")
+        compare = {'<': lambda a, b: a < b,
+                   '<=': lambda a, b: a <= b,
+                   '>': lambda a, b: a > b,
+                   '>=': lambda a, b: a >= b}[self.operator]
+
+        def match_comparison(asset: dict) -> bool:
+            v = convert(asset.get(key))
+            if v is None:
+                return False
+            try:
+                return compare(v, reference)
+            except TypeError:
+                # e.g. timezone aware and naive datetimes
+                return False
+        return match_comparison
+
+    def _compile_equal(self) -> Callable[[dict], bool]:
+        r"""Compile the match function of the ``=`` operator."""
+        key, value = self.key, self.value
+
+        if value == UNSET_VALUE:
+            def match_unset(asset: dict) -> bool:
+                v = asset.get(key)
+                return v is None or v == ''
+            return match_unset
+
+        string_type = {'<list>': list, '<dict>': dict}.get(value)
+        pattern = None
+        if not self.is_exact and string_type is None:
+            try:
+                pattern = re.compile(value)
+            except re.error:
+                pass
+
+        def match_equal(asset: dict) -> bool:
+            if key not in asset:
+                return False
+            v = asset[key]
+            # equivalence and regex match
+            if v == value:
+                return True
+            text = str(v)
+            if text == value or (pattern is not None and pattern.fullmatch(text)):
+                return True
+            # onyo type representation match
+            return string_type is not None and isinstance(v, string_type)
+        return match_equal
 
     def match(self, asset: dict) -> bool:
         r"""match self on a dictionary"""
-        string_types = {'<list>': list, '<dict>': dict}
-
-        # Check if filter is <unset> and there is no data
-        if not asset and self.value == UNSET_VALUE:
-            return True
-        elif self.key not in asset.keys() and self.value == UNSET_VALUE:
-            return True
-        elif self.key in asset.keys() and self.value == UNSET_VALUE and (
-                asset[self.key] is None or asset[self.key] == ''):
-            return True
-        elif self.key not in asset.keys() or self.value == UNSET_VALUE:
-            return False
-
-        # equivalence and regex match
-        re_match = self._re_match(str(asset[self.key]), self.value)
-        if re_match or asset[self.key] == self.value:
-            return True
-
-        # onyo type representation match
-        if self.value in string_types:
-            return True if isinstance(
-                asset[self.key], string_types[self.value]) else False
-
-        return False
+        return self._match(asset)
+
+
+_QUERY_OPERATORS = ['and', 'or', 'not']
+
+
+@dataclass
+class Query:
+    r"""A boolean combination of filters, suitable for the builtin `filter`.
+
+    Queries are trees: The operands of ``and`` and ``or`` (and the single
+    operand of ``not``) are `Filter`\ s, other `Query`\ s, or any other
+    callables matching an asset. Operands are evaluated in order of their cost
+    (see `Filter.cost`), and evaluation short-circuits.
+
+    Use `Query.parse()` to create a query from an expression like::
+
+        type=laptop and (make=apple or make=lenovo) and not path~^retired/
+    """
+    operator: str
+    operands: list[Callable[[dict], bool]]
+
+    def __post_init__(self) -> None:
+        if self.operator not in _QUERY_OPERATORS:
+            raise OnyoInvalidFilterError(f"Invalid query operator `{self.operator}`")
+        if self.operator == 'not' and len(self.operands) != 1:
+            raise OnyoInvalidFilterError("`not` requires exactly one operand")
+        self.operands = sorted(self.operands, key=lambda o: o.cost if isinstance(o, (Filter, Query)) else float('inf'))
+
+    def __call__(self, asset: dict) -> bool:
+        r"""Same as `Query.match`, so that a `Query` can be passed to `filter` directly."""
+        return self.match(asset)
+
+    def match(self, asset: dict) -> bool:
+        r"""Whether `asset` matches the query."""
+        if self.operator == 'and':
+            return all(o(asset) for o in self.operands)
+        if self.operator == 'or':
+            return any(o(asset) for o in self.operands)
+        return not self.operands[0](asset)
+
+    @property
+    def cost(self) -> float:
+        r"""Sum of the costs of the operands (see `Filter.cost`)."""
+        return sum(o.cost if isinstance(o, (Filter, Query)) else float('inf') for o in self.operands)
+
+    @property
+    def filters(self) -> Generator[Filter, None, None]:
+        r"""All `Filter`\ s of the query tree."""
+        for o in self.operands:
+            if isinstance(o, Filter):
+                yield o
+            elif isinstance(o, Query):
+                yield from o.filters
+
+    def evaluate(self,
+                 asset: dict,
+                 keys: Collection[str]) -> bool | None:
+        r"""Evaluate the query with only some keys of `asset` known.
+
+        This allows to decide a query for assets, whose keys are only partially
+        available (e.g. those derived from their path), before reading them.
+
+        Parameters
+        ----------
+        asset
+          Known keys of an asset.
+        keys
+          Names of the known keys. `Filter`\ s on other keys (and other
+          callables) can't be decided.
+
+        Returns
+        -------
+        bool or None
+          Whether `asset` matches. `None`, if that can't be decided from the
+          known keys.
+        """
+        results = []
+        for o in self.operands:
+            if isinstance(o, Query):
+                r = o.evaluate(asset, keys)
+            elif isinstance(o, Filter) and o.key in keys:
+                r = o(asset)
+            else:
+                r = None
+            if self.operator == 'and' and r is False:
+                return False
+            if self.operator == 'or' and r is True:
+                return True
+            results.append(r)
+        if None in results:
+            return None
+        return not results[0] if self.operator == 'not' else self.operator == 'and'
+
+    @classmethod
+    def parse(cls,
+              expression: str) -> Query:
+        r"""Parse a query expression.
+
+        Expressions combine filters (see `Filter`) with ``and``, ``or``, and
+        ``not``, grouped by parentheses. ``not`` binds strongest, ``or``
+        weakest. Filters containing whitespace need to be quoted, e.g.
+        ``"model=Think Pad"`` or ``model='Think Pad'``. Parentheses within a
+        filter are part of it (e.g. ``model=(a|b)``).
+
+        Parameters
+        ----------
+        expression
+          The expression to parse.
+
+        Raises
+        ------
+        OnyoInvalidFilterError
+          If the expression or any of its filters is invalid.
+        """
+        tokens = _tokenize(expression)
+        pos = 0
+
+        def peek() -> tuple[str, str] | None:
+            return tokens[pos] if pos < len(tokens) else None
+
+        def is_keyword(token: tuple[str, str] | None, keyword: str) -> bool:
+            return token is not None and token == ('word', keyword)
+
+        def parse_or() -> Callable[[dict], bool]:
+            nonlocal pos
+            operands = [parse_and()]
+            while is_keyword(peek(), 'or'):
+                pos += 1
+                operands.append(parse_and())
+            return operands[0] if len(operands) == 1 else cls('or', operands)
+
+        def parse_and() -> Callable[[dict], bool]:
+            nonlocal pos
+            operands = [parse_not()]
+            while is_keyword(peek(), 'and'):
+                pos += 1
+                operands.append(parse_not())
+            return operands[0] if len(operands) == 1 else cls('and', operands)
+
+        def parse_not() -> Callable[[dict], bool]:
+            nonlocal pos
+            if is_keyword(peek(), 'not'):
+                pos += 1
+                return cls('not', [parse_not()])
+            return parse_atom()
+
+        def parse_atom() -> Callable[[dict], bool]:
+            nonlocal pos
+            token = peek()
+            if token is None:
+                raise OnyoInvalidFilterError(f"Query `{expression}` ended unexpectedly")
+            pos += 1
+            if token[0] == '(':
+                node = parse_or()
+                if peek() != (')', ')'):
+                    raise OnyoInvalidFilterError(f"Missing `)` in query `{expression}`")
+                pos += 1
+                return node
+            if token[0] == ')' or (token[0] == 'word' and token[1] in _QUERY_OPERATORS + ['in']):
+                raise OnyoInvalidFilterError(f"Unexpected `{token[1]}` in query `{expression}`")
+            if is_keyword(peek(), 'in') and pos + 1 < len(tokens) and tokens[pos + 1][0] in ('word', 'term'):
+                pos += 2
+                return Filter(f"{token[1]} in {tokens[pos - 1][1]}")
+            return Filter(token[1])
+
+        node = parse_or()
+        if pos < len(tokens):
+            raise OnyoInvalidFilterError(f"Unexpected `{tokens[pos][1]}` in query `{expression}`")
+        return node if isinstance(node, Query) else cls('and', [node])
+
+
+def _tokenize(expression: str) -> list[tuple[str, str]]:
+    r"""Split a query expression into tokens.
+
+    Tokens are tuples of a kind and a text. Kinds are ``(`` and ``)`` for
+    grouping, ``word`` for unquoted words (which may be keywords), and
+    ``term`` for words that contain quoted parts.
+    """
+    tokens = []
+    i = 0
+    while i < len(expression):
+        c = expression[i]
+        if c.isspace():
+            i += 1
+            continue
+        if c in '()':
+            tokens.append((c, c))
+            i += 1
+            continue
+        word = []
+        depth = 0
+        quoted = False
+        while i < len(expression):
+            c = expression[i]
+            if c in '"\'':
+                end = expression.find(c, i + 1)
+                if end < 0:
+                    raise OnyoInvalidFilterError(f"Unterminated quote in query `{expression}`")
+                word.append(expression[i + 1:end])
+                quoted = True
+                i = end + 1
+                continue
+            if c.isspace() and not depth:
+                break
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                if not depth:
+                    break
+                depth -= 1
+            word.append(c)
+            i += 1
+        tokens.append(('term' if quoted else 'word', ''.join(word)))
+    return tokens
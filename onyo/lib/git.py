@@ -1,19 +1,190 @@
 from __future__ import annotations
 
 import logging
+import os
+import stat
 import subprocess
+import tempfile
+import threading
+from collections.abc import Sequence
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from onyo.lib.exceptions import OnyoInvalidRepoError
+from onyo.lib.git_index import (
+    IndexEntry,
+    UnsupportedIndexError,
+    read_head,
+    read_head_tree,
+    read_index,
+    read_index_checksum,
+)
 from onyo.lib.ui import ui
 
 if TYPE_CHECKING:
-    from typing import Iterable
+    from typing import (
+        Generator,
+        Iterable,
+        Iterator,
+    )
 
 log: logging.Logger = logging.getLogger('onyo.git')
 
 
+class _PathNode(object):
+    r"""A node of the path trie of `IndexedPaths`."""
+
+    __slots__ = ('children', 'index')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _PathNode] = dict()
+        # position of the path in the list, if this node is a path of it
+        self.index: int | None = None
+
+
+class IndexedPaths(Sequence):
+    r"""A read-only list of paths with hashed lookups.
+
+    Iterates, indexes, and compares like the list of paths it is created from.
+    Membership tests, lookups by file name, and selections of subtrees,
+    however, do not need to scan the entire list.
+    """
+
+    def __init__(self,
+                 paths: Iterable[Path] | None = None) -> None:
+        r"""Instantiates an `IndexedPaths` object from `paths`.
+
+        Parameters
+        ----------
+        paths
+          Paths to index. The order is preserved.
+        """
+        self._paths: list[Path] = list(paths) if paths else []
+        self._index: set[Path] = set(self._paths)
+        self._by_name: dict[str, list[Path]] | None = None
+        self._trie: _PathNode | None = None
+
+    def __getitem__(self, item):
+        return self._paths[item]
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self._paths)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._index
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IndexedPaths):
+            return self._paths == other._paths
+        return self._paths == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._paths!r})"
+
+    def with_name(self,
+                  name: str) -> list[Path]:
+        r"""Get all paths with the file name `name`.
+
+        Useful to find all anchor files, ignore files, etc.
+        The lookup table is built on first use.
+
+        Parameters
+        ----------
+        name
+          File name to look up.
+
+        Returns
+        -------
+        list of Path
+          All paths named `name`, in order of appearance.
+        """
+        if self._by_name is None:
+            self._by_name = dict()
+            for p in self._paths:
+                self._by_name.setdefault(p.name, []).append(p)
+        return self._by_name.get(name, [])
+
+    def _find_node(self,
+                   path: Path,
+                   excluded: set[_PathNode] | None = None) -> _PathNode | None:
+        r"""Get the trie node of `path`.
+
+        The trie of all paths' components is built on first use.
+
+        Parameters
+        ----------
+        path
+          Path to look up. Either a path of the list, or a directory
+          containing any of them.
+        excluded
+          Nodes that must not be traversed to reach `path`.
+
+        Returns
+        -------
+        _PathNode or None
+          The node of `path`. `None`, if there is no such path or it is
+          underneath an `excluded` node.
+        """
+        if self._trie is None:
+            self._trie = _PathNode()
+            for i, p in enumerate(self._paths):
+                node = self._trie
+                for part in p.parts:
+                    node = node.children.setdefault(part, _PathNode())  # pyre-ignore[6]
+                node.index = i
+        node = self._trie
+        for part in path.parts:
+            node = node.children.get(part)  # pyre-ignore[9]
+            if node is None or (excluded and node in excluded):
+                return None
+        return node
+
+    def subtrees(self,
+                 roots: Iterable[Path],
+                 exclude: Iterable[Path] | None = None,
+                 depth: int = 0) -> list[Path]:
+        r"""Get all paths within the subtrees rooted at `roots`.
+
+        Only the selected part of the trie is walked, regardless of how many
+        paths there are in total.
+
+        Parameters
+        ----------
+        roots
+          Roots of the subtrees to select. A root that is a path of the list
+          itself is selected, too.
+        exclude
+          Paths to exclude, meaning that any path underneath these is not
+          selected.
+        depth
+          Number of levels to descend into. If 0, descend recursively without
+          limit.
+
+        Returns
+        -------
+        list of Path
+          All selected paths, in order of appearance and without duplicates.
+        """
+        excluded = {node for node in (self._find_node(p) for p in exclude or []) if node}
+        indices = set()
+        for root in roots:
+            stack = [(self._find_node(root, excluded), 0)]
+            while stack:
+                node, level = stack.pop()
+                if node is None or node in excluded:
+                    continue
+                if node.index is not None:
+                    indices.add(node.index)
+                if not depth or level < depth:
+                    stack.extend((child, level + 1) for child in node.children.values())
+        return [self._paths[i] for i in sorted(indices)]
+
+
 class GitRepo(object):
     r"""Representation of a git repository.
 
@@ -40,7 +211,16 @@ class GitRepo(object):
           subdirectory, beginning at `path`, instead of requiring the root.
         """
         self.root = GitRepo.find_root(path) if find_root else path.resolve()
-        self._files: list[Path] | None = None
+        self._files: IndexedPaths | None = None
+        self._blob_ids: dict[Path, str] | None = None
+        self._git_dir: Path | None = None
+        self._config_snapshots: dict[Path | None, tuple[tuple, dict[str, str]]] = dict()
+        self._cat_file: subprocess.Popen | None = None
+        # held while a `cat_files()` generator uses `_cat_file`
+        self._cat_file_lock = threading.Lock()
+
+    def __del__(self) -> None:
+        self.close()
 
     @staticmethod
     def find_root(path: Path) -> Path:
@@ -74,7 +254,9 @@ class GitRepo(object):
     def _git(self,
              args: list[str], *,
              cwd: Path | None = None,
-             raise_error: bool = True) -> str:
+             raise_error: bool = True,
+             input: str | None = None,
+             env: dict[str, str] | None = None) -> str:
         r"""A wrapper function for git calls, returning the output of commands.
 
         Parameters
@@ -87,6 +269,11 @@ class GitRepo(object):
         raise_error
           Whether to raise `subprocess.CalledProcessError` if the command
           returned with non-zero exitcode.
+        input
+          Text to pass to the standard input of the git command.
+        env
+          Environment variables to set for the git command in addition
+          to the current environment.
 
         Returns
         -------
@@ -97,20 +284,25 @@ class GitRepo(object):
         ui.log_debug(f"Running 'git {' '.join(args)}'")
         ret = subprocess.run(["git"] + args,
                              cwd=cwd, check=raise_error,
-                             capture_output=True, text=True)
+                             capture_output=True, text=True,
+                             input=input,
+                             env=os.environ | env if env else None)
         return ret.stdout
 
     @property
-    def files(self) -> list[Path]:
+    def files(self) -> IndexedPaths:
         r"""Get the absolute ``Path``\ s of all tracked files.
 
+        This behaves like a list, but membership tests (``path in files``) and
+        lookups by file name (`IndexedPaths.with_name()`) are hashed.
+
         This property is cached, and is reset automatically on `GitRepo.commit()`.
 
         If changes are made by different means, use `GitRepo.clear_cache()` to
         reset the cache.
         """
-        if not self._files:
-            self._files = self.get_subtrees()
+        if self._files is None:
+            self._files = IndexedPaths(self.get_subtrees())
         return self._files
 
     def clear_cache(self) -> None:
@@ -118,6 +310,11 @@ class GitRepo(object):
 
         Caches cleared are:
         - `GitRepo.files`
+        - `GitRepo.blob_ids`
+        - configuration snapshots used by `GitRepo.get_config()`
+
+        Additionally, the ``git-cat-file`` coprocess used by `GitRepo.cat_files()`
+        is stopped, so that it does not serve stale object lookups.
 
         If the repository is exclusively modified via public API functions, the
         cache of the `GitRepo` object is consistent. If the repository is
@@ -125,15 +322,124 @@ class GitRepo(object):
         the cache does not contain stale information.
         """
         self._files = None
+        self._blob_ids = None
+        self._config_snapshots = dict()
+        self.close()
+
+    def close(self) -> None:
+        r"""Stop the ``git-cat-file`` coprocess, if it is running.
+
+        It is started again on demand by `GitRepo.cat_files()`.
+        """
+        proc = getattr(self, '_cat_file', None)
+        if proc is None:
+            return
+        self._cat_file = None
+        self._stop_cat_file(proc)
+
+    @staticmethod
+    def _stop_cat_file(proc: subprocess.Popen) -> None:
+        r"""Stop a ``git cat-file --batch`` process."""
+        try:
+            proc.stdin.close()  # pyre-ignore[16]
+            proc.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()  # pyre-ignore[16]
+
+    def _get_cat_file(self) -> subprocess.Popen:
+        r"""Get the long-lived ``git cat-file --batch`` process of this repository.
+
+        The process is started on first use and kept running until
+        `GitRepo.close()` or `GitRepo.clear_cache()` is called.
+        """
+        if self._cat_file is None or self._cat_file.poll() is not None:
+            self._cat_file = self._start_cat_file()
+        return self._cat_file
+
+    def _start_cat_file(self) -> subprocess.Popen:
+        r"""Start a ``git cat-file --batch`` process."""
+        ui.log_debug("Starting 'git cat-file --batch'")
+        return subprocess.Popen(['git', 'cat-file', '--batch'],
+                                cwd=self.root,
+                                stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE)
+
+    def cat_files(self,
+                  paths: Iterable[Path],
+                  commitish: str = 'HEAD') -> Generator[tuple[Path, str | None], None, None]:
+        r"""Yield the content of `paths` as committed in `commitish`.
+
+        Contents are read from git's object store through a single, long-lived
+        ``git cat-file --batch`` process, rather than opening every file in the
+        worktree or spawning a process per file. While a generator returned by
+        this method is in use, other calls (nested or in other threads) start
+        a process of their own, so that their responses don't interleave.
+
+        Parameters
+        ----------
+        paths
+          Absolute paths of files to read.
+        commitish
+          Any identifier that refers to a commit (defaults to "HEAD").
+
+        Returns
+        -------
+        Generator of tuple of Path and str
+          Pairs of a path from `paths` and its (UTF-8 decoded) content in
+          `commitish`. The content is `None`, if there is no such file in
+          `commitish`.
+        """
+        from itertools import islice
+
+        shared = self._cat_file_lock.acquire(blocking=False)
+        proc = self._get_cat_file() if shared else self._start_cat_file()
+        stdin = proc.stdin
+        stdout = proc.stdout
+        paths = iter(paths)
+        pending = 0
+        try:
+            # Requests are sent in chunks small enough to fit into the pipe
+            # buffer. Otherwise writing the requests could block while
+            # `git cat-file` is blocked on writing output that is not yet read.
+            while chunk := list(islice(paths, 64)):
+                stdin.write(''.join(f"{commitish}:{p.relative_to(self.root).as_posix()}\n"  # pyre-ignore[16]
+                                    for p in chunk).encode())
+                stdin.flush()  # pyre-ignore[16]
+                pending = len(chunk)
+                for p in chunk:
+                    header = stdout.readline().decode()  # pyre-ignore[16]
+                    if not header:
+                        raise RuntimeError("'git cat-file' terminated unexpectedly.")
+                    parts = header.split()
+                    content = None
+                    if parts[-1] not in ['missing', 'ambiguous']:
+                        content = stdout.read(int(parts[2]))  # pyre-ignore[16]
+                        stdout.read(1)  # pyre-ignore[16]  trailing newline
+                    pending -= 1
+                    yield p, content.decode() if content is not None and parts[1] == 'blob' else None
+        finally:
+            if not shared:
+                self._stop_cat_file(proc)
+            else:
+                if pending:
+                    # The consumer stopped early (or something failed) with
+                    # responses left in the pipe. Don't reuse the process.
+                    self.close()
+                self._cat_file_lock.release()
 
     def get_subtrees(self,
-                     paths: Iterable[Path] | None = None) -> list[Path]:
+                     paths: Iterable[Path] | None = None,
+                     commitish: str = 'HEAD') -> list[Path]:
         r"""Get tracked files in the subtrees rooted at `paths`.
 
         Parameters
         ----------
         paths
           Roots of subtrees to consider. The entire worktree by default.
+        commitish
+          Any identifier that refers to a commit (defaults to "HEAD").
 
         Returns
         -------
@@ -142,7 +448,11 @@ class GitRepo(object):
         """
         ui.log_debug("Looking up tracked files%s",
                      f" underneath {', '.join([str(p) for p in paths])}" if paths else "")
-        git_cmd = ['ls-tree', '-r', '--full-tree', '--name-only', '-z', 'HEAD']
+        if not paths and commitish == 'HEAD':
+            entries = self._get_head_index_entries()
+            if entries is not None:
+                return [self.root / e.path for e in entries]
+        git_cmd = ['ls-tree', '-r', '--full-tree', '--name-only', '-z', commitish]
         if paths:
             git_cmd.extend([str(p) for p in paths])
         try:
@@ -157,6 +467,97 @@ class GitRepo(object):
         files = [self.root / x for x in tree.split('\0') if x]
         return files
 
+    def _get_head_index_entries(self) -> list[IndexEntry] | None:
+        r"""Get the entries of all tracked files by reading the git index in-process.
+
+        The index is used only if its cache-tree records that it matches
+        ``HEAD``'s tree exactly.
+
+        Returns
+        -------
+        list of IndexEntry or None
+          Index entries of all files tracked in ``HEAD``. `None`, if that
+          can't be determined from the index.
+        """
+        git_dir = self.git_dir
+        try:
+            entries, index_tree = read_index(git_dir / 'index')
+        except UnsupportedIndexError as e:
+            ui.log_debug(f"Not using git index: {e}")
+            return None
+        if index_tree is None:
+            return None
+        head_tree = read_head_tree(git_dir) or \
+            self._git(['rev-parse', '--quiet', '--verify', 'HEAD^{tree}'], raise_error=False).strip()
+        if index_tree != head_tree:
+            return None
+        return entries
+
+    @property
+    def blob_ids(self) -> dict[Path, str]:
+        r"""Get the blob ids of all tracked files in ``HEAD``.
+
+        This property is cached, and is reset automatically on `GitRepo.commit()`.
+
+        If changes are made by different means, use `GitRepo.clear_cache()` to
+        reset the cache.
+
+        Returns
+        -------
+        dict
+          Mapping of absolute paths to the hexsha of their blob.
+        """
+        if self._blob_ids is None:
+            entries = self._get_head_index_entries()
+            if entries is not None:
+                self._blob_ids = {self.root / e.path: e.blob_id for e in entries}
+            else:
+                tree = self._git(['ls-tree', '-r', '--full-tree', '-z', 'HEAD'], raise_error=False)
+                self._blob_ids = dict()
+                for line in tree.split('\0'):
+                    if line:
+                        # <mode> SP <type> SP <object> TAB <file>
+                        info, _, path = line.partition('\t')
+                        self._blob_ids[self.root / path] = info.split(' ')[2]
+        return self._blob_ids
+
+    @property
+    def git_dir(self) -> Path:
+        r"""Get the absolute ``Path`` of the git directory (usually ``.git/``)."""
+        if self._git_dir is None:
+            git_dir = self.root / '.git'
+            self._git_dir = git_dir if git_dir.is_dir() else \
+                Path(self._git(['rev-parse', '--absolute-git-dir']).strip())
+        return self._git_dir
+
+    def get_head(self) -> str | None:
+        r"""Get the hexsha of the commit ``HEAD`` points to.
+
+        Returns
+        -------
+        str or None
+          The hexsha. `None` if there is no commit (yet).
+        """
+        return read_head(self.git_dir) or \
+            self._git(['rev-parse', '--quiet', '--verify', 'HEAD^{commit}'], raise_error=False).strip() or None
+
+    def get_state_key(self) -> str | None:
+        r"""Get a key identifying the state of ``HEAD`` and the index.
+
+        The key changes whenever a commit is made, ``HEAD`` is moved, or the
+        index is written. This is meant to validate persistent caches.
+
+        Returns
+        -------
+        str or None
+          The key. `None` if there is no ``HEAD`` or index (yet).
+        """
+        head = self.get_head()
+        index = read_index_checksum(self.git_dir / 'index')
+        if not head or not index:
+            return None
+        return f"{head}:{index}"
+
     def is_clean_worktree(self) -> bool:
         r"""Check whether the git worktree is clean.
 
@@ -167,6 +568,36 @@ class GitRepo(object):
         """
         return not bool(self._git(['status', '--porcelain']))
 
+    def get_changed_files(self,
+                          commitish: str) -> list[Path]:
+        r"""Get the files changed since `commitish`.
+
+        `commitish` is compared to the worktree. That is, committed, staged,
+        and unstaged changes are included, as well as untracked files that are
+        not ignored.
+
+        Parameters
+        ----------
+        commitish
+          Any identifier that refers to a commit.
+
+        Returns
+        -------
+        list of Path
+          Absolute paths of the changed files, including deleted ones.
+
+        Raises
+        ------
+        ValueError
+          If `commitish` is unknown.
+        """
+        try:
+            changed = self._git(['diff', '--name-only', '-z', '--no-renames', f'{commitish}^{{commit}}', '--'])
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"Unknown commit identifier: {commitish}") from e
+        changed += self._git(['ls-files', '-z', '--others', '--exclude-standard'])
+        return [self.root / p for p in changed.split('\0') if p]
+
     def maybe_init(self) -> None:
         r"""Initialize `self.root` as a git repository
         if it is not already one.
@@ -188,20 +619,179 @@ class GitRepo(object):
                message: str) -> None:
         r"""Stage and commit changes in git.
 
+        Only the changes to `paths` are committed. Directories in `paths`
+        commit all changes within them (respecting gitignore for untracked
+        files). If `paths` is empty, what is already staged is committed.
+        Paths are passed to git via stdin, so there is no limit to how many
+        can be committed at once.
+
+        This is using plumbing commands and a temporary index (based on
+        ``HEAD``), rather than ``git add`` and ``git commit``. If the commit
+        would run hooks or needs to be signed (``commit.gpgsign``), ``git add``
+        and ``git commit`` are used instead.
+
         Parameters
         ----------
         paths
           List of paths to commit.
         message
           The git commit message.
+
+        Raises
+        ------
+        ValueError
+          If `message` is empty.
+        subprocess.CalledProcessError
+          If there are no changes to commit, or a git command failed.
         """
-        if isinstance(paths, Path):
-            paths = [paths]
-        pathspecs = [str(p) for p in paths]
-        self._git(['add'] + pathspecs)
-        self._git(['commit', '-m', message, '--'] + pathspecs)
+        message = self._cleanup_message(message)
+        if not message:
+            raise ValueError("Empty commit message")
+        paths = [paths] if isinstance(paths, Path) else list(paths)
+        to_add, to_remove = self._expand_commit_paths(paths)
+        if self._requires_porcelain_commit():
+            if paths and not (to_add or to_remove):
+                raise self._nothing_to_commit()
+            self._porcelain_commit(to_add + to_remove, message)
+            return
+
+        # record content of added files in the object store
+        index_info = []
+        regular = [p for p in to_add if not p.is_symlink()]
+        if regular:
+            blobs = self._git(['hash-object', '-w', '--stdin-paths'],
+                              input=''.join(f"{p.relative_to(self.root).as_posix()}\n" for p in regular)).split()
+            for p, blob in zip(regular, blobs):
+                mode = '100755' if p.stat().st_mode & stat.S_IXUSR else '100644'
+                index_info.append(f"{mode} {blob}\t{p.relative_to(self.root).as_posix()}\0")
+        for p in to_add:
+            if p.is_symlink():
+                blob = self._git(['hash-object', '-w', '--stdin'], input=os.readlink(p)).strip()
+                index_info.append(f"120000 {blob}\t{p.relative_to(self.root).as_posix()}\0")
+        # mode 0 removes an entry from the index
+        index_info.extend(f"0 {'0' * 40}\t{p.relative_to(self.root).as_posix()}\0" for p in to_remove)
+
+        parent = self._git(['rev-parse', '--quiet', '--verify', 'HEAD^{commit}'], raise_error=False).strip()
+        if paths:
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp_index = {'GIT_INDEX_FILE': str(Path(tmp) / 'index')}
+                if parent:
+                    self._git(['read-tree', parent], env=tmp_index)
+                self._git(['update-index', '-z', '--index-info'], input=''.join(index_info), env=tmp_index)
+                tree = self._git(['write-tree'], env=tmp_index).strip()
+        else:
+            # Like `git commit` without pathspecs: commit what's staged already.
+            tree = self._git(['write-tree']).strip()
+
+        if parent and tree == self._git(['rev-parse', f'{parent}^{{tree}}']).strip():
+            raise self._nothing_to_commit()
+        commit = self._git(['commit-tree', tree] + (['-p', parent] if parent else []),
+                           input=message).strip()
+        subject = message.splitlines()[0]
+        self._git(['update-ref', '-m', f"commit{'' if parent else ' (initial)'}: {subject}",
+                   'HEAD', commit, parent or '0' * 40])
+        if index_info:
+            # Bring the actual index in line with the commit. `--index-info`
+            # leaves the entries without stat data, so refresh them. Writing the
+            # tree refreshes the index's cache-tree, which `get_subtrees()` relies on.
+            self._git(['update-index', '-z', '--index-info'], input=''.join(index_info))
+            self._git(['update-index', '-q', '--refresh'], raise_error=False)
+            self._git(['write-tree'])
         self.clear_cache()
 
+    @staticmethod
+    def _nothing_to_commit() -> subprocess.CalledProcessError:
+        r"""Get the error git-commit fails with, if there is nothing to commit.
+
+        Mimics git-commit for callers checking on this.
+        """
+        return subprocess.CalledProcessError(returncode=1,
+                                             cmd=['git', 'commit'],
+                                             output="nothing to commit, working tree clean\n",
+                                             stderr="")
+
+    def _requires_porcelain_commit(self) -> bool:
+        r"""Whether committing must go through ``git commit``.
+
+        This is the case if commits are to be signed, or if any of the hooks
+        run by ``git commit`` is installed.
+        """
+        if (self.get_config('commit.gpgsign') or '').lower() in ['true', 'yes', 'on', '1']:
+            return True
+        hooks = Path(self._git(['rev-parse', '--git-path', 'hooks']).strip())
+        hooks = hooks if hooks.is_absolute() else self.root / hooks
+        return any(os.access(hooks / hook, os.X_OK)
+                   for hook in ['pre-commit', 'prepare-commit-msg', 'commit-msg', 'post-commit'])
+
+    def _porcelain_commit(self,
+                          paths: list[Path],
+                          message: str) -> None:
+        r"""Stage `paths` and commit them with ``git add`` and ``git commit``.
+
+        If `paths` is empty, what is already staged is committed.
+        """
+        pathspecs = ''.join(f"{p.relative_to(self.root).as_posix()}\0" for p in paths)
+        pathspec_args = ['--pathspec-from-file=-', '--pathspec-file-nul'] if paths else []
+        if paths:
+            self._git(['add', '--all'] + pathspec_args, input=pathspecs)
+        with tempfile.TemporaryDirectory() as tmp:
+            message_file = Path(tmp) / 'COMMIT_MSG'
+            message_file.write_text(message)
+            self._git(['commit', f'--file={message_file}'] + pathspec_args, input=pathspecs)
+        self.clear_cache()
+
+    def _expand_commit_paths(self,
+                             paths: Iterable[Path]) -> tuple[list[Path], list[Path]]:
+        r"""Resolve paths to commit into files to add and files to remove.
+
+        Parameters
+        ----------
+        paths
+          Files or directories to commit. Relative paths are relative to `self.root`.
+
+        Returns
+        -------
+        tuple of list of Path
+          Absolute paths of existing files to add, and of tracked
+          files that no longer exist.
+        """
+        tracked = self.files
+        files = set()
+        dirs = set()
+        for p in paths:
+            p = self.root / p
+            if p.is_symlink() or p.is_file() or p in tracked:
+                files.add(p)
+            else:
+                # existing or removed directory
+                dirs.add(p)
+        if dirs:
+            # everything tracked underneath ...
+            files.update(f for f in tracked if not dirs.isdisjoint(f.parents))
+            # ... and everything untracked that is not ignored.
+            untracked = self._git(['ls-files', '-z', '--others', '--exclude-standard'])
+            files.update(f for f in (self.root / u for u in untracked.split('\0') if u)
+                         if not dirs.isdisjoint(f.parents))
+        to_add = sorted(f for f in files if f.exists() or f.is_symlink())
+        to_remove = sorted(f for f in files if f in tracked and not (f.exists() or f.is_symlink()))
+        return to_add, to_remove
+
+    @staticmethod
+    def _cleanup_message(message: str) -> str:
+        r"""Clean up a commit message like ``git commit --cleanup=whitespace``.
+
+        Strips trailing whitespace from lines, collapses consecutive empty
+        lines, and removes leading and trailing empty lines.
+        """
+        lines = []
+        for line in message.splitlines():
+            line = line.rstrip()
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        while lines and not lines[-1]:
+            lines.pop()
+        return '\n'.join(lines) + '\n' if lines else ''
+
     @staticmethod
     def is_git_path(path: Path) -> bool:
         r"""Whether `path` is a git file or directory.
@@ -250,26 +840,125 @@ class GitRepo(object):
         str or None
           The config value if it exists. None otherwise.
         """
-        # TODO: lru_cache?
         # TODO: Not sure whether to stick with `file_` being alternative rather than fallback.
         #       Probably not, b/c then you can have onyo configs locally!
         #       However, this could be coming from OnyoRepo instead, since this is supposed to interface GIT.
-        value = None
+        name = self._canonicalize_config_name(name)
         if file_:
-            try:
-                value = self._git(['config', '--file', str(file_), '--get', name]).strip()
-                ui.log_debug(f"config '{name}' acquired from {file_}: '{value}'")
-            except subprocess.CalledProcessError:
+            value = self._get_config_snapshot(file_).get(name)
+            if value is None:
                 ui.log_debug(f"config '{name}' missing in {file_}")
+            else:
+                ui.log_debug(f"config '{name}' acquired from {file_}: '{value}'")
         else:
             # git-config (with its full stack of locations to check)
-            try:
-                value = self._git(['config', '--get', name]).strip()
-                ui.log_debug(f"git config acquired '{name}': '{value}'")
-            except subprocess.CalledProcessError:
+            value = self._get_config_snapshot(None).get(name)
+            if value is None:
                 ui.log_debug(f"git config missed '{name}'")
+            else:
+                ui.log_debug(f"git config acquired '{name}': '{value}'")
         return value
 
+    @staticmethod
+    def _canonicalize_config_name(name: str) -> str:
+        r"""Get the canonical form of a config variable's name.
+
+        Section and key names are case-insensitive, while subsection names are not.
+        This matches the names as listed by ``git config --list``.
+        """
+        section, _, rest = name.partition('.')
+        subsection, _, key = rest.rpartition('.')
+        return '.'.join(p for p in (section.lower(), subsection, key.lower()) if p)
+
+    def _config_signature(self,
+                          files: Iterable[Path]) -> tuple:
+        r"""Get a signature of the current state of config `files`.
+
+        The signature changes whenever one of the files is created, deleted,
+        or modified. Environment variables controlling git-config's
+        locations are included as well.
+        """
+        signature = []
+        for f in files:
+            try:
+                st = f.stat()
+                signature.append((f, st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                signature.append((f, None))
+        # Look up the relevant variables, rather than scanning the (slow to
+        # iterate) entire `os.environ`.
+        variables = ['GIT_CONFIG', 'GIT_CONFIG_GLOBAL', 'GIT_CONFIG_SYSTEM', 'GIT_CONFIG_NOSYSTEM',
+                     'GIT_CONFIG_PARAMETERS', 'GIT_CONFIG_COUNT', 'HOME', 'XDG_CONFIG_HOME']
+        count = os.environ.get('GIT_CONFIG_COUNT', '')
+        if count.isdigit():
+            variables.extend(f'GIT_CONFIG_{kind}_{i}' for i in range(int(count)) for kind in ['KEY', 'VALUE'])
+        signature.extend((k, os.environ.get(k)) for k in variables)
+        return tuple(signature)
+
+    def _default_config_files(self) -> list[Path]:
+        r"""Get the standard locations of git-config files for this repository.
+
+        These are considered in addition to the files config values were
+        actually read from, in order to notice newly created config files.
+        """
+        home = Path(os.environ.get('HOME', '~')).expanduser()
+        xdg = Path(os.environ['XDG_CONFIG_HOME']) if os.environ.get('XDG_CONFIG_HOME') else home / '.config'
+        files = [self.root / '.git' / 'config',
+                 self.root / '.git' / 'config.worktree',
+                 xdg / 'git' / 'config',
+                 home / '.gitconfig',
+                 Path('/etc/gitconfig')]
+        files.extend(Path(os.environ[var]) for var in ['GIT_CONFIG_GLOBAL', 'GIT_CONFIG_SYSTEM']
+                     if os.environ.get(var))
+        return files
+
+    def _get_config_snapshot(self,
+                             file_: Path | None) -> dict[str, str]:
+        r"""Get all config variables from a location as a dictionary.
+
+        All variables of a location are read by a single call to
+        ``git config --list`` and kept in memory. The snapshot is renewed
+        when the files it was read from (or standard locations of config
+        files) change, when `GitRepo.set_config()` is used, or when the cache
+        is cleared.
+
+        Parameters
+        ----------
+        file\_
+          Config file to read. `None` reads git-config's full stack of locations.
+
+        Returns
+        -------
+        dict
+          Mapping of canonical variable names to their (last) value.
+        """
+        if file_ is not None and not file_.is_absolute():
+            file_ = self.root / file_
+        if file_ in self._config_snapshots:
+            signature, snapshot = self._config_snapshots[file_]
+            if signature == self._config_signature(f for f, *_ in signature if isinstance(f, Path)):
+                return snapshot
+
+        location_arg = ['--file', str(file_)] if file_ else []
+        try:
+            output = self._git(['config'] + location_arg + ['--list', '--show-origin', '-z'])
+        except subprocess.CalledProcessError:
+            # e.g. the file does not exist
+            output = ''
+        # NUL-separated records of: <origin> <key>\n<value>
+        fields = output.split('\0')
+        snapshot = dict()
+        origins = set()
+        for origin, entry in zip(*[iter(fields)] * 2):
+            if origin.startswith('file:'):
+                origins.add(self.root / origin[5:])
+            key, _, value = entry.partition('\n')
+            snapshot[key] = value.strip()  # later values take precedence
+        files = [file_] if file_ else self._default_config_files()
+        files.extend(o for o in sorted(origins) if o not in files)
+        self._config_snapshots[file_] = (self._config_signature(files), snapshot)
+        return snapshot
+
     def set_config(self,
                    name: str,
                    value: str,
@@ -309,6 +998,7 @@ class GitRepo(object):
                              "".format(', '.join(str(location_options.keys())))) from e
 
         self._git(['config'] + location_arg + [name, value])
+        self._config_snapshots = dict()
         ui.log_debug(f"'config for '{location}' set '{name}': '{value}'")
 
     # Credit: Datalad
@@ -370,6 +1060,7 @@ class GitRepo(object):
 
         This is utilizing ``git-check-ignore`` to evaluate `paths` against
         a file `ignore`, that defines exclude patterns the gitignore-way.
+        All `paths` are evaluated by a single call, reading them from stdin.
 
         Parameters
         ----------
@@ -383,21 +1074,22 @@ class GitRepo(object):
         list of Path
           Paths in `paths` that are excluded by the patterns in `ignore`.
         """
+        if not paths:
+            return []
         try:
-            output = self._git(['-c', f'core.excludesFile={str(ignore)}', 'check-ignore', '--no-index', '--verbose'] +
-                               [str(p) for p in paths])
+            output = self._git(['-c', f'core.excludesFile={str(ignore)}',
+                                'check-ignore', '--no-index', '--verbose', '--stdin', '-z'],
+                               input=''.join(f"{str(p)}\0" for p in paths))
         except subprocess.CalledProcessError as e:
             if e.returncode == 1:
                 # None of `paths` was ignored. That's fine.
                 return []
             raise  # reraise on unexpected error
+        # NUL-separated records of: <source> <linenum> <pattern> <pathname>
+        fields = output.split('\0')
         excluded = []
-        for line in output.splitlines():
-            parts = line.split('\t')
-            src_file = Path(parts[0].split(':')[0])
-            if src_file == ignore:
-                excluded.append(Path(parts[1]))
+        for src_file, _, pattern, path in zip(*[iter(fields)] * 4):
+            # A matching negated pattern means the path is *not* excluded.
+            if Path(src_file) == ignore and not pattern.startswith('!'):
+                excluded.append(Path(path))
         return excluded
-
-    # TODO: git check-ignore --no-index --stdin (or via command call)  ->  lazy, check GitRepo.files once. (Same invalidation)
-    #       -> OnyoRepo would use it to maintain a ignore list from a (top-level .onyoignore)? .onyo/ignore ? Both?
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+
+class UnsupportedIndexError(Exception):
+    r"""Raised if a git index file can't be read in-process."""
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    r"""An entry of a git index file.
+
+    Attributes
+    ----------
+    path
+      Path of the entry relative to the root of the worktree (POSIX).
+    mode
+      The git file mode (e.g. ``0o100644``).
+    blob_id
+      Hexsha of the object the entry refers to.
+    ctime
+      Last status change of the file as a tuple of seconds and nanoseconds.
+    mtime
+      Last modification of the file as a tuple of seconds and nanoseconds.
+    dev
+      Device of the file.
+    ino
+      Inode number of the file.
+    uid
+      User id of the file's owner.
+    gid
+      Group id of the file's owner.
+    size
+      Size of the file in the worktree (truncated to 32 bit).
+    """
+
+    path: str
+    mode: int
+    blob_id: str
+    ctime: tuple[int, int]
+    mtime: tuple[int, int]
+    dev: int
+    ino: int
+    uid: int
+    gid: int
+    size: int
+
+
+_HEADER = struct.Struct('>4sLL')
+_ENTRY = struct.Struct('>10L20sH')
+_SHA1_SIZE = 20
+
+
+def _read_varint(data: mmap.mmap | bytes, pos: int) -> tuple[int, int]:
+    r"""Read a git "offset" varint (as used by index v4) at `pos`.
+
+    Returns the value and the position after it.
+    """
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, pos
+
+
+def read_index(index_file: Path) -> tuple[list[IndexEntry], str | None]:
+    r"""Read the entries of a git index file in-process.
+
+    The file is memory-mapped and parsed directly, rather than asking
+    ``git-ls-files`` for it. Index versions 2, 3, and 4 with SHA-1 object
+    ids are supported.
+
+    Parameters
+    ----------
+    index_file
+      Path to the index file (usually ``.git/index``).
+
+    Returns
+    -------
+    tuple
+      All entries in the order of the index (sorted by path), and the hexsha
+      of the tree the entire index corresponds to as recorded by the cache-tree
+      extension. The latter is `None`, if there is no valid cache-tree.
+
+    Raises
+    ------
+    UnsupportedIndexError
+      If the index uses features that are not supported (like split or sparse
+      indices), has unmerged entries, or is otherwise invalid.
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            size = f.seek(0, 2)
+            if size < _HEADER.size + _SHA1_SIZE:
+                raise UnsupportedIndexError(f"Invalid index file {index_file}")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _parse_index(data, size)
+    except OSError as e:
+        raise UnsupportedIndexError(f"Failed to read index file {index_file}") from e
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise UnsupportedIndexError(f"Invalid index file {index_file}") from e
+
+
+def _parse_index(data: mmap.mmap, size: int) -> tuple[list[IndexEntry], str | None]:
+    r"""Parse a memory-mapped index file. See `read_index()`."""
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b'DIRC' or version not in (2, 3, 4):
+        raise UnsupportedIndexError(f"Unsupported index version {version}")
+    content_end = size - _SHA1_SIZE
+    checksum = data[content_end:]
+    # A null checksum is written with `index.skipHash`.
+    if checksum != bytes(_SHA1_SIZE) and hashlib.sha1(data[:content_end]).digest() != checksum:
+        raise UnsupportedIndexError("Index checksum mismatch")
+
+    entries = []
+    pos = _HEADER.size
+    previous = b''
+    for _ in range(count):
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, mode, uid, gid, file_size,
+         sha, flags) = _ENTRY.unpack_from(data, pos)
+        entry_start = pos
+        pos += _ENTRY.size
+        if flags & 0x3000:
+            raise UnsupportedIndexError("Index has unmerged entries")
+        if flags & 0x4000:
+            extended = struct.unpack_from('>H', data, pos)[0]
+            pos += 2
+            # skip-worktree (sparse checkouts) and intent-to-add
+            if extended & 0x6000:
+                raise UnsupportedIndexError("Index has skip-worktree or intent-to-add entries")
+        if version == 4:
+            strip, pos = _read_varint(data, pos)
+            end = data.find(b'\0', pos)
+            name = previous[:len(previous) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.find(b'\0', pos)
+            name = data[pos:end]
+            # entries are NUL-padded to a multiple of eight bytes
+            pos = entry_start + ((end - entry_start + 8) & ~7)
+        if mode & 0o170000 == 0o040000:
+            raise UnsupportedIndexError("Index is a sparse index")
+        previous = name
+        entries.append(IndexEntry(path=name.decode(),
+                                  mode=mode,
+                                  blob_id=sha.hex(),
+                                  ctime=(ctime_s, ctime_ns),
+                                  mtime=(mtime_s, mtime_ns),
+                                  dev=dev,
+                                  ino=ino,
+                                  uid=uid,
+                                  gid=gid,
+                                  size=file_size))
+
+    tree = None
+    while pos + 8 <= content_end:
+        ext_signature, ext_size = struct.unpack_from('>4sL', data, pos)
+        pos += 8
+        if ext_signature in (b'link', b'sdir'):
+            raise UnsupportedIndexError(f"Unsupported index extension {ext_signature.decode()}")
+        if ext_signature == b'TREE':
+            tree = _parse_root_tree(data[pos:pos + ext_size])
+        pos += ext_size
+    return entries, tree
+
+
+def _parse_root_tree(extension: bytes) -> str | None:
+    r"""Get the hexsha of the root tree recorded by a cache-tree extension.
+
+    Returns `None` if the root tree is invalidated.
+    """
+    # <path>\0<entry count> <subtree count>\n<sha>; root has an empty path
+    end = extension.find(b'\n')
+    if not extension.startswith(b'\0') or end < 0:
+        return None
+    entry_count = int(extension[1:end].split(b' ')[0])
+    if entry_count < 0:
+        return None
+    return extension[end + 1:end + 1 + _SHA1_SIZE].hex()
+
+
+def read_index_checksum(index_file: Path) -> str | None:
+    r"""Get the checksum of a git index file.
+
+    The checksum changes whenever the index is written with a different content.
+
+    Parameters
+    ----------
+    index_file
+      Path to the index file (usually ``.git/index``).
+
+    Returns
+    -------
+    str or None
+      Hex representation of the trailing checksum. `None`, if there is no index
+      or it's written without checksum (``index.skipHash``).
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            if f.seek(0, 2) < _HEADER.size + _SHA1_SIZE:
+                return None
+            f.seek(-_SHA1_SIZE, 2)
+            checksum = f.read(_SHA1_SIZE)
+    except OSError:
+        return None
+    return checksum.hex() if checksum != bytes(_SHA1_SIZE) else None
+
+
+def read_head(git_dir: Path) -> str | None:
+    r"""Get the hexsha of the commit ``HEAD`` points to without calling git.
+
+    Only loose refs and packed refs are considered.
+
+    Parameters
+    ----------
+    git_dir
+      Path to the git directory (usually ``.git``).
+
+    Returns
+    -------
+    str or None
+      Hexsha of the commit. `None`, if it can't be determined in-process.
+    """
+    try:
+        head = (git_dir / 'HEAD').read_text().strip()
+        while head.startswith('ref: '):
+            ref = head[5:]
+            ref_file = git_dir / ref
+            if ref_file.is_file():
+                head = ref_file.read_text().strip()
+                continue
+            packed = git_dir / 'packed-refs'
+            if not packed.is_file():
+                return None
+            for line in packed.read_text().splitlines():
+                if line.endswith(f' {ref}'):
+                    head = line.split(' ')[0]
+                    break
+            else:
+                return None
+    except OSError:
+        return None
+    return head if len(head) == 2 * _SHA1_SIZE else None
+
+
+def read_head_tree(git_dir: Path) -> str | None:
+    r"""Get the hexsha of ``HEAD``'s tree without calling git.
+
+    Only loose refs, packed refs, and loose commit objects are considered.
+
+    Parameters
+    ----------
+    git_dir
+      Path to the git directory (usually ``.git``).
+
+    Returns
+    -------
+    str or None
+      Hexsha of the tree. `None`, if it can't be determined in-process.
+    """
+    head = read_head(git_dir)
+    if head is None:
+        return None
+    try:
+        obj = zlib.decompress((git_dir / 'objects' / head[:2] / head[2:]).read_bytes())
+    except (OSError, zlib.error):
+        return None
+    header, _, body = obj.partition(b'\0')
+    if not header.startswith(b'commit ') or not body.startswith(b'tree '):
+        return None
+    return body[5:5 + 2 * _SHA1_SIZE].decode()
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
 from functools import partial
+from itertools import count
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from onyo.lib.consts import PATH_DERIVED_KEYS, PSEUDO_KEYS, RESERVED_KEYS
 from onyo.lib.differs import (
     differ_new_assets,
     differ_new_directories,
@@ -35,6 +39,7 @@ from onyo.lib.executors import (
     exec_rename_directories,
     generic_executor,
 )
+from onyo.lib.filters import Filter, Query
 from onyo.lib.onyo import OnyoRepo
 from onyo.lib.recorders import (
     record_modify_assets,
@@ -74,6 +79,8 @@ class InventoryOperation(object):
     operator: InventoryOperator
     operands: tuple
     repo: OnyoRepo
+    # The rename queued as a consequence of this (modify) operation
+    implied_rename: InventoryOperation | None = field(default=None, compare=False, repr=False)
 
     def diff(self) -> Generator[str, None, None]:
         yield from self.operator.differ(repo=self.repo, operands=self.operands)
@@ -116,6 +123,80 @@ OPERATIONS_MAPPING: dict = {'new_directories': InventoryOperator(executor=exec_n
                             }
 
 
+class PendingOperations(object):
+    r"""Index of the paths affected by pending operations.
+
+    It's maintained alongside `Inventory.operations` as operations are queued
+    or dropped, so that checking for conflicts with pending operations doesn't
+    require scanning the entire queue.
+    """
+
+    def __init__(self) -> None:
+        # Counts rather than sets, since multiple operations may
+        # result in the same path.
+        self.asset_names: Counter[str] = Counter()
+        self.dirs: Counter[Path] = Counter()
+        self.removals: dict[str, Counter[Path]] = {'assets': Counter(),
+                                                   'dirs': Counter(),
+                                                   'files': Counter()}
+        self.modifications: dict[Path, InventoryOperation] = dict()
+
+    def _entries(self,
+                 op: InventoryOperation) -> list[tuple[Counter, Path | str]]:
+        r"""Get the counters `op` is recorded in and the entries it's recorded as."""
+        operator = op.operator
+        operands = op.operands
+        if operator is OPERATIONS_MAPPING['new_assets']:
+            return [(self.asset_names, operands[0].get('path').name)]
+        if operator is OPERATIONS_MAPPING['rename_assets']:
+            return [(self.asset_names, operands[1].name)]
+        if operator is OPERATIONS_MAPPING['new_directories']:
+            return [(self.dirs, operands[0])]
+        if operator is OPERATIONS_MAPPING['move_directories']:
+            return [(self.dirs, operands[1] / operands[0].name)]
+        if operator is OPERATIONS_MAPPING['remove_assets']:
+            path = operands[0] if isinstance(operands[0], Path) else Path(operands[0].get('path'))
+            return [(self.removals['assets'], path)]
+        if operator is OPERATIONS_MAPPING['remove_directories']:
+            return [(self.removals['dirs'], operands[0])]
+        if operator is OPERATIONS_MAPPING['remove_generic_file']:
+            return [(self.removals['files'], operands[0])]
+        return []
+
+    def add(self,
+            op: InventoryOperation) -> None:
+        r"""Record the queued operation `op`."""
+        for counter, entry in self._entries(op):
+            counter[entry] += 1
+        if op.operator is OPERATIONS_MAPPING['modify_assets']:
+            self.modifications[op.operands[1]['path']] = op
+
+    def remove(self,
+               op: InventoryOperation) -> None:
+        r"""Forget the dropped operation `op`."""
+        for counter, entry in self._entries(op):
+            counter[entry] -= 1
+            if counter[entry] <= 0:
+                del counter[entry]
+        if op.operator is OPERATIONS_MAPPING['modify_assets']:
+            self.modifications.pop(op.operands[1]['path'], None)
+
+    def is_removed(self,
+                   path: Path,
+                   mode: Literal['assets', 'dirs', 'all'] = 'all') -> bool:
+        r"""Whether `path` is removed by a pending operation.
+
+        Parameters
+        ----------
+        path
+            The path to check.
+        mode
+            What pending removals to consider: 'assets' only, 'dirs' only, or 'all'.
+        """
+        kinds = ['assets', 'dirs', 'files'] if mode == 'all' else [mode]
+        return any(path in self.removals[k] for k in kinds)
+
+
 # TODO: Conflict w/ existing operations?
 #       operations: raise InvalidInventoryOperationError on conflicts with pending operations,
 #       like removing something that is to be created. -> reset() or commit()
@@ -125,9 +206,32 @@ class Inventory(object):
 
     def __init__(self, repo: OnyoRepo) -> None:
         self.repo: OnyoRepo = repo
-        self.operations: list[InventoryOperation] = []
+        # Operations by their (ever increasing) position in the queue, and the
+        # positions by the operations' ids. This allows to replace or drop an
+        # operation without scanning the queue.
+        self._queue: dict[int, InventoryOperation] = dict()
+        self._positions: dict[int, int] = dict()
+        self._counter = count()
+        self._pending: PendingOperations = PendingOperations()
         self._ignore_for_commit: list[Path] = []
 
+    @property
+    def operations(self) -> list[InventoryOperation]:
+        r"""Pending operations in the order they are executed on commit.
+
+        This is a copy of the queue. Assigning a (e.g. truncated) list of
+        operations replaces the queue.
+        """
+        return list(self._queue.values())
+
+    @operations.setter
+    def operations(self, operations: list[InventoryOperation]) -> None:
+        self._queue = dict()
+        self._positions = dict()
+        self._pending = PendingOperations()
+        for op in operations:
+            self._enqueue(op)
+
     @property
     def root(self):
         r"""Path to root inventory directory."""
@@ -178,35 +282,29 @@ class Inventory(object):
     def operations_pending(self) -> bool:
         r"""Returns whether there's something to commit."""
         # Note: Seems superfluous now (operations is a list rather than dict of lists)
-        return bool(self.operations)
+        return bool(self._queue)
 
-    def _get_pending_asset_names(self) -> list[str]:
-        r"""List of asset names that are targets of pending operations.
+    def _get_pending_asset_names(self) -> Counter[str]:
+        r"""Asset names that are targets of pending operations.
 
-        This is extracting paths that would exist if the currently
+        This is extracting names that would exist if the currently
         pending operations were executed, in order to provide the
         means to check for conflicts.
 
         Current usecase: When adding/renaming assets, their
         names and must not yet exist - neither committed nor pending.
+
+        Returns
+        -------
+        Counter of str
+            Number of pending operations resulting in an asset name.
         """
-        # TODO: This needs to be better designed and generalized to
-        # include directory paths. Inventory methods need to check this
-        # instead of or in addition to something like Path.exists().
-        # The differs/executors/recorders already generate this
-        # information. Find a way to query that w/o executing in a
-        # structured way. Ideally, we should also account for paths
-        # that are being removed by pending operations and therefore
-        # are "free to use" for operations added to the queue.
-        names = []
-        for op in self.operations:
-            if op.operator == OPERATIONS_MAPPING['new_assets']:
-                names.append(op.operands[0].get('path').name)
-            elif op.operator == OPERATIONS_MAPPING['rename_assets']:
-                names.append(op.operands[1].name)
-        return names
-
-    def _get_pending_dirs(self) -> list[Path]:
+        # TODO: Account for paths that are being removed by pending
+        # operations and therefore are "free to use" for operations
+        # added to the queue.
+        return self._pending.asset_names
+
+    def _get_pending_dirs(self) -> Counter[Path]:
         r"""Get inventory dirs that would come into existence due to pending operations.
 
         Extract paths to inventory dirs, that are the anticipated results of pending
@@ -219,49 +317,29 @@ class Inventory(object):
 
         Returns
         -------
-        list of Path
+        Counter of Path
             Inventory dirs about to be created.
         """
-        dirs = []
-        for op in self.operations:
-            if op.operator == OPERATIONS_MAPPING['new_directories']:
-                dirs.append(op.operands[0])
-            elif op.operator == OPERATIONS_MAPPING['move_directories']:
-                dirs.append(op.operands[1] / op.operands[0].name)
-        return dirs
-
-    def _get_pending_removals(self,
-                              mode: Literal['assets', 'dirs', 'all'] = 'all') -> list[Path]:
-        r"""Get paths that are removed by pending operations.
+        return self._pending.dirs
+
+    def _is_pending_removal(self,
+                            path: Path,
+                            mode: Literal['assets', 'dirs', 'all'] = 'all') -> bool:
+        r"""Whether `path` is removed by pending operations.
 
         Parameters
         ----------
+        path
+            The path to check.
         mode
             What pending removals to consider: 'assets' only, 'dirs' only, or 'all'.
-
-        Notes
-        -----
-        Just like `_get_pending_asset_names` and `_get_pending_dirs`,
-        this needs to be replaced by a more structured way of assessing
-        what's in the queue. See issue #546.
-
-        Returns
-        -------
-        list of Path
-            To be removed paths.
         """
-        paths = []
-        operators = []
-        if mode in ['assets', 'all']:
-            operators.append(OPERATIONS_MAPPING['remove_assets'])
-        if mode in ['dirs', 'all']:
-            operators.append(OPERATIONS_MAPPING['remove_directories'])
-        if mode == 'all':
-            operators.append(OPERATIONS_MAPPING['remove_generic_file'])
-        for op in self.operations:
-            if op.operator in operators:
-                paths.append(op.operands[0])
-        return paths
+        return self._pending.is_removed(path, mode)
+
+    def _name_exists(self,
+                     name: str) -> bool:
+        r"""Whether an asset `name` exists in the inventory or is pending to."""
+        return name in self._get_pending_asset_names() or bool(self.repo.get_asset_paths_by_name(name))
 
     #
     # Operations
@@ -272,9 +350,40 @@ class Inventory(object):
         op = InventoryOperation(operator=OPERATIONS_MAPPING[name],
                                 operands=operands,
                                 repo=self.repo)
-        self.operations.append(op)
+        self._enqueue(op)
         return op
 
+    def _enqueue(self,
+                 op: InventoryOperation) -> None:
+        r"""Append `op` to the queue of pending operations."""
+        position = next(self._counter)
+        self._queue[position] = op
+        self._positions[id(op)] = position
+        self._pending.add(op)
+
+    def _is_queued(self,
+                   op: InventoryOperation) -> bool:
+        r"""Whether `op` itself is in the queue of pending operations."""
+        position = self._positions.get(id(op))
+        return position is not None and self._queue[position] is op
+
+    def _replace_operation(self,
+                           op: InventoryOperation,
+                           replacement: InventoryOperation | None) -> None:
+        r"""Replace the pending operation `op` in place, or drop it if `replacement` is `None`.
+
+        `op` itself is left untouched, so that a copy of the queue taken
+        before remains valid to restore.
+        """
+        position = self._positions.pop(id(op))
+        self._pending.remove(op)
+        if replacement is None:
+            del self._queue[position]
+        else:
+            self._queue[position] = replacement
+            self._positions[id(replacement)] = position
+            self._pending.add(replacement)
+
     def add_asset(self, asset: dict) -> list[InventoryOperation]:
         # TODO: what if I call this with a modified (possibly moved) asset?
         # -> check for conflicts and raise InvalidInventoryOperationError("something about either commit first or rest")
@@ -307,7 +416,7 @@ class Inventory(object):
             # Shouldn't there be a way to write files (or asset dirs) directly and then add them as new assets?
         if not self.repo.is_inventory_path(path):
             raise ValueError(f"{str(path)} is not a valid asset path.")
-        if name in self._get_pending_asset_names() + [p.name for p in self.repo.asset_paths]:
+        if self._name_exists(name):
             raise ValueError(f"Asset name '{name}' already exists in inventory")
 
         if asset.get('is_asset_directory', False):
@@ -350,7 +459,7 @@ class Inventory(object):
 
     def remove_asset(self, asset: dict | Path) -> list[InventoryOperation]:
         path = asset if isinstance(asset, Path) else asset.get('path')
-        if path in self._get_pending_removals(mode='assets'):
+        if self._is_pending_removal(path, mode='assets'):
             ui.log_debug(f"{path} already queued for removal.")
             # TODO: Consider NoopError when addressing #546.
             return []
@@ -401,7 +510,7 @@ class Inventory(object):
             raise NoopError(f"Cannot rename asset {name}: This is already its name.")
 
         destination = path.parent / name
-        if name in self._get_pending_asset_names() + [p.name for p in self.repo.asset_paths]:
+        if self._name_exists(name):
             raise ValueError(f"Asset name '{name}' already exists in inventory")
         if destination.exists():
             raise ValueError(f"Cannot rename asset {path.name} to {destination}. Already exists.")
@@ -428,7 +537,19 @@ class Inventory(object):
         # We keep the old path - if it needs to change, this will be done by a rename operation down the road
         new_asset['path'] = path
 
+        # A repeated modification of the same asset replaces the pending one.
+        # Hence, compare to the asset's content before that one.
+        pending = self._pending.modifications.get(path)
+        if pending is not None:
+            asset = pending.operands[0]
+            # Drop the rename implied by the replaced modification only. A
+            # rename requested explicitly is not for this method to undo.
+            if pending.implied_rename is not None and self._is_queued(pending.implied_rename):
+                self._replace_operation(pending.implied_rename, None)
+
         if is_equal_assets_dict(asset, new_asset):
+            if pending is not None:
+                self._replace_operation(pending, None)
             raise NoopError
 
         # If a change in is_asset_directory is implied, do this first:
@@ -442,20 +563,29 @@ class Inventory(object):
                    for k in [a for a in asset.keys()] + [b for b in new_asset.keys()]
                    if k != "is_asset_directory"):
                 return operations
-        operations.append(self._add_operation('modify_assets', (asset, new_asset)))
+        if pending is not None:
+            op = InventoryOperation(operator=OPERATIONS_MAPPING['modify_assets'],
+                                    operands=(asset, new_asset),
+                                    repo=self.repo)
+            self._replace_operation(pending, op)
+        else:
+            op = self._add_operation('modify_assets', (asset, new_asset))
+        operations.append(op)
         # new_asset has the same 'path' at this point, regardless of potential renaming.
         # We modify the content in place and only then perform a potential rename.
         # Otherwise, we'd move the old asset and write the modified one to the old place or
         # write an entirely new one w/o a git-trackable relation to the old one.
         try:
-            operations.extend(self.rename_asset(new_asset))
+            renames = self.rename_asset(new_asset)
+            op.implied_rename = renames[0]
+            operations.extend(renames)
         except NoopError:
             # Modification did not imply a rename
             pass
         return operations
 
     def remove_directory(self, directory: Path, recursive: bool = True) -> list[InventoryOperation]:
-        if directory in self._get_pending_removals(mode='dirs'):
+        if self._is_pending_removal(directory, mode='dirs'):
             ui.log_debug(f"{directory} already queued for removal")
             # TODO: Consider NoopError when addressing #546.
             return []
@@ -477,7 +607,7 @@ class Inventory(object):
             elif not is_asset and p.name not in [self.repo.ANCHOR_FILE_NAME, self.repo.ASSET_DIR_FILE_NAME]:
                 # Not an asset and not an inventory dir (hence also not an asset dir)
                 # implies we have a non-inventory file.
-                if p in self._get_pending_removals(mode='all'):
+                if self._is_pending_removal(p, mode='all'):
                     ui.log_debug(f"{p} already queued for removal")
                     continue
                 operations.append(self._add_operation('remove_generic_file', (p,)))
@@ -525,11 +655,18 @@ class Inventory(object):
     def get_assets(self,
                    include: Iterable[Path] | None = None,
                    exclude: Iterable[Path] | Path | None = None,
-                   depth: int = 0) -> Generator[dict, None, None]:
+                   depth: int = 0,
+                   jobs: int | None = None) -> Generator[dict, None, None]:
         r"""Yield all assets under `paths` up to `depth` directory levels.
 
         Generator, because it needs to read file content. This allows to act upon
         results while they are coming in.
+        The content is read in a single batch from git's object store, rather
+        than from the worktree. Already parsed content is taken from the
+        repository's asset cache.
+        Assets are parsed for reading only, meaning they are plain dictionaries
+        without YAML comments and formatting. Use `Inventory.get_asset()` to
+        get an asset for modification.
 
         Parameters
         ----------
@@ -541,15 +678,25 @@ class Inventory(object):
         depth
           Number of levels to descend into. Must be greater equal 0.
           If 0, descend recursively without limit. Defaults to 0.
+        jobs
+          Number of processes to parse assets with. Defaults to
+          ``onyo.core.jobs``. See `OnyoRepo.get_jobs()`.
 
         Returns
         -------
         Generator of dict
            All matching assets in the inventory.
         """
-        for p in self.repo.get_asset_paths(include=include, exclude=exclude, depth=depth):
+        paths = self.repo.get_asset_paths(include=include, exclude=exclude, depth=depth)
+        yield from self._read_assets(paths, jobs=jobs)
+
+    def _read_assets(self,
+                     paths: Iterable[Path],
+                     jobs: int | None = None) -> Generator[dict, None, None]:
+        r"""Yield the assets `paths`, reporting those that fail to load."""
+        for p, content in self.repo.read_asset_contents(paths, jobs=jobs):
             try:
-                yield self.get_asset(p)
+                yield self.repo.get_asset_content(p, content=content)
             except NotAnAssetError as e:
                 # report the error, but proceed
                 ui.error(e)
@@ -562,13 +709,22 @@ class Inventory(object):
                             include: list[Path] | None = None,
                             exclude: list[Path] | Path | None = None,
                             depth: int | None = 0,
-                            match: list[Callable[[dict], bool]] | None = None) -> Generator | filter:
+                            match: list[Callable[[dict], bool]] | None = None,
+                            jobs: int | None = None,
+                            keys: list[str] | None = None) -> Generator | filter:
         r"""Get assets matching paths and filters.
 
         Convenience to run the builtin `filter` on all assets retrieved by
         `self.get(paths, depth)` for each callable in `filters`, thus
         combining the filters by a logical AND.
 
+        Assets are read only as far as needed: `Filter`\ s on the pseudo-keys
+        ``path``, ``directory``, and ``is_asset_directory`` are decided from
+        the asset paths, before any content is read. This includes `Filter`\ s
+        within `Query` trees, as far as they decide the query (see
+        `Query.evaluate()`). If neither the undecided filters nor `keys` need
+        asset content, no content is read at all.
+
         Parameters
         ----------
         include
@@ -583,7 +739,19 @@ class Inventory(object):
           Passed to `self.get_assets`.
         match
           Callable suitable for the builtin `filter`, when called on a
-          list of assets (dictionaries).
+          list of assets (dictionaries). Exact `Filter`\ s (also within a
+          `Query`) are looked up in the key index first, if it's enabled
+          (``onyo.cache.index``), so that only the candidates are read.
+          `Filter`\ s are applied in order of their `Filter.cost`, before any
+          other callables.
+        jobs
+          Number of processes to parse assets with. Passed to
+          `self.get_assets`.
+        keys
+          Keys the caller needs in the returned assets. If these are only
+          pseudo-keys, the returned assets consist of the pseudo-keys only,
+          and their content is not read (nor validated). Defaults to `None`,
+          meaning all keys are needed.
 
         Returns
         -------
@@ -592,12 +760,91 @@ class Inventory(object):
           for which all `filters` returned `True`.
         """
         depth = 0 if depth is None else depth
-        assets = self.get_assets(include=include, exclude=exclude, depth=depth)
-        if match:
-            # Remove assets that do not match all filters
-            for f in match:
-                assets = filter(f, assets)
-        return assets
+        # All callables in `match` need to match. Cheap and selective filters
+        # are evaluated first (see `Query`).
+        query = Query('and', list(match or []))
+        paths = self.repo.get_asset_paths(include=include, exclude=exclude, depth=depth)
+
+        # Plan: Decide as much as possible from the paths, before reading anything.
+        if any(f.key in PATH_DERIVED_KEYS for f in query.filters):
+            decisions = {p: query.evaluate(self._get_path_keys(p), PATH_DERIVED_KEYS) for p in paths}
+            paths = [p for p in paths if decisions[p] is not False]
+            undecided = {p for p in paths if decisions[p] is None}
+        else:
+            undecided = set(paths) if query.operands else set()
+        if undecided:
+            candidates = self._get_indexed_candidates(query)
+            if candidates is not None:
+                # read only the assets that can possibly match
+                paths = [p for p in paths if p in candidates]
+                undecided &= candidates
+
+        if keys is not None and set(keys).issubset(PATH_DERIVED_KEYS):
+            def path_keys_only() -> Generator[dict, None, None]:
+                matched = {a['path'] for a in self._read_assets([p for p in paths if p in undecided], jobs=jobs)
+                           if query(a)} if undecided else set()
+                for p in paths:
+                    if p not in undecided or p in matched:
+                        yield self._get_path_keys(p)
+            return path_keys_only()
+
+        assets = self._read_assets(paths, jobs=jobs)
+        # Remove assets that do not match
+        return (a for a in assets if a['path'] not in undecided or query(a)) if undecided else assets
+
+    def _get_path_keys(self,
+                       path: Path) -> dict:
+        r"""Get the keys of the asset `path` that are derived from its path (see `PATH_DERIVED_KEYS`)."""
+        return {'path': path,
+                'directory': path.parent,
+                'is_asset_directory': self.repo.is_asset_dir(path)}
+
+    def _get_indexed_candidates(self,
+                                query: Query) -> set[Path] | None:
+        r"""Get the paths of assets that can match `query` according to the key index.
+
+        Exact `Filter`\ s are looked up in the repository's key index (see
+        `OnyoRepo.get_key_index()`). The candidates of ``and`` are intersected,
+        those of ``or`` are united. Other filters and ``not`` don't restrict
+        the candidates.
+
+        Assets that failed to parse are always candidates, so that reading
+        them reports the error as without the index.
+
+        Returns
+        -------
+        set of Path or None
+          Paths of the assets that can match. `None`, if the index can't
+          restrict the candidates, or it is not available.
+        """
+        def indexable(f: Filter) -> bool:
+            return f.is_exact and f.key not in PSEUDO_KEYS + RESERVED_KEYS
+
+        if not any(indexable(f) for f in query.filters):
+            return None
+        index = self.repo.get_key_index()
+        if index is None:
+            return None
+
+        def lookup(node: Callable[[dict], bool]) -> set[str] | None:
+            if isinstance(node, Filter):
+                return index.lookup(node.key, node.value) if indexable(node) else None
+            if not isinstance(node, Query) or node.operator == 'not':
+                return None
+            found = [lookup(o) for o in node.operands]
+            if node.operator == 'or':
+                return None if None in found else set().union(*found)
+            restricting = [c for c in found if c is not None]
+            return set.intersection(*restricting) if restricting else None
+
+        try:
+            candidates = lookup(query)
+            if candidates is not None:
+                candidates |= index.unparsable()
+        except sqlite3.Error as e:
+            ui.log_debug(f"Not using key index: {e}")
+            return None
+        return None if candidates is None else {self.repo.git.root / p for p in candidates}
 
     def asset_paths_available(self, assets: dict | list[dict]) -> None:
         r"""Test whether path used by `assets` are available in the inventory.
@@ -613,16 +860,17 @@ class Inventory(object):
         # TODO: Used to test valid asset name first. Do we need that?
         #       Not in context of `new`, because the name is generated.
         paths_to_test = [a.get('path') for a in assets]
+        names = Counter(p.name for p in paths_to_test if p)
         for path in paths_to_test:
             if not path:
                 continue  # TODO: raise or ignore?
             if path.exists():
                 raise ValueError(f"{str(path)} already exists in inventory")
-            if len([p.name for p in paths_to_test if p.name == path.name]) > 1:
+            if names[path.name] > 1:
                 raise ValueError(f"Multiple {path.name} given. Asset names must be unique.")
             if not self.repo.is_inventory_path(path):
                 raise ValueError(f"{str(path)} is not a valid asset path.")
-            if path.name in [p.name for p in self.repo.asset_paths]:
+            if self._name_exists(path.name):
                 raise ValueError(f"Asset name '{path.name}' already exists in inventory.")
 
     def generate_asset_name(self, asset: dict) -> str:
@@ -680,10 +928,11 @@ class Inventory(object):
         required is anticipated. This would need to account for those
         as well.
         """
+        name_keys = self.repo.get_asset_name_keys()
         if any(v is None or not str(v).strip()
                for k, v in asset.items()
-               if k in self.repo.get_asset_name_keys()):
-            raise ValueError(f"Required asset keys ({', '.join(self.repo.get_asset_name_keys())})"
+               if k in name_keys):
+            raise ValueError(f"Required asset keys ({', '.join(name_keys)})"
                              f" must not have empty values.")
 
     def raise_empty_keys(self, asset: dict) -> None:
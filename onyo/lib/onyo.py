@@ -3,26 +3,60 @@ from __future__ import annotations
 import logging
 import os
 import shutil
+import sqlite3
 import subprocess
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from .consts import KNOWN_REPO_VERSIONS
+from .cache import (
+    ASSET_CACHE_FILE,
+    KEY_INDEX_FILE,
+    PATHS_CACHE_FILE,
+    AssetCache,
+    KeyIndex,
+    load_paths_cache,
+    store_paths_cache,
+)
+from .consts import KNOWN_REPO_VERSIONS, PSEUDO_KEYS, RESERVED_KEYS
 from .exceptions import (
     NotAnAssetError,
     OnyoInvalidRepoError,
     OnyoProtectedPathError
 )
-from .git import GitRepo
+from .git import GitRepo, IndexedPaths
 from .ui import ui
 from .utils import get_asset_content, write_asset_file
 
 if TYPE_CHECKING:
-    from typing import Iterable, List
+    from typing import Generator, Iterable, List
 
 log: logging.Logger = logging.getLogger('onyo.onyo')
 
 
+def _parse_asset_file(item: tuple[Path, str | None]) -> dict | None:
+    r"""Parse the content of an asset file for reading only.
+
+    Module-level, so that it can be run in worker processes.
+
+    Parameters
+    ----------
+    item
+      Path of the asset file and its content.
+
+    Returns
+    -------
+    dict or None
+      The parsed content. `None`, if there's no content or it's not valid.
+    """
+    path, content = item
+    if content is None:
+        return None
+    try:
+        return get_asset_content(path, content=content, read_only=True)
+    except NotAnAssetError:
+        return None
+
+
 class OnyoRepo(object):
     r"""
     An object representing an Onyo repository.
@@ -46,7 +80,9 @@ class OnyoRepo(object):
     ONYO_CONFIG = ONYO_DIR / 'config'
     TEMPLATE_DIR = ONYO_DIR / 'templates'
     ANCHOR_FILE_NAME = '.anchor'
+    ASSET_CACHE_DEFAULT_SIZE = 256  # MiB
     ASSET_DIR_FILE_NAME = '.onyo-asset-dir'
+    FSCK_REF = 'refs/onyo/fsck'
     IGNORE_FILE_NAME = '.onyoignore'
 
     def __init__(self,
@@ -95,7 +131,12 @@ class OnyoRepo(object):
         ui.log_debug(f"Onyo repo (version {self.version}) found at '{self.git.root}'")
 
         # caches
-        self._asset_paths: list[Path] | None = None
+        self._asset_paths: IndexedPaths | None = None
+        self._inventory_dirs: set[Path] | None = None
+        self._asset_dirs: set[Path] | None = None
+        self._onyo_ignored: dict[Path, bool] | None = None
+        self._asset_cache: AssetCache | None = None
+        self._key_index: KeyIndex | None = None
 
     def set_config(self,
                    name: str,
@@ -209,6 +250,8 @@ class OnyoRepo(object):
 
         Caches cleared are:
         - `OnyoRepo.asset_paths`
+        - inventory and asset directories
+        - evaluations of `OnyoRepo.is_onyo_ignored()`
         - `GitRepo.git.clear_cache()`
 
         If the repository is exclusively modified via public API functions, the
@@ -217,6 +260,9 @@ class OnyoRepo(object):
         the cache does not contain stale information.
         """
         self._asset_paths = None
+        self._inventory_dirs = None
+        self._asset_dirs = None
+        self._onyo_ignored = None
         self.git.clear_cache()
 
     @staticmethod
@@ -272,17 +318,49 @@ class OnyoRepo(object):
         return message
 
     @property
-    def asset_paths(self) -> list[Path]:
+    def asset_paths(self) -> IndexedPaths:
         r"""Get the absolute ``Path``\ s of all assets in this repository.
 
+        This behaves like a list, but membership tests are hashed.
+
         This property is cached, and is reset automatically on `OnyoRepo.commit()`.
+        It is also persisted across processes (see `OnyoRepo._load_paths()`).
 
         If changes are made by different means, use `OnyoRepo.clear_cache()` to
         reset the cache.
         """
         if self._asset_paths is None:
-            self._asset_paths = self.get_asset_paths()
-        return self._asset_paths
+            self._load_paths()
+        return self._asset_paths  # pyre-ignore[7]
+
+    def _load_paths(self) -> None:
+        r"""Populate the caches of asset paths, inventory dirs, and asset dirs.
+
+        These are read from a cache file in the git directory, if that is valid
+        for the current ``HEAD`` and index (`GitRepo.get_state_key()`).
+        Otherwise, they are computed from the tracked files and stored in the
+        cache file for subsequent processes to use.
+        """
+        root = self.git.root
+        cache_file = self.git.git_dir / PATHS_CACHE_FILE
+        key = self.git.get_state_key()
+        cached = load_paths_cache(cache_file, key) if key else None
+        if cached is not None:
+            ui.log_debug(f"Using cached paths from {cache_file}")
+            self._asset_paths = IndexedPaths(root / p for p in cached['assets'])
+            self._inventory_dirs = {root / p for p in cached['inventory_dirs']}
+            self._asset_dirs = {root / p for p in cached['asset_dirs']}
+            return
+
+        self._asset_paths = IndexedPaths(self.get_asset_paths())
+        self._inventory_dirs = {root} | {a.parent for a in self.git.files.with_name(self.ANCHOR_FILE_NAME)
+                                         if self.is_inventory_path(a.parent)}
+        self._asset_dirs = {p for p in self._asset_paths if p in self._inventory_dirs}
+        if key and key == self.git.get_state_key():
+            store_paths_cache(cache_file, key,
+                              {'assets': [p.relative_to(root).as_posix() for p in self._asset_paths],
+                               'inventory_dirs': [p.relative_to(root).as_posix() for p in self._inventory_dirs],
+                               'asset_dirs': [p.relative_to(root).as_posix() for p in self._asset_dirs]})
 
     def validate_onyo_repo(self) -> None:
         r"""Assert whether this is a properly set up onyo repository and has a fully
@@ -401,8 +479,29 @@ class OnyoRepo(object):
 
         This only considers directories w/ committed anchor file.
         """
-        return path == self.git.root or \
-            (self.is_inventory_path(path) and path / self.ANCHOR_FILE_NAME in self.git.files)
+        if self._inventory_dirs is None:
+            self._load_paths()
+        return path in self._inventory_dirs  # pyre-ignore[58]
+
+    def get_asset_paths_by_name(self,
+                                name: str) -> list[Path]:
+        r"""Get all assets in the repository named `name`.
+
+        Asset names are supposed to be unique, but this is not enforced
+        for committed assets (see ``onyo fsck``). The lookup table is built
+        on first use and invalidated along with `OnyoRepo.asset_paths`.
+
+        Parameters
+        ----------
+        name
+          Asset name to look up.
+
+        Returns
+        -------
+        list of Path
+          Paths of all assets named `name`.
+        """
+        return self.asset_paths.with_name(name)
 
     def is_asset_path(self,
                       path: Path) -> bool:
@@ -458,7 +557,9 @@ class OnyoRepo(object):
         bool
           Whether `path` is an asset directory.
         """
-        return self.is_inventory_dir(path) and self.is_asset_path(path)
+        if self._asset_dirs is None:
+            self._load_paths()
+        return path in self._asset_dirs  # pyre-ignore[58]
 
     def is_onyo_ignored(self, path: Path) -> bool:
         r"""Whether `path` is matched by an ``.onyoignore`` file.
@@ -467,6 +568,9 @@ class OnyoRepo(object):
         to be an inventory item by onyo.
         Ignore files do apply to the subtree they are placed into.
 
+        All tracked files and their directories are evaluated at once on first
+        use. Results are cached until `OnyoRepo.clear_cache()` is called.
+
         Parameters
         ----------
         path
@@ -478,13 +582,95 @@ class OnyoRepo(object):
         bool
           Whether `path` is ignored.
         """
-        candidates = [self.git.root / p / OnyoRepo.IGNORE_FILE_NAME
-                      for p in path.relative_to(self.git.root).parents]
-        actual = [f for f in candidates if f in self.git.files]  # committed files only
-        for ignore_file in actual:
-            if path in self.git.check_ignore(ignore_file, [path]):
-                return True
-        return False
+        if self._onyo_ignored is None:
+            self._onyo_ignored = self._evaluate_onyo_ignore(self.git.files)
+        if path not in self._onyo_ignored:
+            # Not tracked by git. Evaluate individually.
+            path.relative_to(self.git.root)  # raise ValueError on paths outside the repository
+            self._onyo_ignored.update(self._evaluate_onyo_ignore([path], with_parents=False))
+        return self._onyo_ignored[path]
+
+    def _evaluate_onyo_ignore(self,
+                              paths: Iterable[Path],
+                              with_parents: bool = True) -> dict[Path, bool]:
+        r"""Evaluate the committed ignore files for `paths`.
+
+        Each committed ignore file is evaluated by a single call
+        to `GitRepo.check_ignore()` for all of the relevant paths.
+
+        Parameters
+        ----------
+        paths
+          Absolute paths to evaluate.
+        with_parents
+          Whether to also evaluate all parent directories of `paths`
+          within the repository.
+
+        Returns
+        -------
+        dict
+          Mapping of the evaluated paths to whether they are ignored.
+        """
+        evaluated = dict()
+        for p in paths:
+            evaluated[p] = False
+            if with_parents:
+                for parent in p.parents:
+                    if parent == self.git.root or parent in evaluated:
+                        break
+                    evaluated[parent] = False
+        # committed files only
+        for ignore_file in self.git.files.with_name(self.IGNORE_FILE_NAME):
+            subtree = ignore_file.parent
+            candidates = [p for p in evaluated if subtree in p.parents]
+            for p in self.git.check_ignore(ignore_file, candidates):
+                evaluated[p] = True
+        return evaluated
+
+    def get_asset_files(self,
+                        paths: Iterable[Path],
+                        commitish: str) -> dict[Path, Path]:
+        r"""Get the files of those of `paths` that are assets in `commitish`.
+
+        Unlike `OnyoRepo.is_asset_path()`, this evaluates the tracked files and
+        ignore files (`OnyoRepo.IGNORE_FILE_NAME`) of `commitish` rather than
+        the worktree. Only the ignore files that apply to `paths` are read.
+
+        Parameters
+        ----------
+        paths
+          Absolute paths to evaluate.
+        commitish
+          Any identifier that refers to a commit.
+
+        Returns
+        -------
+        dict
+          Mapping of the asset paths among `paths` to their file, which is
+          the `OnyoRepo.ASSET_DIR_FILE_NAME` for asset directories.
+        """
+        import tempfile
+
+        tracked = IndexedPaths(self.git.get_subtrees(commitish=commitish))
+        files = dict()
+        for p in paths:
+            if p / self.ASSET_DIR_FILE_NAME in tracked:
+                files[p] = p / self.ASSET_DIR_FILE_NAME
+            elif p in tracked and not self.git.is_git_path(p) and not self.is_onyo_path(p):
+                files[p] = p
+
+        # Evaluate the ignore files of `commitish` for the asset files. Asset
+        # directories aren't subject to them (see `OnyoRepo.get_asset_paths()`).
+        candidates = [p for p, f in files.items() if f == p]
+        ignore_files = [f for f in tracked.with_name(self.IGNORE_FILE_NAME)
+                        if any(f.parent in p.parents for p in candidates)]
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, (ignore_file, content) in enumerate(self.git.cat_files(ignore_files, commitish=commitish)):
+                patterns = Path(tmp) / str(i)
+                patterns.write_text(content or '')
+                for p in self.git.check_ignore(patterns, [p for p in candidates if ignore_file.parent in p.parents]):
+                    files.pop(p, None)
+        return files
 
     def get_template(self,
                      path: Path | str | None = None) -> dict:
@@ -525,28 +711,34 @@ class OnyoRepo(object):
     def validate_anchors(self) -> bool:
         r"""Check if all dirs (except those in `.onyo/`) contain an .anchor file.
 
+        The worktree is walked once via `os.scandir()`. Subtrees that are not
+        inventory paths (like ``.git/``, ``.onyo/``, or ignored directories) are
+        not descended into.
+
         Returns
         -------
         bool
             True if all directories contain an `.anchor` file, otherwise False.
         """
-        # Note: First line not using protected_paths, because `.anchor` is part
-        #       of it. But ultimately, exist vs expected should take the same
-        #       subtrees into account. So - not good to code it differently.
-        anchors_exist = {x
-                         for x in self.git.files
-                         if x.name == self.ANCHOR_FILE_NAME and
-                         self.is_inventory_path(x.parent)}
-
-        anchors_expected = {Path(x) / self.ANCHOR_FILE_NAME
-                            for x in [self.git.root / f for f in self.git.root.glob('**/')]
-                            if x != self.git.root and self.is_inventory_path(x) and x.is_dir()}
-        difference = anchors_expected.difference(anchors_exist)
+        anchors_expected = set()
+        stack = [self.git.root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    path = Path(entry.path)
+                    if self.is_inventory_path(path):
+                        anchors_expected.add(path / self.ANCHOR_FILE_NAME)
+                        stack.append(path)
+        # Anchors are expected in inventory directories only. Hence, merely
+        # check whether they are tracked.
+        difference = {a for a in anchors_expected if a not in self.git.files}
 
         if difference:
             log.warning(
                 'The following .anchor files are missing:\n'
-                '{0}'.format('\n'.join(map(str, difference))))
+                '{0}'.format('\n'.join(map(str, sorted(difference)))))
             log.warning(
                 "Likely 'mkdir' was used to create the directory. Use "
                 "'onyo mkdir' instead.")
@@ -556,6 +748,30 @@ class OnyoRepo(object):
 
         return True
 
+    def get_verified_commit(self) -> str | None:
+        r"""Get the commit that ``onyo fsck`` last verified successfully.
+
+        It is recorded as `OnyoRepo.FSCK_REF`.
+
+        Returns
+        -------
+        str or None
+          The hexsha of the commit. `None`, if there is none.
+        """
+        return self.git._git(['rev-parse', '--quiet', '--verify', f'{self.FSCK_REF}^{{commit}}'],
+                             raise_error=False).strip() or None
+
+    def set_verified_commit(self,
+                            commit: str) -> None:
+        r"""Record `commit` as verified successfully by ``onyo fsck``.
+
+        Parameters
+        ----------
+        commit
+          Hexsha of the verified commit.
+        """
+        self.git._git(['update-ref', '-m', 'onyo fsck', self.FSCK_REF, commit])
+
     def get_asset_paths(self,
                         include: Iterable[Path] | None = None,
                         exclude: Iterable[Path] | Path | None = None,
@@ -582,26 +798,244 @@ class OnyoRepo(object):
         """
         if depth < 0:
             raise ValueError(f"depth must be greater or equal 0, but is '{depth}'")
-        # Note: The if-else here doesn't change result, but utilizes `GitRepo`'s cache:
-        files = self.git.get_subtrees(include) if include else self.git.files
-        if depth:
-            roots = include if include else [self.git.root]
-            files = [f
-                     for f in files
-                     for r in roots
-                     if r in f.parents and len(f.parents) - len(r.parents) <= depth]
-
-        if exclude:
-            exclude = [exclude] if isinstance(exclude, Path) else exclude
-            files = [f for f in files if all(f != p and p not in f.parents for p in exclude)]
+        exclude = [exclude] if isinstance(exclude, Path) else exclude
+        files = self.git.files
+        if include or exclude or depth:
+            # Walks only the selected subtrees of the (cached) tracked files:
+            files = files.subtrees(include or [self.git.root], exclude=exclude, depth=depth)
 
         # This only checks for `is_inventory_path`, since we already
         # know it's a committed file:
         return [f for f in files if self.is_inventory_path(f)] + \
                [f.parent for f in files if f.name == self.ASSET_DIR_FILE_NAME]
 
+    def read_asset_files(self,
+                         paths: Iterable[Path],
+                         commitish: str = 'HEAD') -> Generator[tuple[Path, str | None], None, None]:
+        r"""Read the files of the assets `paths` as committed in `commitish`.
+
+        All files are read in a single batch from git's object store (see
+        `GitRepo.cat_files()`). For asset directories, the content of their
+        `OnyoRepo.ASSET_DIR_FILE_NAME` file is read.
+
+        Parameters
+        ----------
+        paths
+          Asset paths to read.
+        commitish
+          Any identifier that refers to a commit (defaults to "HEAD").
+
+        Returns
+        -------
+        Generator of tuple of Path and str
+          Pairs of an asset path and the raw content of its file. The content
+          is `None` if the file does not exist in `commitish`.
+        """
+        from collections import deque
+
+        # `GitRepo.cat_files` yields in order of requests:
+        requested = deque()
+
+        def asset_files() -> Generator[Path, None, None]:
+            for p in paths:
+                requested.append(p)
+                yield p / self.ASSET_DIR_FILE_NAME if self.is_inventory_dir(p) else p
+
+        for _, content in self.git.cat_files(asset_files(), commitish=commitish):
+            yield requested.popleft(), content
+
+    @property
+    def asset_cache(self) -> AssetCache | None:
+        r"""Get the persistent cache of parsed asset contents.
+
+        Its maximum size is configured by ``onyo.cache.size`` (in MiB).
+
+        Returns
+        -------
+        AssetCache or None
+          The cache. `None`, if it is disabled (``onyo.cache.size`` is 0).
+        """
+        if self._asset_cache is None:
+            size = self.get_config('onyo.cache.size')
+            try:
+                max_size = int(size) if size else self.ASSET_CACHE_DEFAULT_SIZE
+            except ValueError as e:
+                raise ValueError(f"Invalid value for 'onyo.cache.size': '{size}'. Expected size in MiB.") from e
+            if max_size <= 0:
+                return None
+            self._asset_cache = AssetCache(self.git.git_dir / ASSET_CACHE_FILE, max_size * 1024 * 1024)
+        return self._asset_cache
+
+    def get_jobs(self,
+                 jobs: int | None = None) -> int:
+        r"""Get the number of processes to parse assets with.
+
+        Parameters
+        ----------
+        jobs
+          Requested number of processes. If `None`, ``onyo.core.jobs`` is used
+          (default: 1). ``0`` means to use all available CPUs.
+
+        Raises
+        ------
+        ValueError
+          If the number is negative or ``onyo.core.jobs`` is not a number.
+        """
+        if jobs is None:
+            value = self.get_config('onyo.core.jobs')
+            try:
+                jobs = int(value) if value else 1
+            except ValueError as e:
+                raise ValueError(f"Invalid value for 'onyo.core.jobs': '{value}'. Expected a number.") from e
+        if jobs < 0:
+            raise ValueError(f"Invalid number of jobs: {jobs}")
+        return jobs or os.cpu_count() or 1
+
+    def read_asset_contents(self,
+                            paths: Iterable[Path],
+                            jobs: int | None = None) -> Generator[tuple[Path, dict | str | None], None, None]:
+        r"""Read and parse the files of the assets `paths` as committed in ``HEAD``.
+
+        Parsed contents are looked up in `OnyoRepo.asset_cache` by the files'
+        blob ids. Only files not found there are read from git's object store
+        (see `OnyoRepo.read_asset_files()`), parsed, and added to the cache.
+
+        The content is parsed for reading only (see
+        `onyo.lib.utils.get_yaml_loader()`). It lacks comments and formatting,
+        and must not be written back. Use `OnyoRepo.get_asset_content()` to
+        get an asset for modification.
+
+        Parameters
+        ----------
+        paths
+          Asset paths to read.
+        jobs
+          Number of processes to parse files with (see `OnyoRepo.get_jobs()`).
+          Results are yielded in the order of `paths` regardless.
+
+        Returns
+        -------
+        Generator of tuple of Path and dict or str
+          Pairs of an asset path and the parsed content of its file (see
+          `OnyoRepo.get_asset_content()`). If a file fails to parse, its raw
+          content is given instead, and `None` if it does not exist in ``HEAD``.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import islice
+
+        jobs = self.get_jobs(jobs)
+        cache = self.asset_cache
+        executor = None
+        paths = iter(paths)
+        try:
+            # Process chunks of paths, so that not all of the content needs to
+            # be held in memory at once.
+            while chunk := list(islice(paths, 1000)):
+                files = [p / self.ASSET_DIR_FILE_NAME if self.is_inventory_dir(p) else p for p in chunk]
+                blob_ids = [self.git.blob_ids.get(f) for f in files] if cache else [None] * len(chunk)
+                cached = cache.lookup(b for b in blob_ids if b) if cache else dict()
+                uncached = [i for i, b in enumerate(blob_ids) if b not in cached]
+                contents = [c for _, c in self.read_asset_files(chunk[i] for i in uncached)]
+                items = [(files[i], c) for i, c in zip(uncached, contents)]
+                # Starting processes only pays off for enough files.
+                if jobs > 1 and len(items) >= 8 * jobs:
+                    executor = executor or ProcessPoolExecutor(max_workers=jobs)
+                    parsed = executor.map(_parse_asset_file, items, chunksize=max(1, len(items) // (4 * jobs)))
+                else:
+                    parsed = map(_parse_asset_file, items)
+                parsed_uncached = iter(zip(contents, parsed))
+                for p, b in zip(chunk, blob_ids):
+                    if b in cached:
+                        yield p, cache.decode(cached[b])  # pyre-ignore[16]
+                        continue
+                    content, parsed_content = next(parsed_uncached)
+                    if parsed_content is None:
+                        # Let `get_asset_content` report it.
+                        yield p, content
+                        continue
+                    if cache and b:
+                        cache.add(b, parsed_content)
+                    yield p, parsed_content
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            if cache:
+                cache.flush()
+
+    def get_key_index(self) -> KeyIndex | None:
+        r"""Get the index of asset keys and values, updated to ``HEAD``.
+
+        The index is enabled by ``onyo.cache.index``. If it was built for a
+        different commit, only the assets changed in between are re-indexed,
+        unless an `OnyoRepo.IGNORE_FILE_NAME` changed or the indexed commit is
+        not available anymore.
+
+        Returns
+        -------
+        KeyIndex or None
+          The index. `None`, if it is disabled or can't be used.
+        """
+        if (self.get_config('onyo.cache.index') or '').lower() not in ['true', 'yes', 'on', '1']:
+            return None
+        head = self.git.get_head()
+        if head is None:
+            return None
+        if self._key_index is None:
+            self._key_index = KeyIndex(self.git.git_dir / KEY_INDEX_FILE)
+        try:
+            indexed = self._key_index.get_meta('commit')
+            if indexed != head:
+                self._update_key_index(self._key_index, indexed, head)
+        except sqlite3.Error as e:
+            ui.log_debug(f"Not using key index {self._key_index.db_file}: {e}")
+            self._key_index.close()
+            return None
+        return self._key_index
+
+    def _update_key_index(self,
+                          index: KeyIndex,
+                          indexed: str | None,
+                          head: str) -> None:
+        r"""Update `index` from commit `indexed` to `head`."""
+        changed = None
+        if indexed:
+            try:
+                diff = self.git._git(['diff-tree', '-r', '-z', '--no-renames', '--name-only', indexed, head])
+            except subprocess.CalledProcessError:
+                pass
+            else:
+                changed = {self.git.root / p for p in diff.split('\0') if p}
+                if any(p.name == self.IGNORE_FILE_NAME for p in changed):
+                    changed = None
+
+        if changed is None:
+            ui.log_debug(f"Rebuilding key index for {head}")
+            removed = set()
+            assets = list(self.asset_paths)
+        else:
+            ui.log_debug(f"Updating key index from {indexed} to {head}")
+            removed = {p.parent if p.name == self.ASSET_DIR_FILE_NAME else p for p in changed}
+            assets = [p for p in removed if self.is_asset_path(p)]
+
+        def added() -> Generator[tuple[str, dict | None], None, None]:
+            excluded = PSEUDO_KEYS + RESERVED_KEYS
+            for p, content in self.read_asset_contents(assets):
+                try:
+                    a = self.get_asset_content(p, content=content)
+                except NotAnAssetError:
+                    # recorded as unparsable, to be reported when reading the asset
+                    yield p.relative_to(self.git.root).as_posix(), None
+                    continue
+                yield p.relative_to(self.git.root).as_posix(), {k: v for k, v in a.items() if k not in excluded}
+
+        index.update({'commit': head},
+                     removed=(p.relative_to(self.git.root).as_posix() for p in removed),
+                     added=added(),
+                     full=changed is None)
+
     def get_asset_content(self,
-                          path: Path) -> dict:
+                          path: Path,
+                          content: dict | str | None = None) -> dict:
         r"""Get a dictionary representing `path`'s content.
 
         Parameters
@@ -610,6 +1044,11 @@ class OnyoRepo(object):
           Asset path to load. This is expected to be either a YAML file
           or an asset directory (`OnyoRepo.ASSET_DIR_FILE_NAME`
           automatically appended).
+        content
+          The already read content of the asset's file (see
+          `OnyoRepo.read_asset_files()`), or its already parsed content (see
+          `OnyoRepo.read_asset_contents()`). If not given, the file is read
+          from the worktree.
 
         Returns
         -------
@@ -622,10 +1061,11 @@ class OnyoRepo(object):
         try:
             if self.is_inventory_dir(path):
                 # It's an asset and an inventory dir -> asset dir
-                a = get_asset_content(path / self.ASSET_DIR_FILE_NAME)
+                a = content if isinstance(content, dict) else \
+                    get_asset_content(path / self.ASSET_DIR_FILE_NAME, content=content)
                 a['is_asset_directory'] = True
             else:
-                a = get_asset_content(path)
+                a = content if isinstance(content, dict) else get_asset_content(path, content=content)
                 a['is_asset_directory'] = False
         except NotAnAssetError as e:
             raise NotAnAssetError(f"{str(e)}{os.linesep}"
@@ -0,0 +1,66 @@
+import pytest
+
+from onyo.lib.aggregations import Aggregation, aggregate
+from onyo.lib.consts import UNSET_VALUE
+from onyo.lib.exceptions import OnyoInvalidAggregationError
+
+
+@pytest.mark.parametrize('arg, function, key, name', [
+    ('count', 'count', None, 'count'),
+    ('count(make)', 'count', 'make', 'count(make)'),
+    (' sum( display ) ', 'sum', 'display', 'sum(display)'),
+    ('mean(purchase date)', 'mean', 'purchase date', 'mean(purchase date)'),
+])
+def test_aggregation(arg: str, function: str, key: str | None, name: str) -> None:
+    agg = Aggregation(arg)
+    assert agg.function == function
+    assert agg.key == key
+    assert agg.name == name
+
+
+@pytest.mark.parametrize('arg', ['', 'sum', 'median(display)', 'sum()', 'count(', 'sum(a)b', 1])
+def test_aggregation_invalid(arg) -> None:
+    with pytest.raises(OnyoInvalidAggregationError):
+        Aggregation(arg)
+
+
+def test_aggregate() -> None:
+    assets = [dict(type='monitor', make='dell', display=24),
+              dict(type='monitor', make='dell', display='27.5'),
+              dict(type='monitor', make='eizo', display='unknown'),
+              dict(type='laptop', make='dell', display=True),
+              dict(type='laptop', tags=['a', 'b'], display=None),
+              dict(type='laptop', tags=['a', 'b'])]
+    aggregations = [Aggregation(a)
+                    for a in ['count', 'count(display)', 'sum(display)', 'min(display)', 'max(display)',
+                              'mean(display)']]
+
+    # single group
+    assert aggregate(assets, group_by=[], aggregations=aggregations) == [
+        {'count': 6, 'count(display)': 4, 'sum(display)': 51.5, 'min(display)': 24, 'max(display)': 27.5,
+         'mean(display)': 25.75}]
+    assert aggregate([], group_by=[], aggregations=aggregations[:3]) == [
+        {'count': 0, 'count(display)': 0, 'sum(display)': 0}]
+
+    # groups in order of appearance; missing keys and unhashable values are grouped, too
+    assert aggregate(iter(assets), group_by=['type', 'make'], aggregations=aggregations[:1] + aggregations[5:]) == [
+        {'type': 'monitor', 'make': 'dell', 'count': 2, 'mean(display)': 25.75},
+        {'type': 'monitor', 'make': 'eizo', 'count': 1, 'mean(display)': UNSET_VALUE},
+        {'type': 'laptop', 'make': 'dell', 'count': 1, 'mean(display)': UNSET_VALUE},
+        {'type': 'laptop', 'make': UNSET_VALUE, 'count': 2, 'mean(display)': UNSET_VALUE}]
+    assert aggregate(assets, group_by=['tags'], aggregations=aggregations[:1]) == [
+        {'tags': UNSET_VALUE, 'count': 4},
+        {'tags': ['a', 'b'], 'count': 2}]
+    # keys set to None are grouped with missing keys
+    assert aggregate([dict(make=None), dict(), dict(make='dell')], group_by=['make'], aggregations=aggregations[:1]) == [
+        {'make': UNSET_VALUE, 'count': 2},
+        {'make': 'dell', 'count': 1}]
+    # non-finite values aren't numbers
+    assets = [dict(v=v) for v in [1, 'nan', 'inf', 'Infinity', float('-inf'), float('nan'), '2']]
+    assert aggregate(assets, group_by=[], aggregations=aggregations[:1] + [
+        Aggregation(f'{f}(v)') for f in ['count', 'sum', 'min', 'max', 'mean']]) == [
+        {'count': 7, 'count(v)': 7, 'sum(v)': 3, 'min(v)': 1, 'max(v)': 2, 'mean(v)': 1.5}]
+    # equal values of different types aren't merged
+    assert aggregate([dict(v=1), dict(v=True), dict(v=1)], group_by=['v'], aggregations=aggregations[:1]) == [
+        {'v': 1, 'count': 2},
+        {'v': True, 'count': 1}]
@@ -92,9 +92,11 @@ def test_filter_match_type(filt: str) -> None:
 
 def test_filter_re_match() -> None:
     """Test filtering by regular expression"""
-    assert not Filter._re_match(text='foo(', r='foo(')
-    assert Filter._re_match(text='foo', r='foo')
-    assert Filter._re_match(text='foobar', r='foo.*')
+    # invalid expressions match literally only
+    assert Filter('key=foo(').match(dict(key='foo('))
+    assert not Filter('key=fo+(').match(dict(key='foo('))
+    assert Filter('key=foo').match(dict(key='foo'))
+    assert Filter('key=foo.*').match(dict(key='foobar'))
 
 
 @pytest.mark.parametrize('filter_arg', [
@@ -111,5 +113,155 @@ def test_filter_invalid(filter_arg: str) -> None:
 def test_filter_format() -> None:
     """Test whether the input argument 'key=value' is properly formatted into
     the `key` and `value` properties"""
-    assert Filter._format('key=value') == ['key', 'value']
-    assert Filter._format('key=value=value') == ['key', 'value=value']
+    assert Filter._format('key=value') == ['key', '=', 'value']
+    assert Filter._format('key=value=value') == ['key', '=', 'value=value']
+    assert Filter._format('key!=value') == ['key', '!=', 'value']
+    assert Filter._format('key<=value') == ['key', '<=', 'value']
+    assert Filter._format('key>value') == ['key', '>', 'value']
+    assert Filter._format('key=a<b') == ['key', '=', 'a<b']
+    assert Filter._format('key in a,b') == ['key', 'in', 'a,b']
+    assert Filter._format('key=a in b') == ['key', '=', 'a in b']
+    # the first `=` decides, so that keys may contain other operators
+    assert Filter._format('a~b=c') == ['a~b', '=', 'c']
+    assert Filter._format('a<b=c') == ['a<b', '=', 'c']
+    assert Filter._format('a in b=c') == ['a in b', '=', 'c']
+    assert Filter._format('a>b>=c') == ['a>b', '>=', 'c']
+    assert Filter._format('a<b<c') == ['a', '<', 'b<c']
+    assert Filter._format('a~b<c') == ['a', '~', 'b<c']
+    assert Filter._format('=value') == ['', '=', 'value']
+
+
+@pytest.mark.parametrize('filter_arg, exact', [
+    ('serial=ABC-123', True), ('key=some value', True), ('key=', True),
+    ('key=foo.*', False), ('key=a|b', False), ('key=(x)', False),
+    ('key=<unset>', False), ('key=<list>', False), ('key=<dict>', False)])
+def test_filter_is_exact(filter_arg: str, exact: bool) -> None:
+    """Test which filters match only values equal to their value"""
+    f = Filter(filter_arg)
+    assert f.is_exact == exact
+    if exact:
+        # an exact filter matches the string representation of a value only
+        assert f({'key': f.value, 'serial': f.value})
+        assert not f({'key': f.value + 'x', 'serial': f.value + 'x'})
+
+
+@pytest.mark.parametrize('filter_arg, matches', [
+    ('display>14', ['num', 'float', 'str_num']),
+    ('display>=24', ['num', 'str_num']),
+    ('display<24.5', ['num', 'float']),
+    ('display<=14.5', ['float']),
+    ('display!=24', ['float', 'str_num', 'str', 'missing', 'list', 'date', 'datetime', 'str_date', 'bool']),
+    ('display!=<unset>', ['num', 'float', 'str_num', 'str', 'list', 'bool']),
+    ('display in 24,14.5', ['num', 'float']),
+    ('display in 24.0, 25', ['num', 'str_num']),
+    ('display in abc', []),
+    ('purchased<2020-01-01', ['date', 'str_date']),
+    ('purchased>=2020-01-01', ['datetime']),
+    ('purchased>2019-12-31T12:00', ['datetime', 'str_date']),
+])
+def test_filter_operators(filter_arg: str, matches: list[str]) -> None:
+    """Test the typed comparison operators"""
+    from datetime import date, datetime
+
+    assets = {'num': dict(display=24),
+              'float': dict(display=14.5),
+              'str_num': dict(display='25'),
+              'str': dict(display='big'),
+              'missing': dict(),
+              'list': dict(display=[24]),
+              'date': dict(purchased=date(2019, 5, 1)),
+              'datetime': dict(purchased=datetime(2020, 1, 1, 10, 30)),
+              'str_date': dict(purchased='2019-12-31T23:59'),
+              'bool': dict(purchased=True, display=True)}
+    f = Filter(filter_arg)
+    assert [name for name, asset in assets.items() if f(asset)] == matches
+
+
+@pytest.mark.parametrize('filter_arg', ['display>big', 'purchased<=2020-13-01', 'a<', 'display<inf', 'display>nan'])
+def test_filter_operators_invalid(filter_arg: str) -> None:
+    """Comparisons require a number or date"""
+    with pytest.raises(OnyoInvalidFilterError, match="numeric or date value"):
+        Filter(filter_arg)
+
+
+def test_filter_operators_not_finite() -> None:
+    """Non-finite values aren't numbers"""
+    assets = [dict(display=v) for v in ['nan', 'inf', '-Infinity', float('inf'), float('nan'), '1e999', '12']]
+    assert [a['display'] for a in assets if Filter('display>10')(a)] == ['12']
+    assert [a['display'] for a in assets if Filter('display<10')(a)] == []
+    # (`in` still matches their string representation)
+    assert [a['display'] for a in assets if Filter('display in inf,12')(a)] == ['inf', float('inf'), '12']
+
+
+def test_filter_cost() -> None:
+    """Exact filters are cheaper than comparisons, negations, and regular expressions"""
+    filters = [Filter(f) for f in ['a=.*', 'a!=b', 'a>1', 'a in b,c', 'a=<unset>', 'a=b']]
+    assert [f._arg for f in sorted(filters, key=lambda f: f.cost)] == \
+        ['a=<unset>', 'a=b', 'a in b,c', 'a>1', 'a!=b', 'a=.*']
+    assert not Filter('a!=b').is_exact
+
+
+def test_query_parse() -> None:
+    """Test parsing of boolean query expressions"""
+    from onyo.lib.filters import Query
+
+    q = Query.parse('type=laptop and (make=apple or make=lenovo) and not path~/retired/')
+    assert q.operator == 'and'
+    # operands are ordered by cost
+    assert q.operands[0] == Filter('type=laptop')
+    assert q.operands[1] == Query('or', [Filter('make=apple'), Filter('make=lenovo')])
+    assert q.operands[2] == Query('not', [Filter('path~/retired/')])
+    assert list(q.filters) == [Filter('type=laptop'), Filter('make=apple'), Filter('make=lenovo'),
+                               Filter('path~/retired/')]
+
+    # precedence: not > and > or
+    assert Query.parse('a=1 or b=2 and not c=3') == \
+        Query('or', [Filter('a=1'), Query('and', [Filter('b=2'), Query('not', [Filter('c=3')])])])
+    # a single filter is a query, too
+    assert Query.parse('a=1') == Query('and', [Filter('a=1')])
+    # parentheses within filters, quotes, and `in`
+    assert Query.parse('(model=(a|b))') == Query('and', [Filter('model=(a|b)')])
+    assert Query.parse('"model=Think Pad" or model=\'x and y\'') == \
+        Query('or', [Filter('model=Think Pad'), Filter('model=x and y')])
+    assert Query.parse('make in apple,dell and not serial=1') == \
+        Query('and', [Filter('make in apple,dell'), Query('not', [Filter('serial=1')])])
+    # keywords can be quoted
+    assert Query.parse('"a=and"') == Query('and', [Filter('a=and')])
+
+
+@pytest.mark.parametrize('expression', [
+    '', 'a=1 and', 'and a=1', '(a=1', 'a=1)', 'a=1 b=2', 'not', 'a=1 or (b=2', '"a=1', 'a', 'a~(', 'in',
+    'a=1 and ()'])
+def test_query_parse_invalid(expression: str) -> None:
+    """Invalid expressions raise the expected exception"""
+    from onyo.lib.filters import Query
+
+    with pytest.raises(OnyoInvalidFilterError):
+        Query.parse(expression)
+
+
+def test_query_match() -> None:
+    """Test matching and partial evaluation of queries"""
+    from onyo.lib.filters import Query
+
+    q = Query.parse('type=laptop and (make=apple or make=lenovo) and not path~/retired/')
+    assert q(dict(type='laptop', make='apple', path='/a/b'))
+    assert q(dict(type='laptop', make='lenovo', path='/retired2/b'))
+    assert not q(dict(type='laptop', make='lenovo', path='/a/retired/b'))
+    assert not q(dict(type='laptop', make='dell', path='/a/b'))
+    assert not q(dict(type='monitor', make='apple', path='/a/b'))
+    assert list(filter(q, [dict(type='laptop', make='apple', path='/x'), dict()])) == \
+        [dict(type='laptop', make='apple', path='/x')]
+
+    # decide from known keys only
+    assert q.evaluate(dict(path='/a/retired/b'), ['path']) is False
+    assert q.evaluate(dict(path='/a/b'), ['path']) is None
+    assert q.evaluate(dict(type='laptop', make='apple', path='/a/b'), ['type', 'make', 'path']) is True
+    q = Query.parse('path~/retired/ or type=laptop')
+    assert q.evaluate(dict(path='/a/retired/b'), ['path']) is True
+    assert q.evaluate(dict(path='/a/b'), ['path']) is None
+    q = Query('and', [Filter('path~/a/'), lambda a: True])
+    assert q.evaluate(dict(path='/a/b'), ['path']) is None
+    assert q.evaluate(dict(path='/b'), ['path']) is False
+    assert Query('and', []).evaluate(dict(), []) is True
+    assert Query('and', [])(dict())
@@ -0,0 +1,349 @@
+from pathlib import Path
+
+import pytest
+from ruamel.yaml import CommentedMap  # pyre-ignore[21]
+
+from onyo.lib.cache import AssetCache, KeyIndex
+from onyo.lib.exceptions import NotAnAssetError
+from onyo.lib.filters import Filter, Query
+from onyo.lib.inventory import Inventory
+
+
+def test_AssetCache(tmp_path: Path) -> None:
+    db_file = tmp_path / 'sub' / 'assets.sqlite'
+    cache = AssetCache(db_file, max_size=1024 * 1024)
+    assert cache.lookup(['a' * 40]) == dict()
+
+    # added entries are available right away and persisted on flush
+    cache.add('a' * 40, dict(key='value'))
+    assert cache.decode(cache.lookup(['a' * 40])['a' * 40]) == dict(key='value')
+    cache.close()
+    assert db_file.exists()
+    cache = AssetCache(db_file, max_size=1024 * 1024)
+    assert cache.decode(cache.lookup(['a' * 40, 'b' * 40])['a' * 40]) == dict(key='value')
+    assert cache.status()['entries'] == 1
+
+    cache.clear()
+    assert cache.lookup(['a' * 40]) == dict()
+    assert cache.status() == dict(entries=0, size=0, max_size=1024 * 1024)
+
+
+def test_AssetCache_encoding(tmp_path: Path) -> None:
+    import json
+    import sqlite3
+    from datetime import date, datetime, timezone
+
+    cache = AssetCache(tmp_path / 'assets.sqlite', max_size=1024 * 1024)
+    content = dict(str='value', int=1, float=1.5, inf=float('inf'), bool=True, none=None,
+                   list=[1, 'a', [date(2024, 1, 2)]],
+                   dict=dict(a=dict(b=None)),
+                   date=date(2024, 1, 2),
+                   datetime=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+    cache.add('a' * 40, content)
+    cache.flush()
+    cache.close()
+    # stored as JSON
+    data, = sqlite3.connect(tmp_path / 'assets.sqlite').execute("SELECT content FROM assets").fetchone()
+    assert json.loads(data)['str'] == 'value'
+    cache = AssetCache(tmp_path / 'assets.sqlite', max_size=1024 * 1024)
+    decoded = cache.decode(cache.lookup(['a' * 40])['a' * 40])
+    assert decoded == content
+    assert all(type(decoded[k]) is type(v) for k, v in content.items())
+
+    # content JSON can't represent exactly is not cached
+    for i, uncacheable in enumerate([{1: 'int key'}, dict(set={1, 2}), dict(bytes=b'x'), dict(tuple=(1, 2)),
+                                     CommentedMap(key='value'), dict(nested=[{None: 1}]), {'\0date': '2024-01-02'}]):
+        cache.add(f'{i:040}', uncacheable)
+        assert cache.lookup([f'{i:040}']) == dict()
+
+
+def test_AssetCache_eviction(tmp_path: Path) -> None:
+    content = dict(key='x' * 1000)
+    cache = AssetCache(tmp_path / 'assets.sqlite', max_size=10 * 1024)
+    for i in range(5):
+        cache.add(f'{i:040}', content)
+    cache.flush()
+    # use the oldest entry, so it is not evicted
+    assert f'{0:040}' in cache.lookup([f'{0:040}'])
+    cache.flush()
+    for i in range(5, 15):
+        cache.add(f'{i:040}', content)
+        cache.flush()
+    status = cache.status()
+    assert status['size'] <= 10 * 1024
+    assert 0 < status['entries'] < 15
+    # most recently added and used entries are kept
+    assert f'{14:040}' in cache.lookup([f'{14:040}'])
+    assert f'{1:040}' not in cache.lookup([f'{1:040}'])
+
+
+def test_AssetCache_invalid(tmp_path: Path) -> None:
+    db_file = tmp_path / 'assets.sqlite'
+    db_file.write_text("not a database")
+    cache = AssetCache(db_file, max_size=1024)
+    # errors disable the cache rather than being raised
+    cache.add('a' * 40, dict(key='value'))
+    cache.flush()
+    assert cache.lookup(['a' * 40]) == dict()
+    assert cache.status()['entries'] == 0
+
+
+def test_get_assets_cached(inventory: Inventory, monkeypatch: pytest.MonkeyPatch) -> None:
+    assets = list(inventory.get_assets())
+    assert inventory.repo.asset_cache.status()['entries'] == len(assets)
+
+    # Assets are not parsed again ...
+    import onyo.lib.onyo
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Unexpected parsing of asset")
+    monkeypatch.setattr(onyo.lib.onyo, 'get_asset_content', fail)
+    assert list(inventory.get_assets()) == assets
+    # ... not even by another process.
+    assert list(Inventory(type(inventory.repo)(inventory.root)).get_assets()) == assets
+
+    # The cache can be disabled
+    monkeypatch.undo()
+    inventory.repo.set_config('onyo.cache.size', '0', location='local')
+    repo = type(inventory.repo)(inventory.root)
+    assert repo.asset_cache is None
+    assert list(Inventory(repo).get_assets()) == assets
+
+
+def test_KeyIndex(tmp_path: Path) -> None:
+    index = KeyIndex(tmp_path / 'sub' / 'keys.sqlite')
+    assert index.get_meta('commit') is None
+    index.update({'commit': 'a' * 40},
+                 removed=[],
+                 added=[('one', dict(serial='1', num=1, none=None, list=[1], dict=dict(a=1))),
+                        ('two', dict(serial='2', num=1))],
+                 full=True)
+    assert index.get_meta('commit') == 'a' * 40
+    assert index.lookup('serial', '1') == {'one'}
+    assert index.lookup('num', '1') == {'one', 'two'}
+    assert index.lookup('none', 'None') == {'one'}
+    # lists and dicts are not indexed
+    assert index.lookup('list', '[1]') == set()
+    assert index.lookup('dict', "{'a': 1}") == set()
+
+    # incremental update replaces only the given assets
+    index.update({'commit': 'b' * 40},
+                 removed=['one', 'two'],
+                 added=[('two', dict(serial='3', num=1))])
+    index.close()
+    index = KeyIndex(tmp_path / 'sub' / 'keys.sqlite')
+    assert index.get_meta('commit') == 'b' * 40
+    assert index.lookup('serial', '1') == set()
+    assert index.lookup('serial', '3') == {'two'}
+    assert index.lookup('num', '1') == {'two'}
+
+    # unparsable assets are recorded, and removed like any other
+    assert index.unparsable() == set()
+    index.update({'commit': 'c' * 40},
+                 removed=['three', 'four'],
+                 added=[('three', None), ('four', None)])
+    assert index.unparsable() == {'three', 'four'}
+    assert index.lookup('serial', '3') == {'two'}
+    index.update({'commit': 'd' * 40},
+                 removed=['three'],
+                 added=[('three', dict(serial='3'))])
+    assert index.unparsable() == {'four'}
+    assert index.lookup('serial', '3') == {'two', 'three'}
+    index.update({'commit': 'e' * 40}, removed=[], added=[], full=True)
+    assert index.unparsable() == set()
+
+
+def test_get_assets_by_query_indexed(inventory: Inventory, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = inventory.root
+    for i in range(5):
+        inventory.add_asset(dict(type="laptop", make="apple", model="mbp", serial=str(i),
+                                 parity=i % 2, directory=root / 'laptops'))
+    inventory.commit("Add laptops")
+
+    def query(*filters: str) -> list[dict]:
+        return list(inventory.get_assets_by_query(match=[Filter(f) for f in filters]))
+
+    expected = {f: query(f) for f in ['serial=3', 'parity=1', 'serial=3|4', 'path=laptops']}
+    assert [a['serial'] for a in expected['serial=3']] == ['3']
+
+    inventory.repo.set_config('onyo.cache.index', 'true', location='local')
+    inventory.repo.clear_cache()
+    read = []
+    read_asset_contents = inventory.repo.read_asset_contents
+
+    def record(paths, jobs=None):
+        paths = list(paths)
+        read.extend(paths)
+        return read_asset_contents(paths, jobs=jobs)
+    monkeypatch.setattr(inventory.repo, 'read_asset_contents', record)
+
+    # first use builds the index from all assets
+    assert query('serial=3') == expected['serial=3']
+    assert len(read) == len(inventory.repo.asset_paths) + 1
+    read.clear()
+    assert query('serial=3') == expected['serial=3']
+    assert read == [root / 'laptops' / 'laptop_apple_mbp.3']
+    read.clear()
+    assert query('parity=1', 'type=laptop') == expected['parity=1']
+    assert len(read) == 2
+    read.clear()
+    # not exact filters are not looked up
+    assert query('serial=3|4') == expected['serial=3|4']
+    assert len(read) == len(inventory.repo.asset_paths)
+    read.clear()
+    # (pseudo-keys are decided without reading at all)
+    assert query('path=laptops') == expected['path=laptops']
+    assert read == []
+    read.clear()
+    assert query('serial=none') == []
+    assert read == []
+    # query trees: `or` unites and `and` intersects the candidates, `not` doesn't restrict them
+    for expression, serials, reads in [('serial=3 or serial=4', ['3', '4'], 2),
+                                       ('parity=1 and not serial=3', ['1'], 2),
+                                       ('serial=3 or (parity=0 and type=laptop)', ['0', '2', '3', '4'], 4),
+                                       ('serial=3 or serial=4|5', ['3', '4'], len(inventory.repo.asset_paths)),
+                                       ('not serial=3', ['0', '1', '2', '4'], len(inventory.repo.asset_paths))]:
+        read.clear()
+        results = list(inventory.get_assets_by_query(match=[Query.parse(expression)]))
+        assert [a.get('serial') for a in results if a['type'] == 'laptop'] == serials
+        assert len(read) == reads
+    read.clear()
+
+    # the index is updated from the changes of new commits only
+    asset = inventory.get_asset(root / 'laptops' / 'laptop_apple_mbp.3')
+    new_asset = {k: v for k, v in asset.items() if k not in ['path', 'directory', 'is_asset_directory']}
+    new_asset['parity'] = 0
+    inventory.modify_asset(asset, new_asset)
+    inventory.remove_asset(inventory.get_asset(root / 'laptops' / 'laptop_apple_mbp.1'))
+    inventory.commit("Modify laptops")
+    read.clear()
+    assert query('parity=1') == []
+    assert read == [root / 'laptops' / 'laptop_apple_mbp.3']
+    read.clear()
+    assert [a['serial'] for a in query('parity=0', 'type=laptop')] == ['0', '2', '3', '4']
+
+    # the index is rebuilt, if the indexed commit is unknown
+    index = inventory.repo.get_key_index()
+    index.update({'commit': 'f' * 40}, removed=[], added=[], full=True)
+    read.clear()
+    assert [a['serial'] for a in query('parity=0', 'type=laptop')] == ['0', '2', '3', '4']
+    assert index.get_meta('commit') == inventory.repo.git.get_head()
+
+
+def test_get_assets_by_query_indexed_unparsable(inventory: Inventory, monkeypatch: pytest.MonkeyPatch) -> None:
+    from onyo.lib.ui import ui
+
+    for i in range(3):
+        inventory.add_asset(dict(type="laptop", make="apple", model="mbp", serial=str(i),
+                                 directory=inventory.root / 'laptops'))
+    inventory.commit("Add laptops")
+    invalid = inventory.root / 'laptops' / 'laptop_apple_mbp.2'
+    invalid.write_text("key: [invalid")
+    inventory.repo.commit(invalid, "Break an asset")
+
+    errors = []
+    monkeypatch.setattr(ui, 'error', lambda e, end=None: errors.append(e))
+
+    def query() -> list[str]:
+        return [a['serial'] for a in inventory.get_assets_by_query(match=[Filter('serial=1')])]
+
+    # unparsable assets are reported the same with and without the index
+    assert query() == ['1']
+    assert len(errors) == 1 and isinstance(errors[0], NotAnAssetError)
+    inventory.repo.set_config('onyo.cache.index', 'true', location='local')
+    inventory.repo.clear_cache()
+    for _ in range(2):
+        # building and using the index
+        errors.clear()
+        assert query() == ['1']
+        assert len(errors) == 1 and isinstance(errors[0], NotAnAssetError)
+        assert str(invalid) in str(errors[0])
+
+    # fixed assets are not reported anymore
+    invalid.write_text("type: laptop\nmake: apple\nmodel: mbp\nserial: 2\n")
+    inventory.repo.commit(invalid, "Fix an asset")
+    errors.clear()
+    assert query() == ['1']
+    assert errors == []
+    assert inventory.repo.get_key_index().unparsable() == set()
+
+
+@pytest.mark.parametrize('cache_size', ['256', '0'])
+def test_get_assets_read_only(inventory: Inventory, cache_size: str) -> None:
+    inventory.repo.set_config('onyo.cache.size', cache_size, location='local')
+    asset_file = inventory.root / 'somewhere' / 'nested' / 'TYPE_MAKER_MODEL.SERIAL'
+    asset_file.write_text(asset_file.read_text() + "comment: value  # comment\n")
+    inventory.repo.commit(asset_file, "Add a comment")
+
+    # assets are read as plain dictionaries ...
+    asset, = list(Inventory(type(inventory.repo)(inventory.root)).get_assets())
+    assert type(asset) is dict
+    assert asset['other'] == 1
+    assert asset['comment'] == 'value'
+    # ... unless they are to be modified
+    asset = inventory.get_asset(asset_file)
+    assert isinstance(asset, CommentedMap)
+    assert 'comment' in asset.ca.items
+
+    # content the safe loader can't represent is still read
+    asset_file.write_text(asset_file.read_text() + "tagged: !custom value\n")
+    inventory.repo.commit(asset_file, "Add a tagged value")
+    asset, = list(Inventory(type(inventory.repo)(inventory.root)).get_assets())
+    assert str(asset['tagged']) == 'value'
+
+
+@pytest.mark.parametrize('cache_size', ['256', '0'])
+def test_get_assets_parallel(inventory: Inventory, monkeypatch: pytest.MonkeyPatch, cache_size: str) -> None:
+    import concurrent.futures
+
+    inventory.repo.set_config('onyo.cache.size', cache_size, location='local')
+    for i in range(40):
+        inventory.add_asset(dict(type="laptop", make="apple", model="mbp", serial=str(i),
+                                 directory=inventory.root / 'laptops'))
+    inventory.commit("Add laptops")
+    invalid = inventory.root / 'laptops' / 'laptop_apple_mbp.7'
+    invalid.write_text("key: [invalid")
+    inventory.repo.commit(invalid, "Break an asset")
+
+    expected = list(Inventory(type(inventory.repo)(inventory.root)).get_assets(jobs=1))
+    assert len(expected) == 40
+
+    pools = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs)
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', RecordingPool)
+
+    # with an empty asset cache, assets are parsed in parallel, in order
+    inventory.repo.set_config('onyo.core.jobs', '2', location='local')
+    repo = type(inventory.repo)(inventory.root)
+    if repo.asset_cache:
+        repo.asset_cache.clear()
+    assert list(Inventory(repo).get_assets()) == expected
+    assert pools == [dict(max_workers=2)]
+    # invalid assets are still reported
+    pytest.raises(NotAnAssetError, repo.get_asset_content, invalid,
+                  dict(repo.read_asset_contents([invalid], jobs=2))[invalid])
+
+    # few files are not worth starting processes for
+    pools.clear()
+    assert list(Inventory(repo).get_assets(include=[inventory.root / 'somewhere'], jobs=2)) == \
+        [a for a in expected if a['type'] == 'TYPE']
+    assert pools == []
+
+
+def test_get_jobs(inventory: Inventory) -> None:
+    import os
+
+    repo = inventory.repo
+    assert repo.get_jobs() == 1
+    assert repo.get_jobs(3) == 3
+    assert repo.get_jobs(0) == (os.cpu_count() or 1)
+    pytest.raises(ValueError, repo.get_jobs, -1)
+    repo.set_config('onyo.core.jobs', '4', location='local')
+    assert repo.get_jobs() == 4
+    assert repo.get_jobs(2) == 2
+    repo.set_config('onyo.core.jobs', 'many', location='local')
+    pytest.raises(ValueError, repo.get_jobs)
@@ -150,3 +150,84 @@ def test_onyo_cat_asset_dir(inventory: Inventory,
     assert inventory.repo.is_asset_dir(asset_dir)
     onyo_cat(inventory, [asset_dir])
     assert "some_key: some_value" in capsys.readouterr().out
+
+
+@pytest.mark.ui({'yes': True})
+def test_onyo_cat_rev(inventory: Inventory,
+                      capsys) -> None:
+    r"""`onyo_cat()` prints assets as they were in a given commit."""
+    asset_path = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    old_content = asset_path.read_text()
+
+    asset_path.write_text(old_content.replace("some_value", "new_value"))
+    inventory.repo.git.commit(asset_path, "modify asset")
+    inventory.repo.clear_cache()
+    inventory.add_asset(dict(type="TYPE",
+                             make="MAKER",
+                             model="MODEL",
+                             serial="SERIAL2",
+                             directory=inventory.root,
+                             is_asset_directory=True)
+                        )
+    asset_dir = inventory.root / "TYPE_MAKER_MODEL.SERIAL2"
+    inventory.commit("add an asset dir")
+    new_content = asset_path.read_text()
+    assert new_content != old_content
+
+    onyo_cat(inventory, [asset_path], rev='HEAD~2')
+    assert capsys.readouterr().out == old_content
+    onyo_cat(inventory, [asset_path, asset_dir], rev='HEAD')
+    output = capsys.readouterr().out
+    assert output.startswith(new_content)
+    assert "SERIAL2" in output
+
+    # the asset dir didn't exist before
+    pytest.raises(ValueError, onyo_cat, inventory, [asset_dir], rev='HEAD~2')
+    assert not capsys.readouterr().out
+    # unknown commit
+    pytest.raises(ValueError, onyo_cat, inventory, [asset_path], rev='doesnotexist')
+
+    # invalid contents are printed and reported
+    asset_path.write_text("type: [invalid\n")
+    inventory.repo.git.commit(asset_path, "invalid YAML")
+    inventory.repo.clear_cache()
+    pytest.raises(OnyoInvalidRepoError, onyo_cat, inventory, [asset_path])
+    assert capsys.readouterr().out == "type: [invalid\n"
+    onyo_cat(inventory, [asset_path], rev='HEAD~1')
+    assert capsys.readouterr().out == new_content
+
+
+@pytest.mark.ui({'yes': True})
+def test_onyo_cat_rev_tree(inventory: Inventory,
+                           capsys) -> None:
+    r"""`onyo_cat()` decides what's an asset from the tree of the given commit, not the worktree."""
+    asset_path = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    content = asset_path.read_text()
+    ignore_file = inventory.root / "somewhere" / OnyoRepo.IGNORE_FILE_NAME
+    other = inventory.root / "somewhere" / "other"
+    other.write_text("key: value\n")
+    inventory.repo.git.commit(other, "add a file")
+    inventory.repo.clear_cache()
+
+    # ignored in the worktree, but not in HEAD~1
+    ignore_file.write_text("nested/\nother\n")
+    inventory.repo.git.commit(ignore_file, "ignore assets")
+    inventory.repo.clear_cache()
+    assert not inventory.repo.is_asset_path(asset_path)
+    pytest.raises(ValueError, onyo_cat, inventory, [asset_path])
+    pytest.raises(ValueError, onyo_cat, inventory, [other], rev='HEAD')
+    onyo_cat(inventory, [asset_path, other], rev='HEAD~1')
+    assert capsys.readouterr().out == content + "key: value\n"
+
+    # not ignored in the worktree, but in HEAD~1; removed from the worktree
+    ignore_file.unlink()
+    other.unlink()
+    inventory.repo.git.commit([ignore_file, other], "unignore assets, remove a file")
+    inventory.repo.clear_cache()
+    assert inventory.repo.is_asset_path(asset_path)
+    onyo_cat(inventory, [asset_path])
+    assert capsys.readouterr().out == content
+    pytest.raises(ValueError, onyo_cat, inventory, [asset_path], rev='HEAD~1')
+    pytest.raises(ValueError, onyo_cat, inventory, [other], rev='HEAD~1')
+    onyo_cat(inventory, [other], rev='HEAD~2')
+    assert capsys.readouterr().out == "key: value\n"
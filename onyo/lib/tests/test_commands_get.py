@@ -2,10 +2,11 @@ from pathlib import Path
 
 import pytest
 
-from onyo.lib.filters import Filter
+from onyo.lib.exceptions import OnyoRepoError, PendingInventoryOperationError
+from onyo.lib.filters import Filter, Query
 from onyo.lib.inventory import Inventory
 from onyo.lib.onyo import OnyoRepo
-from ..commands import onyo_get
+from ..commands import onyo_get, query_assets, summarize_assets
 
 
 @pytest.mark.ui({'yes': True})
@@ -49,6 +50,46 @@ def test_onyo_get_errors(inventory: Inventory) -> None:
                   include=[inventory.root / ".onyo"])
 
 
+def test_query_inventory_state(inventory: Inventory) -> None:
+    r"""The query APIs must raise on an unclean worktree or pending operations."""
+
+    (inventory.root / "untracked").touch()
+    for func in [onyo_get, query_assets, summarize_assets]:
+        pytest.raises(OnyoRepoError, func, inventory)
+    (inventory.root / "untracked").unlink()
+
+    inventory.add_directory(inventory.root / "new_dir")
+    for func in [onyo_get, query_assets, summarize_assets]:
+        pytest.raises(PendingInventoryOperationError, func, inventory)
+
+
+@pytest.mark.ui({'yes': True})
+def test_onyo_get_results(inventory: Inventory,
+                          monkeypatch: pytest.MonkeyPatch,
+                          capsys) -> None:
+    r"""`onyo_get()` returns the printed results, checking the inventory state once."""
+    checks = []
+    is_clean_worktree = inventory.repo.git.is_clean_worktree
+
+    def record() -> bool:
+        checks.append(True)
+        return is_clean_worktree()
+    monkeypatch.setattr(inventory.repo.git, 'is_clean_worktree', record)
+
+    expected = list(query_assets(inventory, keys=['type', 'path']))
+    assert len(expected) == 1
+    checks.clear()
+    for output_format in ['table', 'tsv', 'json']:
+        assert onyo_get(inventory, keys=['type', 'path'], output_format=output_format) == expected
+        assert len(checks) == 1
+        checks.clear()
+    assert onyo_get(inventory, keys=['type', 'path'], return_results=False) is None
+    checks.clear()
+    assert onyo_get(inventory, group_by=['type']) == [{'type': 'TYPE', 'count': 1}]
+    assert len(checks) == 1
+    capsys.readouterr()
+
+
 @pytest.mark.repo_contents(
     ["one_that_exists.test", "type: one\nmake: that\nmodel: exists\nserial: test\nempty_key: ''"])
 @pytest.mark.ui({'yes': True})
@@ -434,3 +475,91 @@ def test_onyo_get_is_asset_dir(inventory: Inventory,
                                capsys) -> None:
     onyo_get(inventory, keys=["path", "is_asset_directory"])
     assert str(False) in capsys.readouterr().out
+
+
+def test_onyo_get_without_content(inventory: Inventory,
+                                  monkeypatch: pytest.MonkeyPatch) -> None:
+    inventory.add_asset(dict(type="TYPE", make="MAKER", model="MODEL", serial="SERIAL2", other=2,
+                             directory=inventory.root / "different", is_asset_directory=True))
+    inventory.commit("add an asset dir")
+    asset = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    asset_dir = inventory.root / "different" / "TYPE_MAKER_MODEL.SERIAL2"
+    read = []
+    read_asset_contents = inventory.repo.read_asset_contents
+
+    def record(paths, jobs=None):
+        paths = list(paths)
+        read.extend(paths)
+        return read_asset_contents(paths, jobs=jobs)
+    monkeypatch.setattr(inventory.repo, 'read_asset_contents', record)
+
+    # only path-derived keys and filters: no content is read
+    results = list(query_assets(inventory, keys=["path", "directory", "is_asset_directory"],
+                                sort={"directory": "descending"}))
+    assert results == [{'path': asset.relative_to(inventory.root),
+                        'directory': asset.parent,
+                        'is_asset_directory': False},
+                       {'path': asset_dir.relative_to(inventory.root),
+                        'directory': asset_dir.parent,
+                        'is_asset_directory': True}]
+    results = list(query_assets(inventory, keys=["path"], match=[Filter("is_asset_directory=True")]))
+    assert results == [{'path': asset_dir.relative_to(inventory.root)}]
+    assert read == []
+
+    # path-derived filters are decided before reading the remaining candidates
+    results = list(query_assets(inventory, keys=["path", "other"],
+                                match=[Filter("path=.*different.*"), Filter("other=2")]))
+    assert results == [{'path': asset_dir.relative_to(inventory.root), 'other': 2}]
+    assert read == [asset_dir]
+    read.clear()
+
+    # ... also within queries; only undecided assets are read
+    results = list(query_assets(inventory, keys=["path"], match=[Query.parse("path~different or other=3")]))
+    assert results == [{'path': asset_dir.relative_to(inventory.root)}]
+    assert read == [asset]
+    read.clear()
+    results = list(query_assets(inventory, keys=["path"], match=[Query.parse("not path~different and other=1")]))
+    assert results == [{'path': asset.relative_to(inventory.root)}]
+    assert read == [asset]
+    read.clear()
+
+    # other callables, content keys, or sorting by them need content
+    onyo_get(inventory, keys=["path"], match=[Filter("path=.*different.*").match])
+    assert len(read) == 2
+    read.clear()
+    onyo_get(inventory, keys=["path"], sort={"other": "ascending"})
+    assert len(read) == 2
+
+
+@pytest.mark.ui({'yes': True})
+def test_query_assets_streaming(inventory: Inventory,
+                                capsys) -> None:
+    from onyo.lib.command_utils import natural_sort, sort_assets
+
+    for i in range(12):
+        inventory.add_asset(dict(type="TYPE", make=f"make{i % 5}", model="MODEL", serial=f"S{i}",
+                                 directory=inventory.root / "many"))
+    inventory.commit("add assets")
+    keys = ["make", "serial", "path"]
+    sort = {"make": "descending", "serial": "ascending"}
+
+    results = query_assets(inventory, keys=keys, sort=sort)
+    assert not isinstance(results, list)
+    results = list(results)
+    assert len(results) == 13
+    assert results == natural_sort(results, keys=sort)  # pyre-ignore[6]
+    assert [r["serial"] for r in results[:3]] == ["SERIAL", "S4", "S9"]
+
+    # top-k equals the head of the full result
+    assert list(query_assets(inventory, keys=keys, sort=sort, limit=3)) == results[:3]
+    assert list(query_assets(inventory, keys=keys, sort=sort, limit=100)) == results
+    pytest.raises(ValueError, query_assets, inventory, limit=0)
+
+    # sorted runs spilled to disk and merged are sorted the same
+    assert list(sort_assets(iter(results[::-1]), keys=sort, buffer_size=2)) == results  # pyre-ignore[6]
+    assert list(sort_assets(iter(results), keys={"path": "ascending"}, buffer_size=4)) == \
+        natural_sort(results, keys={"path": "ascending"})
+    assert list(sort_assets([], keys=sort, buffer_size=1)) == []  # pyre-ignore[6]
+
+    onyo_get(inventory, keys=["serial"], sort=sort, limit=2, machine_readable=True)
+    assert capsys.readouterr().out == "SERIAL\nS4\n"
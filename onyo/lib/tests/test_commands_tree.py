@@ -129,3 +129,41 @@ def test_onyo_tree_with_same_dir_twice(inventory: Inventory,
         assert all([part in tree_output for part in path.parts])
     assert tree_output.count(str(directory_path)) == 2
     assert inventory.repo.git.is_clean_worktree()
+
+
+@pytest.mark.ui({'yes': True})
+def test_onyo_tree_options(inventory: Inventory,
+                           capsys) -> None:
+    r"""Limit the depth, list directories only, and count assets."""
+    onyo_tree(inventory, dirs=[('.', inventory.root)], plain=True)
+    assert capsys.readouterr().out == '\n'.join(['.',
+                                                 '├── different',
+                                                 '│   └── place',
+                                                 '├── empty',
+                                                 '└── somewhere',
+                                                 '    └── nested',
+                                                 '        └── TYPE_MAKER_MODEL.SERIAL',
+                                                 ''])
+
+    onyo_tree(inventory, dirs=[('.', inventory.root)], depth=1, count=True, plain=True)
+    assert capsys.readouterr().out == '\n'.join(['. (1)',
+                                                 '├── different (0)',
+                                                 '├── empty (0)',
+                                                 '└── somewhere (1)',
+                                                 ''])
+
+    onyo_tree(inventory, dirs=[('somewhere', inventory.root / 'somewhere')], dirs_only=True, plain=True)
+    assert capsys.readouterr().out == '\n'.join(['somewhere',
+                                                 '└── nested',
+                                                 ''])
+
+    # without `plain`, the same is printed with styles
+    onyo_tree(inventory, dirs=[('.', inventory.root)], depth=1, count=True)
+    assert capsys.readouterr().out == '\n'.join(['. (1)',
+                                                 '├── different (0)',
+                                                 '├── empty (0)',
+                                                 '└── somewhere (1)',
+                                                 ''])
+
+    pytest.raises(ValueError, onyo_tree, inventory, dirs=[('.', inventory.root)], depth=-1)
+    assert inventory.repo.git.is_clean_worktree()
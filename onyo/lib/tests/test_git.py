@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 
 from onyo.lib.exceptions import OnyoInvalidRepoError
-from onyo.lib.git import GitRepo
+from onyo.lib.git import GitRepo, IndexedPaths
 
 # TODO: Alternative approach to fixture:
 #       class that defines a setup via literals;
@@ -205,6 +205,91 @@ def test_GitRepo_commit(gitrepo) -> None:
     gitrepo.commit(test_file, "Test commit message")
     assert hexsha == gitrepo.get_hexsha('HEAD~1')
     assert test_file in gitrepo.files
+    assert gitrepo.is_clean_worktree()
+
+    # nothing to commit
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        gitrepo.commit(test_file, "Nothing")
+    assert "nothing to commit" in exc_info.value.stdout
+
+    # many files, within (new) directories, and removals in a single commit
+    files = [gitrepo.root / 'dir' / f'file_{i}' for i in range(5000)]
+    files[0].parent.mkdir()
+    for f in files:
+        f.write_text(f.name)
+    test_file.unlink()
+    gitrepo.commit(files + [test_file], "Many files")
+    assert all(f in gitrepo.files for f in files)
+    assert test_file not in gitrepo.files
+    assert gitrepo.is_clean_worktree()
+    assert gitrepo.get_commit_msg().startswith("Many files")
+
+    # directories commit everything within; other changes aren't committed
+    (gitrepo.root / 'other').write_text("other")
+    for f in files[:10]:
+        f.unlink()
+    (gitrepo.root / 'dir' / 'new').write_text("new")
+    gitrepo.commit(gitrepo.root / 'dir', "Modify dir")
+    assert all(f not in gitrepo.files for f in files[:10])
+    assert gitrepo.root / 'dir' / 'new' in gitrepo.files
+    assert gitrepo.root / 'other' not in gitrepo.files
+    assert gitrepo._git(['status', '--porcelain']) == "?? other\n"
+
+
+def test_GitRepo_commit_index_and_message(gitrepo) -> None:
+    test_file = gitrepo.root / 'test_file.txt'
+    test_file.write_text("content")
+
+    # empty messages are rejected
+    for message in ["", " \n\n"]:
+        pytest.raises(ValueError, gitrepo.commit, test_file, message)
+    assert gitrepo.get_hexsha() is None
+
+    # the index carries the stat data of committed files; no refresh needed
+    gitrepo.commit(test_file, "Create file")
+    assert gitrepo._git(['diff-files', '--name-only']) == ""
+
+
+def test_GitRepo_commit_hooks(gitrepo) -> None:
+    assert not gitrepo._requires_porcelain_commit()
+    hooks = gitrepo.root / '.git' / 'hooks'
+    hooks.mkdir(exist_ok=True)
+    # samples are not hooks
+    (hooks / 'commit-msg.sample').write_text("#!/bin/sh\nexit 1\n")
+    (hooks / 'commit-msg.sample').chmod(0o755)
+    assert not gitrepo._requires_porcelain_commit()
+
+    # hooks are run
+    hook = hooks / 'commit-msg'
+    hook.write_text("#!/bin/sh\necho 'Hooked: yes' >> \"$1\"\n")
+    hook.chmod(0o755)
+    assert gitrepo._requires_porcelain_commit()
+    test_file = gitrepo.root / 'test_file.txt'
+    test_file.write_text("content")
+    (gitrepo.root / 'other').write_text("other")
+    gitrepo.commit(test_file, "Create file")
+    assert gitrepo.get_commit_msg().splitlines()[:2] == ["Create file", "Hooked: yes"]
+    assert test_file in gitrepo.files
+    assert gitrepo.root / 'other' not in gitrepo.files
+
+    # removals and nothing to commit
+    test_file.unlink()
+    gitrepo.commit(test_file, "Remove file")
+    assert test_file not in gitrepo.files
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        gitrepo.commit(test_file, "Nothing")
+    assert "nothing to commit" in exc_info.value.stdout
+
+    # a failing hook fails the commit
+    hook.write_text("#!/bin/sh\nexit 1\n")
+    pytest.raises(subprocess.CalledProcessError, gitrepo.commit, gitrepo.root / 'other', "Rejected")
+    assert gitrepo.root / 'other' not in gitrepo.files
+    hook.unlink()
+    assert not gitrepo._requires_porcelain_commit()
+
+    # signing is done by git-commit, too
+    gitrepo._git(['config', 'commit.gpgsign', 'true'])
+    assert gitrepo._requires_porcelain_commit()
 
 
 @pytest.mark.gitrepo_contents((Path('some.file'),
@@ -304,6 +389,16 @@ def test_GitRepo_config(gitrepo) -> None:
     assert gitrepo.get_config("onyo.test") is None
     assert gitrepo.get_config("onyo.test", file_=cfg_file) == "another"
 
+    # section and key names are case-insensitive, subsection names are not
+    assert gitrepo.get_config("SECTION.name.OPTION") == "some"
+    assert gitrepo.get_config("section.NAME.option") is None
+
+    # modifications by other means are picked up
+    subprocess.run(['git', 'config', '--file', str(cfg_file), 'onyo.test', 'changed'], check=True)
+    assert gitrepo.get_config("onyo.test", file_=cfg_file) == "changed"
+    subprocess.run(['git', 'config', '--local', 'section.name.other', 'new'], cwd=gitrepo.root, check=True)
+    assert gitrepo.get_config("section.name.other") == "new"
+
 
 def test_GitRepo_check_ignore(gitrepo) -> None:
     committed = gitrepo.root / 'book.pdf'
@@ -311,7 +406,7 @@ def test_GitRepo_check_ignore(gitrepo) -> None:
     gitrepo.commit(committed, "Add a pdf")
 
     ignore_file = gitrepo.root / 'some'
-    ignore_file.write_text("*.pdf\nsub/\n")
+    ignore_file.write_text("*.pdf\nsub/\n!keep.pdf\n")
     gitignore = gitrepo.root / '.gitignore'
     gitignore.write_text('*.txt\n')
 
@@ -327,5 +422,126 @@ def test_GitRepo_check_ignore(gitrepo) -> None:
     assert all(p in excluded for p in paths_to_test if gitrepo.root / 'sub' in p.parents)
     assert all(p not in excluded for p in paths_to_test if p.name.endswith('.txt'))
 
+    # matching a negated pattern does not exclude
+    assert gitrepo.check_ignore(ignore=ignore_file, paths=[gitrepo.root / 'keep.pdf']) == []
+    assert gitrepo.check_ignore(ignore=ignore_file, paths=[]) == []
+
     pytest.raises(subprocess.CalledProcessError, gitrepo.check_ignore,
                   ignore=ignore_file, paths=[Path('/') / 'outside' / 'sub' / 'file'])
+
+
+@pytest.mark.gitrepo_contents((Path('some.file'),
+                               "some content"),
+                              (Path('top') / 'mid' / "another.txt",
+                               "")
+                              )
+def test_GitRepo_cat_files(gitrepo) -> None:
+    some_file = gitrepo.root / 'some.file'
+    another_file = gitrepo.root / 'top' / 'mid' / 'another.txt'
+    missing = gitrepo.root / 'doesnotexist'
+
+    # contents are delivered in order of request; missing files yield `None`:
+    assert list(gitrepo.cat_files([some_file, missing, another_file, some_file])) == \
+        [(some_file, "some content"), (missing, None), (another_file, ""), (some_file, "some content")]
+
+    # contents are read from the object store, not the worktree:
+    some_file.write_text("modified")
+    assert list(gitrepo.cat_files([some_file])) == [(some_file, "some content")]
+    subprocess.run(['git', 'commit', '-a', '-m', 'modify'], cwd=gitrepo.root, check=True)
+    assert list(gitrepo.cat_files([some_file])) == [(some_file, "modified")]
+    gitrepo.clear_cache()
+    assert list(gitrepo.cat_files([some_file])) == [(some_file, "modified")]
+    assert list(gitrepo.cat_files([some_file], commitish='HEAD~1')) == [(some_file, "some content")]
+
+    # many more requests than fit into a single chunk; stopping early is fine:
+    many = [some_file, another_file] * 100
+    for i, (p, content) in enumerate(gitrepo.cat_files(many)):
+        if i == 70:
+            break
+    assert [c for _, c in gitrepo.cat_files(many)] == ["modified", ""] * 100
+
+    # nested use doesn't interleave the responses, and leaves the shared process intact:
+    outer = gitrepo.cat_files(many)
+    nested = []
+    for i, (p, content) in enumerate(outer):
+        assert content == ("modified" if p == some_file else "")
+        if i % 50 == 0:
+            nested.append(list(gitrepo.cat_files([another_file, some_file])))
+    assert nested == [[(another_file, ""), (some_file, "modified")]] * 4
+    shared = gitrepo._cat_file
+    assert list(gitrepo.cat_files([some_file])) == [(some_file, "modified")]
+    assert gitrepo._cat_file is shared
+
+
+@pytest.mark.gitrepo_contents((Path('some.file'),
+                               "some content"),
+                              (Path('top') / 'mid' / "another.txt",
+                               "")
+                              )
+def test_GitRepo_get_changed_files(gitrepo) -> None:
+    some_file = gitrepo.root / 'some.file'
+    another_file = gitrepo.root / 'top' / 'mid' / 'another.txt'
+    new_file = gitrepo.root / 'top' / 'new file'
+    untracked = gitrepo.root / 'untracked'
+    head = gitrepo.get_head()
+
+    assert gitrepo.get_changed_files(head) == []
+
+    # committed, deleted, unstaged, and untracked changes
+    new_file.write_text("new")
+    another_file.unlink()
+    gitrepo.commit([new_file, another_file], "change")
+    some_file.write_text("modified")
+    untracked.write_text("")
+    assert sorted(gitrepo.get_changed_files(head)) == sorted([some_file, another_file, new_file, untracked])
+    assert sorted(gitrepo.get_changed_files('HEAD')) == sorted([some_file, untracked])
+
+    pytest.raises(ValueError, gitrepo.get_changed_files, 'doesnotexist')
+
+
+def test_IndexedPaths() -> None:
+    paths = [Path('/some/a.txt'), Path('/some/dir/a.txt'), Path('/b.txt')]
+    indexed = IndexedPaths(paths)
+
+    # behaves like the list it was created from
+    assert indexed == paths
+    assert list(indexed) == paths
+    assert len(indexed) == 3
+    assert indexed[1] == paths[1]
+    assert indexed[1:] == paths[1:]
+    assert Path('/b.txt') in indexed
+    assert Path('/c.txt') not in indexed
+    assert IndexedPaths() == []
+    assert not IndexedPaths()
+
+    # lookup by name
+    assert indexed.with_name('a.txt') == [Path('/some/a.txt'), Path('/some/dir/a.txt')]
+    assert indexed.with_name('c.txt') == []
+
+    # subtrees
+    paths = [Path('/r/a-b/x'), Path('/r/a/b/c/x'), Path('/r/a/b/x'), Path('/r/a/x'), Path('/r/x')]
+    indexed = IndexedPaths(paths)
+    assert indexed.subtrees([Path('/r')]) == paths
+    assert indexed.subtrees([Path('/r/a')]) == paths[1:4]
+    assert indexed.subtrees([Path('/r/a'), Path('/r/a/b'), Path('/r/x')]) == paths[1:]
+    assert indexed.subtrees([Path('/r/a/x')]) == [Path('/r/a/x')]
+    assert indexed.subtrees([Path('/r/a/y'), Path('/r/a-')]) == []
+    assert indexed.subtrees([Path('/r')], depth=1) == [Path('/r/x')]
+    assert indexed.subtrees([Path('/r')], depth=2) == [Path('/r/a-b/x'), Path('/r/a/x'), Path('/r/x')]
+    assert indexed.subtrees([Path('/r/a/x')], depth=1) == [Path('/r/a/x')]
+    assert indexed.subtrees([Path('/r')], exclude=[Path('/r/a/b'), Path('/r/x'), Path('/y')]) == \
+        [Path('/r/a-b/x'), Path('/r/a/x')]
+    assert indexed.subtrees([Path('/r/a')], exclude=[Path('/r')]) == []
+
+
+@pytest.mark.gitrepo_contents((Path('some.file'),
+                               "some content"),
+                              (Path('top') / 'mid' / "another.txt",
+                               "")
+                              )
+def test_GitRepo_files(gitrepo) -> None:
+    assert isinstance(gitrepo.files, IndexedPaths)
+    assert gitrepo.root / 'some.file' in gitrepo.files
+    assert gitrepo.root / 'top' / 'mid' / 'another.txt' in gitrepo.files
+    assert gitrepo.root / 'top' / 'mid' not in gitrepo.files
+    assert gitrepo.files.with_name('another.txt') == [gitrepo.root / 'top' / 'mid' / 'another.txt']
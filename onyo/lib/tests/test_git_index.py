@@ -0,0 +1,71 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from onyo.lib.git_index import (
+    UnsupportedIndexError,
+    read_head_tree,
+    read_index,
+)
+
+
+@pytest.mark.parametrize('version', [2, 3, 4])
+@pytest.mark.gitrepo_contents((Path('some.file'), "some content"),
+                              (Path('top') / 'mid' / "another.txt", ""),
+                              (Path('top') / 'mid' / "yet_another.txt", "more"),
+                              (Path('top') / "ünicode", "content"),
+                              )
+def test_read_index(gitrepo, version: int) -> None:
+    subprocess.run(['git', 'update-index', '--index-version', str(version)], cwd=gitrepo.root, check=True)
+    if version == 3:
+        # extended flags are only written for entries that need them
+        subprocess.run(['git', 'update-index', '--skip-worktree', 'some.file'], cwd=gitrepo.root, check=True)
+        pytest.raises(UnsupportedIndexError, read_index, gitrepo.root / '.git' / 'index')
+        subprocess.run(['git', 'update-index', '--no-skip-worktree', 'some.file'], cwd=gitrepo.root, check=True)
+    subprocess.run(['git', 'write-tree'], cwd=gitrepo.root, check=True, capture_output=True)
+
+    entries, tree = read_index(gitrepo.root / '.git' / 'index')
+    ls_files = subprocess.run(['git', 'ls-files', '-s', '-z'], cwd=gitrepo.root,
+                              check=True, capture_output=True, text=True).stdout
+    expected = [(line.split('\t')[1], line.split(' ')[1], int(line.split(' ')[0], 8))
+                for line in ls_files.split('\0') if line]
+    assert [(e.path, e.blob_id, e.mode) for e in entries] == expected
+    assert all(e.size == (gitrepo.root / e.path).stat().st_size for e in entries)
+    assert tree == gitrepo._git(['rev-parse', 'HEAD^{tree}']).strip()
+    assert read_head_tree(gitrepo.root / '.git') == tree
+
+    # staged change invalidates the cache-tree
+    (gitrepo.root / 'some.file').write_text("new content")
+    subprocess.run(['git', 'add', 'some.file'], cwd=gitrepo.root, check=True)
+    entries, tree = read_index(gitrepo.root / '.git' / 'index')
+    assert tree is None
+    # ... which is why tracked files are then listed from HEAD
+    assert gitrepo.get_subtrees() == [gitrepo.root / e.path for e in entries]
+
+
+@pytest.mark.gitrepo_contents((Path('some.file'), "some content"))
+def test_read_index_invalid(gitrepo) -> None:
+    index_file = gitrepo.root / '.git' / 'index'
+    pytest.raises(UnsupportedIndexError, read_index, gitrepo.root / 'nonexisting')
+
+    # corrupt the index
+    content = index_file.read_bytes()
+    index_file.write_bytes(content[:20] + b'x' + content[21:])
+    pytest.raises(UnsupportedIndexError, read_index, index_file)
+    index_file.write_bytes(content[:30])
+    pytest.raises(UnsupportedIndexError, read_index, index_file)
+    # files are then listed via git
+    assert gitrepo.get_subtrees() == [gitrepo.root / 'some.file']
+
+
+@pytest.mark.gitrepo_contents((Path('some.file'), "some content"))
+def test_read_head_tree(gitrepo) -> None:
+    git_dir = gitrepo.root / '.git'
+    tree = gitrepo._git(['rev-parse', 'HEAD^{tree}']).strip()
+    assert read_head_tree(git_dir) == tree
+
+    # packed refs and objects
+    subprocess.run(['git', 'gc', '-q'], cwd=gitrepo.root, check=True)
+    assert read_head_tree(git_dir) is None
+    assert gitrepo.get_subtrees() == [gitrepo.root / 'some.file']
@@ -281,6 +281,107 @@ def test_modify_asset(repo: OnyoRepo) -> None:
     assert repo.get_asset_content(new_asset_file) == expected_asset
 
 
+def test_modify_asset_repeatedly(inventory: Inventory) -> None:
+    asset_file = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    asset = inventory.get_asset(asset_file)
+    content = {k: v for k, v in asset.items() if k != 'path'}
+
+    # repeated modifications of an asset collapse into one operation
+    inventory.modify_asset(asset_file, content | dict(other=2, model="MODEL2"))
+    queue = list(inventory.operations)
+    inventory.modify_asset(asset_file, content | dict(other=3, model="MODEL3"))
+    assert num_operations(inventory, 'modify_assets') == 1
+    assert num_operations(inventory, 'rename_assets') == 1
+    assert inventory.operations[0].operands[0] == asset
+    assert inventory.operations[0].operands[1]['other'] == 3
+    assert inventory.operations[1].operands == (asset_file, asset_file.parent / "TYPE_MAKER_MODEL3.SERIAL")
+    # the replaced name is free again
+    assert "TYPE_MAKER_MODEL2.SERIAL" not in inventory._get_pending_asset_names()
+    assert "TYPE_MAKER_MODEL3.SERIAL" in inventory._get_pending_asset_names()
+
+    # a previous state of the queue can be restored
+    inventory.operations = queue
+    assert inventory.operations[0].operands[1]['other'] == 2
+    assert list(inventory._get_pending_asset_names()) == ["TYPE_MAKER_MODEL2.SERIAL"]
+
+    # reverting a pending modification drops it
+    pytest.raises(NoopError, inventory.modify_asset, asset_file, dict(content))
+    assert inventory.operations == []
+    assert not inventory._get_pending_asset_names()
+
+    inventory.modify_asset(asset_file, content | dict(other=4))
+    inventory.modify_asset(asset_file, content | dict(other=5))
+    inventory.commit("Modify twice")
+    assert inventory.get_asset(asset_file)['other'] == 5
+
+
+def test_modify_asset_keeps_explicit_rename(inventory: Inventory) -> None:
+    asset_file = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    asset = inventory.get_asset(asset_file)
+    content = {k: v for k, v in asset.items() if k != 'path'}
+    renamed = asset_file.parent / "TYPE_MAKER_MODEL2.SERIAL"
+
+    # modify -> explicit rename -> modify
+    inventory.modify_asset(asset_file, content | dict(other=2))
+    inventory.rename_asset(content | dict(model="MODEL2", path=asset_file))
+    inventory.modify_asset(asset_file, content | dict(other=3))
+    assert num_operations(inventory, 'modify_assets') == 1
+    assert [op.operands for op in inventory.operations if op.operator == OPERATIONS_MAPPING['rename_assets']] == \
+        [(asset_file, renamed)]
+    assert inventory.operations[0].operands[1]['other'] == 3
+
+    # the rename implied by a modification is still replaced
+    inventory.reset()
+    inventory.modify_asset(asset_file, content | dict(model="MODEL3"))
+    inventory.modify_asset(asset_file, content | dict(model="MODEL4"))
+    assert [op.operands for op in inventory.operations if op.operator == OPERATIONS_MAPPING['rename_assets']] == \
+        [(asset_file, asset_file.parent / "TYPE_MAKER_MODEL4.SERIAL")]
+
+
+def test_replace_operation_many(inventory: Inventory) -> None:
+    asset_file = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    content = {k: v for k, v in inventory.get_asset(asset_file).items() if k != 'path'}
+    for i in range(3):
+        inventory.add_asset(dict(type="TYPE", make="MAKER", model="MODEL", serial=str(i),
+                                 directory=inventory.root))
+    # repeated modifications are replaced in place, keeping the order of the queue
+    for i in range(1000):
+        inventory.modify_asset(asset_file, content | dict(other=i + 2))
+    inventory.add_asset(dict(type="TYPE", make="MAKER", model="MODEL", serial="last", directory=inventory.root))
+    assert [op.operator for op in inventory.operations] == \
+        [OPERATIONS_MAPPING['new_assets']] * 3 + [OPERATIONS_MAPPING['modify_assets'],
+                                                  OPERATIONS_MAPPING['new_assets']]
+    assert inventory.operations[3].operands[1]['other'] == 1001
+
+
+def test_pending_operations(inventory: Inventory) -> None:
+    asset_file = inventory.root / "somewhere" / "nested" / "TYPE_MAKER_MODEL.SERIAL"
+    for i in range(3):
+        inventory.add_asset(dict(type="TYPE", make="MAKER", model="MODEL", serial=str(i),
+                                 directory=inventory.root / "new" / "dir"))
+    assert set(inventory._get_pending_dirs()) == {inventory.root / "new", inventory.root / "new" / "dir"}
+    assert set(inventory._get_pending_asset_names()) == {f"TYPE_MAKER_MODEL.{i}" for i in range(3)}
+    # conflicts with pending and existing names
+    pytest.raises(ValueError, inventory.add_asset, dict(type="TYPE", make="MAKER", model="MODEL", serial="1",
+                                                        directory=inventory.root))
+    pytest.raises(ValueError, inventory.add_asset, dict(type="TYPE", make="MAKER", model="MODEL", serial="SERIAL",
+                                                        directory=inventory.root))
+
+    inventory.remove_asset(asset_file)
+    assert inventory._is_pending_removal(asset_file, mode='assets')
+    assert not inventory._is_pending_removal(asset_file, mode='dirs')
+    # queueing it again is a noop
+    assert inventory.remove_asset(inventory.get_asset(asset_file)) == []
+
+    # truncating the queue updates what's pending
+    inventory.operations = inventory.operations[:3]
+    assert set(inventory._get_pending_asset_names()) == {"TYPE_MAKER_MODEL.0"}
+    assert not inventory._is_pending_removal(asset_file)
+    inventory.reset()
+    assert not inventory._get_pending_dirs()
+    assert not inventory._get_pending_asset_names()
+
+
 def test_add_directory(repo: OnyoRepo) -> None:
     inventory = Inventory(repo)
 
@@ -90,6 +90,91 @@ def test_clear_cache(onyorepo) -> None:
     assert asset not in onyorepo.asset_paths
 
 
+@pytest.mark.inventory_assets(dict(type="asset",
+                                   make="for",
+                                   model="test",
+                                   serial=0,
+                                   path=Path('a') / 'test' / 'asset_for_test.0'),
+                              dict(type="asset",
+                                   make="dir",
+                                   model="test",
+                                   serial=1,
+                                   is_asset_dir=True,
+                                   is_asset_directory=True,
+                                   path=Path('a') / 'asset_dir_test.1'))
+def test_persistent_paths_cache(onyorepo) -> None:
+    from onyo.lib.cache import PATHS_CACHE_FILE
+    cache_file = onyorepo.git.git_dir / PATHS_CACHE_FILE
+    asset = onyorepo.test_annotation['assets'][0]['path']
+    asset_dir = onyorepo.test_annotation['assets'][1]['path']
+
+    expected = list(onyorepo.asset_paths)
+    assert cache_file.exists()
+    assert onyorepo.is_inventory_dir(onyorepo.git.root)
+    assert onyorepo.is_inventory_dir(asset.parent)
+    assert onyorepo.is_asset_dir(asset_dir)
+    assert not onyorepo.is_asset_dir(asset)
+
+    # a new instance uses the cache instead of computing the paths
+    new_repo = OnyoRepo(onyorepo.git.root)
+    new_repo.get_asset_paths = None
+    assert new_repo.asset_paths == expected
+    assert new_repo.is_inventory_dir(asset.parent)
+    assert new_repo.is_inventory_dir(asset_dir)
+    assert new_repo.is_asset_dir(asset_dir)
+    assert not new_repo.is_inventory_dir(asset)
+
+    # a commit invalidates the cache
+    asset.unlink()
+    onyorepo.git.commit(asset, "asset deleted")
+    new_repo = OnyoRepo(onyorepo.git.root)
+    assert asset not in new_repo.asset_paths
+    assert asset_dir in new_repo.asset_paths
+
+    # an invalid cache file is ignored
+    cache_file.write_text("no json")
+    assert asset not in OnyoRepo(onyorepo.git.root).asset_paths
+
+
+@pytest.mark.inventory_assets(dict(type="asset",
+                                   make="for",
+                                   model="test",
+                                   serial=0,
+                                   path=Path('a') / 'test' / 'asset_for_test.0'),
+                              dict(type="asset",
+                                   make="for",
+                                   model="test",
+                                   serial=0,
+                                   path=Path('b') / 'asset_for_test.0'),
+                              dict(type="asset",
+                                   make="for",
+                                   model="test",
+                                   serial=1,
+                                   path=Path('asset_for_test.1')))
+def test_get_asset_paths_by_name(onyorepo, capsys) -> None:
+    from onyo.lib.utils import has_unique_names
+    duplicates = [a['path'] for a in onyorepo.test_annotation['assets'][:2]]
+    unique = onyorepo.test_annotation['assets'][2]['path']
+
+    assert onyorepo.get_asset_paths_by_name('asset_for_test.0') == sorted(duplicates)
+    assert onyorepo.get_asset_paths_by_name('asset_for_test.1') == [unique]
+    assert onyorepo.get_asset_paths_by_name('asset_for_test.2') == []
+    assert onyorepo.get_asset_paths_by_name('a') == []
+
+    # fsck's check reports the duplicates only
+    assert not has_unique_names(onyorepo.asset_paths)
+    err = capsys.readouterr().err
+    assert all(str(p) in err for p in duplicates)
+    assert str(unique) not in err
+    assert has_unique_names([p for p in onyorepo.asset_paths if p != duplicates[0]])
+
+    # invalidated with the cache
+    unique.unlink()
+    onyorepo.git.commit(unique, "asset deleted")
+    onyorepo.clear_cache()
+    assert onyorepo.get_asset_paths_by_name('asset_for_test.1') == []
+
+
 def test_Repo_generate_commit_message(onyorepo: OnyoRepo) -> None:
     """A generated commit message has to have a header with less then
     80 characters length, and a body with the paths to changed files
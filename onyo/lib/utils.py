@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import copy
+import io
+import math
 import os
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from ruamel.yaml import CommentedMap, scanner, YAML  # pyre-ignore[21]
+from ruamel.yaml import CommentedMap, YAML  # pyre-ignore[21]
+from ruamel.yaml.constructor import ConstructorError  # pyre-ignore[21]
 from ruamel.yaml.error import YAMLError  # pyre-ignore[21]
 
 from onyo.lib.consts import PSEUDO_KEYS, RESERVED_KEYS
@@ -14,8 +17,9 @@ from onyo.lib.ui import ui
 
 if TYPE_CHECKING:
     from typing import (
+        Any,
+        Collection,
         Dict,
-        Set,
     )
 
 
@@ -67,7 +71,48 @@ def dict_to_asset_yaml(d: Dict[str, bool | float | int | str | Path]) -> str:
     return s.getvalue()
 
 
-def get_asset_content(asset_file: Path) -> dict[str, bool | float | int | str | Path]:
+_yaml_loaders: dict[bool, YAML] = dict()  # pyre-ignore[11]
+
+
+def get_yaml_loader(read_only: bool = False) -> YAML:  # pyre-ignore[11]
+    r"""Get a YAML instance for loading asset content.
+
+    Instances are created once and reused.
+
+    Parameters
+    ----------
+    read_only
+        Whether the loaded content is only read, rather than modified and
+        written back. If so, the (libyaml-backed, if available) safe loader is
+        used, which returns plain dictionaries without comments and
+        formatting. Otherwise, the round-trip loader is used, which preserves
+        them.
+    """
+    if read_only not in _yaml_loaders:
+        _yaml_loaders[read_only] = YAML(typ='safe') if read_only else YAML(typ='rt', pure=True)
+    return _yaml_loaders[read_only]
+
+
+def _load_yaml(source: Path | io.StringIO,
+               read_only: bool = False) -> object:
+    r"""Load YAML from `source` with the loader returned by `get_yaml_loader()`.
+
+    Content the safe loader can't construct (like custom tags) is loaded with
+    the round-trip loader instead.
+    """
+    try:
+        return get_yaml_loader(read_only).load(source)
+    except ConstructorError:  # pyre-ignore[66]
+        if not read_only:
+            raise
+        if isinstance(source, io.StringIO):
+            source.seek(0)
+        return get_yaml_loader().load(source)
+
+
+def get_asset_content(asset_file: Path,
+                      content: str | None = None,
+                      read_only: bool = False) -> dict[str, bool | float | int | str | Path]:
     r"""Get the contents of an asset as a dictionary.
 
     If the asset file's contents are not valid YAML, an error is printed.
@@ -76,11 +121,22 @@ def get_asset_content(asset_file: Path) -> dict[str, bool | float | int | str |
     ----------
     asset_file
         The Path of the asset file to get the contents of.
+    content
+        The already read content of `asset_file` (e.g. from git's object
+        store). If given, this is parsed instead of reading `asset_file`.
+    read_only
+        Whether the content is only read. If so, it's parsed faster into plain
+        dictionaries, which lack the comments and formatting needed to write
+        it back. See `get_yaml_loader()`.
     """
-    yaml = YAML(typ='rt', pure=True)
     contents = dict()
+    source = asset_file
+    if content is not None:
+        # Let error messages refer to the file, rather than to "<unicode string>".
+        source = io.StringIO(content)
+        source.name = str(asset_file)
     try:
-        contents = yaml.load(asset_file)
+        contents = _load_yaml(source, read_only)
     except YAMLError as e:  # pyre-ignore[66]
         # Remove ruaml usage pointer (see github issue 436)
         if hasattr(e, 'note') and isinstance(e.note, str) and "suppress this check" in e.note:
@@ -95,6 +151,41 @@ def get_asset_content(asset_file: Path) -> dict[str, bool | float | int | str |
     return contents
 
 
+def to_number(value: Any) -> int | float | None:
+    r"""Get the numeric value of `value`, if it has one.
+
+    Strings are converted if they represent a number. Booleans and
+    non-finite numbers (like ``nan`` or ``inf``) are not considered numeric.
+
+    Parameters
+    ----------
+    value
+        Value to convert.
+
+    Returns
+    -------
+    int, float, or None
+        The number. `None`, if `value` isn't numeric.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+    return None
+
+
 def get_temp_file() -> Path:
     r"""Create and return the Path of a new temporary file.
     """
@@ -103,7 +194,7 @@ def get_temp_file() -> Path:
     return Path(tmp_path)
 
 
-def has_unique_names(asset_files: Set[Path]) -> bool:
+def has_unique_names(asset_files: Collection[Path]) -> bool:
     r"""Check files for unique file names.
 
     If duplicates are found, an error is printed listing them.
@@ -111,10 +202,12 @@ def has_unique_names(asset_files: Set[Path]) -> bool:
     Parameters
     ----------
     asset_files
-        A set of files to check for the uniqueness of their file names.
+        A collection of files to check for the uniqueness of their file names.
     """
-    asset_names = [a.name for a in asset_files]
-    duplicates = [a for a in asset_files if asset_names.count(a.name) > 1]
+    from collections import Counter
+
+    asset_names = Counter(a.name for a in asset_files)
+    duplicates = [a for a in asset_files if asset_names[a.name] > 1]
     duplicates.sort(key=lambda x: x.name)
 
     if duplicates:
@@ -125,7 +218,25 @@ def has_unique_names(asset_files: Set[Path]) -> bool:
     return True
 
 
-def validate_yaml(asset_files: list[Path] | None) -> bool:
+def valid_yaml(source: Path | str) -> bool:
+    r"""Whether `source` is valid YAML.
+
+    Module-level, so that it can be run in worker processes.
+
+    Parameters
+    ----------
+    source
+        Path of a file to check, or the content to check itself.
+    """
+    try:
+        _load_yaml(io.StringIO(source) if isinstance(source, str) else source, read_only=True)
+    except YAMLError:  # pyre-ignore[66]
+        return False
+    return True
+
+
+def validate_yaml(asset_files: list[Path] | None,
+                  jobs: int = 1) -> bool:
     r"""Check files for valid YAML.
 
     If files with invalid YAML are detected, an error is printed listing them.
@@ -134,18 +245,28 @@ def validate_yaml(asset_files: list[Path] | None) -> bool:
     ----------
     asset_files
         A list of files to check for valid YAML.
+    jobs
+        Number of processes to parse the files with.
     """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
     # Note: Does not (and cannot) account for asset dirs automatically in this form.
     #       Thus needs to be done by caller.
     # Note: assumes absolute paths!
-    invalid_yaml = []
-    asset_files = asset_files or []
-    for asset in asset_files:
-        # TODO: use valid_yaml()
-        try:
-            YAML(typ='rt').load(asset)
-        except scanner.ScannerError:  # pyre-ignore[66]
-            invalid_yaml.append(str(asset))
+    asset_files = list(asset_files or [])
+    # Starting processes only pays off for enough files.
+    if jobs > 1 and len(asset_files) >= 8 * jobs:
+        # This may run in a thread alongside others (see `onyo.lib.commands.fsck()`).
+        # Don't fork a multi-threaded process, which can deadlock on locks held by
+        # other threads.
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(method)) as executor:
+            valid = list(executor.map(valid_yaml, asset_files,
+                                      chunksize=max(1, len(asset_files) // (4 * jobs))))
+    else:
+        valid = [valid_yaml(a) for a in asset_files]
+    invalid_yaml = [str(a) for a, v in zip(asset_files, valid) if not v]
 
     if invalid_yaml:
         ui.error('The following files fail YAML validation:\n{}'.format(
@@ -245,10 +245,11 @@ def setup_parser() -> OnyoArgumentParser:
     r"""Setup and return a fully populated OnyoArgumentParser for Onyo and all subcommands.
     """
     from onyo.onyo_arguments import args_onyo
+    from onyo.cli.cache import args_cache, epilog_cache
     from onyo.cli.cat import args_cat, epilog_cat
     from onyo.cli.config import args_config, epilog_config
     from onyo.cli.edit import args_edit, epilog_edit
-    from onyo.cli.fsck import epilog_fsck
+    from onyo.cli.fsck import args_fsck, epilog_fsck
     from onyo.cli.get import args_get, epilog_get
     from onyo.cli.history import args_history, epilog_history
     from onyo.cli.init import args_init, epilog_init
@@ -276,6 +277,18 @@ def setup_parser() -> OnyoArgumentParser:
     )
     subcmds.metavar = '<command>'
     #
+    # subcommand "cache"
+    #
+    cmd_cache = subcmds.add_parser(
+        'cache',
+        description=cli.cache.__doc__,
+        epilog=epilog_cache,
+        formatter_class=parser.formatter_class,
+        help='Manage the cache of parsed asset contents.'
+    )
+    cmd_cache.set_defaults(run=cli.cache)
+    build_parser(cmd_cache, args_cache)
+    #
     # subcommand "cat"
     #
     cmd_cat = subcmds.add_parser(
@@ -322,6 +335,7 @@ def setup_parser() -> OnyoArgumentParser:
         help='Run a suite of integrity checks on the Onyo repository and its contents.'
     )
     cmd_fsck.set_defaults(run=cli.fsck)
+    build_parser(cmd_fsck, args_fsck)
     #
     # subcommand "get"
     #